@@ -0,0 +1,124 @@
+"""
+Benchmark the streaming HTML extractor against the BeautifulSoup path.
+
+Runs every page in benchmarks/fixtures/pages/, the card fixtures rendered as
+Hub-like pages (benchmarks/stub_hf_server.py) and synthetic large pages
+through three extractors:
+
+  legacy   the original html_to_text: full BeautifulSoup tree of the whole
+           page, then truncation
+  bs4      BeautifulSoup limited to the model-card container (reference)
+  stream   src/html_extract.py's streaming engine
+
+It checks that `stream` returns exactly what `bs4` returns, with and without a
+character budget, and reports throughput and peak Python heap per extractor.
+
+Usage:
+  python benchmarks/bench_extractor.py [--iterations 50] [--synthetic-scale 40] [--budget 150000]
+
+Exits non-zero if any page extracts differently.
+"""
+
+import argparse
+import json
+import pathlib
+import sys
+import time
+import tracemalloc
+
+ROOT = pathlib.Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "benchmarks"))
+
+import stub_hf_server  # noqa: E402
+from src import html_extract  # noqa: E402
+
+PAGES_DIR = ROOT / "benchmarks" / "fixtures" / "pages"
+
+
+def legacy_extract(html: str, max_chars: int) -> str:
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, "html.parser")
+    for tag in soup(["script", "style", "noscript"]):
+        tag.decompose()
+    text = soup.get_text(separator="\n")
+    text = "\n".join(line.strip() for line in text.splitlines() if line.strip())
+    return html_extract.truncate(text, max_chars)
+
+
+def load_pages(scale: int) -> dict:
+    pages = {str(p.relative_to(ROOT)): p.read_text(encoding="utf-8") for p in sorted(PAGES_DIR.glob("*.html"))}
+    cards = stub_hf_server.load_cards(stub_hf_server.FIXTURES_DIR)
+    for repo, (markdown, _) in cards.items():
+        pages[f"rendered/{repo}"] = stub_hf_server.render_page(repo, markdown)
+
+    # Long cards behind heavy page chrome (hydration JSON, file listings)
+    markdown = "\n".join(md for md, _ in cards.values())
+    big = stub_hf_server.render_page("synthetic/long-card", "\n".join([markdown] * scale))
+    chrome = "<script>window.__DATA__ = %s;</script>" % json.dumps({"rows": list(range(scale * 2000))})
+    pages["synthetic/long-card"] = big
+    pages["synthetic/heavy-chrome"] = big.replace("</body>", chrome * 5 + "</body>")
+    pages["synthetic/no-container"] = big.replace("model-card-content", "card-body")
+    return pages
+
+
+def bench(fn, pages: list, iterations: int, max_chars) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        for html in pages:
+            fn(html, max_chars)
+    return time.perf_counter() - start
+
+
+def peak_heap_mb(fn, pages: list, max_chars) -> float:
+    tracemalloc.start()
+    for html in pages:
+        fn(html, max_chars)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak / 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--synthetic-scale", type=int, default=40)
+    parser.add_argument("--budget", type=int, default=150_000, help="max chars (like MAX_INPUT_CHARS)")
+    args = parser.parse_args()
+
+    if "bs4" not in html_extract.ENGINES:
+        sys.exit("beautifulsoup4 is required for the reference extractor")
+    pages = load_pages(args.synthetic_scale)
+    reference, stream = html_extract.ENGINES["bs4"], html_extract.ENGINES["stream"]
+
+    mismatches = []
+    for name, html in pages.items():
+        for budget in (None, args.budget, 2_000, 100):
+            if stream(html, budget) != reference(html, budget):
+                mismatches.append(f"{name} (budget {budget})")
+    for name in mismatches:
+        print(f"MISMATCH: {name}", file=sys.stderr)
+
+    extractors = (("legacy", legacy_extract), ("bs4", reference), ("stream", stream))
+    print(f"{'corpus':<12}{'extractor':<11}{'pages/s':>10}{'MB/s':>9}{'peak heap MB':>14}")
+    corpora = {
+        "fixtures": [h for n, h in pages.items() if not n.startswith("synthetic/")],
+        "synthetic": [h for n, h in pages.items() if n.startswith("synthetic/")],
+    }
+    for corpus, docs in corpora.items():
+        iterations = args.iterations if corpus == "fixtures" else max(1, args.iterations // 10)
+        megabytes = sum(len(d.encode("utf-8")) for d in docs) * iterations / 1e6
+        for label, fn in extractors:
+            elapsed = bench(fn, docs, iterations, args.budget)
+            heap = peak_heap_mb(fn, docs, args.budget)
+            print(f"{corpus:<12}{label:<11}{len(docs) * iterations / elapsed:>10.1f}"
+                  f"{megabytes / elapsed:>9.2f}{heap:>14.1f}")
+
+    if mismatches:
+        sys.exit(1)
+    print(f"All {len(pages)} pages extract identically.")
+
+
+if __name__ == "__main__":
+    main()
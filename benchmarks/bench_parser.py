@@ -0,0 +1,114 @@
+"""
+Benchmark the single-pass evaluation parser against the per-section parsers.
+
+Replays every markdown file in evaluations/ plus synthetic large documents,
+checks that server.parse_evaluation returns exactly what the four legacy
+parsers return, and reports throughput for both.
+
+Usage:
+  python benchmarks/bench_parser.py [--iterations 200] [--synthetic-scale 50]
+
+Exits non-zero if any document parses differently.
+"""
+
+import argparse
+import os
+import pathlib
+import sys
+import time
+
+ROOT = pathlib.Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+os.environ.setdefault("CARD_GRADER_CACHE_PATH", ":memory:")
+
+import server  # noqa: E402
+
+
+def legacy_parse(filled_md: str) -> dict:
+    filled_md = server.force_model_card_type(filled_md)
+    category_scores, raw_total = server.parse_scoring_table(filled_md)
+    return {
+        "filled_markdown": filled_md,
+        "basic_info": server.parse_basic_info(filled_md).model_dump(),
+        "category_scores": [c.model_dump() for c in category_scores],
+        "raw_total": raw_total,
+        "standards_summary": server.parse_standards_table(filled_md).model_dump(),
+        "gaps": server.parse_gaps(filled_md).model_dump(),
+    }
+
+
+def single_pass_parse(filled_md: str) -> dict:
+    return server.parse_evaluation(filled_md).model_dump()
+
+
+def synthetic_documents(scale: int) -> dict:
+    """Large and awkward documents built from the real evaluations."""
+    real = [p.read_text(encoding="utf-8") for p in sorted((ROOT / "evaluations").glob("*.md"))]
+    template = (ROOT / "templates" / "card_review_template.md").read_text(encoding="utf-8")
+    base = real[0] if real else template
+
+    standards_rows = "\n".join(
+        f"| Extra standard item {i} | {'✓~✗x'[i % 4]} | note {i} |" for i in range(scale * 20)
+    )
+    gap_bullets = "\n".join(f"  - gap detail number {i} with some text" for i in range(scale * 20))
+
+    big = base.replace(
+        "| Cross-references / traceability",
+        standards_rows + "\n| Cross-references / traceability",
+    ).replace("- **Ambiguous:**", "- **Ambiguous:**\n" + gap_bullets)
+
+    return {
+        "synthetic/concatenated": "\n".join(real * scale),
+        "synthetic/long-sections": big,
+        "synthetic/crlf": base.replace("\n", "\r\n"),
+        "synthetic/repeated-headings": base + "\n" + base,
+        "synthetic/empty-template": template,
+        "synthetic/no-sections": "plain text without any headings\n" * scale,
+    }
+
+
+def bench(fn, docs: list[str], iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        for doc in docs:
+            fn(doc)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--synthetic-scale", type=int, default=50)
+    args = parser.parse_args()
+
+    documents = {
+        str(p.relative_to(ROOT)): p.read_text(encoding="utf-8")
+        for p in sorted((ROOT / "evaluations").glob("*.md"))
+    }
+    documents.update(synthetic_documents(args.synthetic_scale))
+
+    mismatches = [name for name, doc in documents.items() if legacy_parse(doc) != single_pass_parse(doc)]
+    for name in mismatches:
+        print(f"MISMATCH: {name}", file=sys.stderr)
+
+    print(f"{'corpus':<16}{'parser':<14}{'docs/s':>12}{'MB/s':>10}")
+    corpora = {
+        "evaluations": [d for n, d in documents.items() if not n.startswith("synthetic/")],
+        "synthetic": [d for n, d in documents.items() if n.startswith("synthetic/")],
+    }
+    for corpus, docs in corpora.items():
+        if not docs:
+            continue
+        iterations = args.iterations if corpus == "evaluations" else max(1, args.iterations // 20)
+        megabytes = sum(len(d.encode("utf-8")) for d in docs) * iterations / 1e6
+        for label, fn in (("legacy", legacy_parse), ("single-pass", single_pass_parse)):
+            elapsed = bench(fn, docs, iterations)
+            print(f"{corpus:<16}{label:<14}{len(docs) * iterations / elapsed:>12.1f}{megabytes / elapsed:>10.2f}")
+
+    if mismatches:
+        sys.exit(1)
+    print(f"All {len(documents)} documents parse identically.")
+
+
+if __name__ == "__main__":
+    main()
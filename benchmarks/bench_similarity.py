@@ -0,0 +1,112 @@
+"""
+Benchmark near-duplicate lookups in the card similarity index.
+
+Fills a throwaway SimilarityIndex with synthetic signatures, in families of
+near-duplicates (a base card plus variants sharing most MinHash values, as a
+fine-tune or quantization copying its base card would), and times lookups of
+fresh variants at each index size. Also times signing the fixture cards.
+
+Usage:
+  python benchmarks/bench_similarity.py [--sizes 1000,10000,50000] [--lookups 500]
+
+Exits non-zero if the p95 lookup time at any size exceeds --max-ms or a
+variant isn't matched to its family.
+"""
+
+import argparse
+import os
+import pathlib
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = pathlib.Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "benchmarks"))
+
+import stub_hf_server  # noqa: E402
+from src import similarity  # noqa: E402
+
+FINGERPRINT = "bench"
+FAMILY_SIZE = 5
+# Share of MinHash values a variant changes (Jaccard similarity ~0.85)
+VARIANT_CHANGE = 0.15
+
+
+def random_signature(rng: random.Random) -> list:
+    return [rng.getrandbits(64) for _ in range(similarity.NUM_PERM)]
+
+
+def variant(sig: list, rng: random.Random) -> list:
+    return [rng.getrandbits(64) if rng.random() < VARIANT_CHANGE else value for value in sig]
+
+
+def fill(index: similarity.SimilarityIndex, count: int, start: int, bases: list, rng: random.Random) -> None:
+    for i in range(start, start + count):
+        if i % FAMILY_SIZE == 0:
+            bases.append(random_signature(rng))
+            sig = bases[-1]
+        else:
+            sig = variant(bases[-1], rng)
+        index.add(f"https://huggingface.co/bench/card-{i}", FINGERPRINT, sig, evaluation_id=i)
+
+
+def percentile(values: list, q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, round(q / 100.0 * (len(ordered) - 1)))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", default="1000,10000,50000", help="index sizes to measure, ascending")
+    parser.add_argument("--lookups", type=int, default=500)
+    parser.add_argument("--max-ms", type=float, default=1.0, help="p95 lookup budget")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    path = os.path.join(tempfile.mkdtemp(prefix="similarity-bench-"), "index.sqlite3")
+    index = similarity.SimilarityIndex(path)
+
+    cards = [text for text, _ in stub_hf_server.load_cards(stub_hf_server.FIXTURES_DIR).values()]
+    started = time.perf_counter()
+    for text in cards:
+        similarity.signature(text)
+    print(f"signature of a fixture card: {(time.perf_counter() - started) * 1000 / len(cards):.2f} ms")
+
+    failures = []
+    bases: list = []
+    size = 0
+    print(f"{'cards':>8}{'fill s':>8}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'matched':>9}")
+    for target in (int(s) for s in args.sizes.split(",")):
+        fill_started = time.perf_counter()
+        fill(index, target - size, size, bases, rng)
+        fill_s = time.perf_counter() - fill_started
+        size = target
+
+        times, matched = [], 0
+        for _ in range(args.lookups):
+            family = rng.randrange(len(bases))
+            query = variant(bases[family], rng)
+            started = time.perf_counter()
+            match = index.lookup(query, FINGERPRINT, threshold=0.6)
+            times.append((time.perf_counter() - started) * 1000)
+            family_of = int(match.url.rsplit("-", 1)[1]) // FAMILY_SIZE if match else None
+            matched += family_of == family
+        p95 = percentile(times, 95)
+        print(f"{size:>8}{fill_s:>8.1f}{statistics.median(times):>9.3f}{p95:>9.3f}"
+              f"{percentile(times, 99):>9.3f}{matched / args.lookups:>9.1%}")
+        if p95 > args.max_ms:
+            failures.append(f"{size} cards: p95 lookup {p95:.3f} ms > {args.max_ms} ms")
+        if matched < args.lookups:
+            failures.append(f"{size} cards: {args.lookups - matched} variants not matched to their family")
+
+    for failure in failures:
+        print(f"FAIL: {failure}", file=sys.stderr)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Import-time budget check for cold starts (CLI runs, short-lived containers).
+
+Each entry point is timed in a fresh interpreter, best of --runs, and checked
+against its budget. It also fails if importing it loads a dependency that
+should only be imported on first use (the OpenAI SDK, requests, bs4,
+python-dotenv, and httpx outside the server).
+
+  import src.generate_eval   the CLI / helper module
+  generate_eval.py --help    argument parsing only (wall time above a bare interpreter)
+  import server              the API app (FastAPI itself is needed to define it)
+
+Usage:
+  python benchmarks/check_import_time.py [--runs 5] [--scale 1.0]
+
+`--scale` multiplies every budget, for slow machines. Exits non-zero on any
+regression.
+"""
+
+import argparse
+import json
+import os
+import pathlib
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = pathlib.Path(__file__).resolve().parent.parent
+
+LAZY = ("openai", "requests", "bs4", "dotenv", "httpx")
+
+# (name, statement to time, budget in ms, modules it must not load)
+IMPORT_CHECKS = [
+    ("import src.generate_eval", "import src.generate_eval", 200, LAZY),
+    ("import server", "import server", 1000, LAZY),
+]
+CLI_CHECKS = [
+    ("generate_eval.py --help", ["src/generate_eval.py", "--help"], 250),
+]
+
+PROBE = """
+import json, sys, time
+started = time.perf_counter()
+{statement}
+elapsed = time.perf_counter() - started
+print(json.dumps({{"ms": elapsed * 1000, "loaded": [m for m in {lazy!r} if m in sys.modules]}}))
+"""
+
+
+def run_python(args: list, env: dict) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, *args], cwd=ROOT, env=env, capture_output=True, text=True, check=True
+    )
+
+
+def time_import(statement: str, lazy: tuple, runs: int, env: dict) -> tuple:
+    best, loaded = float("inf"), []
+    for _ in range(runs):
+        out = json.loads(run_python(["-c", PROBE.format(statement=statement, lazy=lazy)], env).stdout)
+        best, loaded = min(best, out["ms"]), out["loaded"]
+    return best, loaded
+
+
+def time_process(args: list, runs: int, env: dict) -> float:
+    best = float("inf")
+    for _ in range(runs):
+        started = time.perf_counter()
+        run_python(args, env)
+        best = min(best, (time.perf_counter() - started) * 1000)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--scale", type=float, default=1.0, help="multiply every budget")
+    args = parser.parse_args()
+
+    # Keep the server's SQLite files out of the working tree
+    state_dir = tempfile.mkdtemp(prefix="import-check-")
+    env = dict(os.environ, PYTHONPATH=str(ROOT), PYTHONDONTWRITEBYTECODE="1")
+    for name in ("CACHE_PATH", "STORE_PATH", "STATE_PATH", "FETCH_CACHE_PATH"):
+        env[f"CARD_GRADER_{name}"] = os.path.join(state_dir, f"{name.lower()}.sqlite3")
+    # Warm the bytecode cache so the first run isn't an outlier
+    run_python(["-c", "import server"], dict(env, PYTHONDONTWRITEBYTECODE=""))
+
+    failures = []
+    print(f"{'entry point':<28}{'ms':>8}{'budget':>8}")
+    for name, statement, budget, lazy in IMPORT_CHECKS:
+        ms, loaded = time_import(statement, lazy, args.runs, env)
+        budget *= args.scale
+        print(f"{name:<28}{ms:>8.0f}{budget:>8.0f}" + (f"  loaded: {', '.join(loaded)}" if loaded else ""))
+        if ms > budget:
+            failures.append(f"{name}: {ms:.0f} ms > {budget:.0f} ms")
+        if loaded:
+            failures.append(f"{name}: imported {', '.join(loaded)} eagerly")
+
+    baseline = time_process(["-c", "pass"], args.runs, env)
+    for name, cli_args, budget in CLI_CHECKS:
+        ms = time_process(cli_args, args.runs, env) - baseline
+        budget *= args.scale
+        print(f"{name:<28}{ms:>8.0f}{budget:>8.0f}")
+        if ms > budget:
+            failures.append(f"{name}: {ms:.0f} ms > {budget:.0f} ms")
+
+    for failure in failures:
+        print(f"FAIL: {failure}", file=sys.stderr)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+"""
+Cross-worker job test: jobs created on one worker, followed from another.
+
+Starts the stand-in Hugging Face and OpenAI servers and two single-worker
+server processes sharing one state directory (as the workers of
+`python server.py --workers N` do). Every job is created with POST /jobs on
+the first worker, and its server-sent events are read from the second, which
+only knows the job through the shared snapshot. Checks that each stream
+delivers stage events and ends with `done`, and reports time to done.
+
+Usage:
+  python benchmarks/cross_worker_test.py [--jobs 20] [--concurrency 4] [--llm-latency-ms 200]
+
+Exits non-zero if any stream fails, ends in an error or carries no stages.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import pathlib
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = pathlib.Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "benchmarks"))
+
+import stub_hf_server  # noqa: E402
+import stub_openai_server  # noqa: E402
+from load_test import card_urls, summarize  # noqa: E402
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_worker(port: int, env: dict, log_path: str) -> subprocess.Popen:
+    return subprocess.Popen(
+        [sys.executable, "server.py", "--workers", "1", "--host", "127.0.0.1", "--port", str(port)],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=open(log_path, "w"),
+    )
+
+
+async def wait_ready(client, base: str, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            await client.get(f"{base}/metrics")
+            return
+        except Exception:
+            if time.monotonic() > deadline:
+                raise
+            await asyncio.sleep(0.2)
+
+
+async def follow(client, creator: str, follower: str, url: str) -> dict:
+    """Create a job on `creator` and read its event stream from `follower`."""
+    started = time.perf_counter()
+    resp = await client.post(f"{creator}/jobs", json={"url": url})
+    resp.raise_for_status()
+    job_id = resp.json()["id"]
+    stages, final = [], None
+    async with client.stream("GET", f"{follower}/jobs/{job_id}/events", params={"fields": "summary"}) as resp:
+        resp.raise_for_status()
+        event = None
+        async for line in resp.aiter_lines():
+            if line.startswith("event: "):
+                event = line[len("event: "):]
+            elif line.startswith("data: ") and event:
+                data = json.loads(line[len("data: "):])
+                if event == "stage":
+                    stages.append(data["stage"])
+                else:
+                    final = (event, data)
+                    break
+    return {"seconds": time.perf_counter() - started, "stages": stages, "final": final}
+
+
+async def run(args, bases: list) -> dict:
+    import httpx
+
+    latencies, errors = [], []
+    queue: asyncio.Queue = asyncio.Queue()
+    for url in card_urls(args.jobs, unique=True):
+        queue.put_nowait(url)
+
+    async with httpx.AsyncClient(timeout=120) as client:
+        for base in bases:
+            await wait_ready(client, base)
+
+        async def worker():
+            while True:
+                try:
+                    url = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                try:
+                    out = await follow(client, bases[0], bases[1], url)
+                except Exception as e:
+                    errors.append(f"{url}: {e!r}")
+                    continue
+                if out["final"] is None or out["final"][0] != "done":
+                    errors.append(f"{url}: stream ended with {out['final']}")
+                elif not out["stages"]:
+                    errors.append(f"{url}: no stage events before done")
+                else:
+                    latencies.append(out["seconds"])
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+        elapsed = time.perf_counter() - started
+
+    return {
+        "elapsed_s": round(elapsed, 3),
+        "completed": len(latencies),
+        "errors": len(errors),
+        "error_samples": errors[:5],
+        "latency_ms": summarize(latencies),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--jobs", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--llm-latency-ms", type=float, default=200.0)
+    args = parser.parse_args()
+
+    hf_server, hf_base, _ = stub_hf_server.start_in_thread()
+    llm_server, llm_base, _, _ = stub_openai_server.start_in_thread(
+        faults=stub_openai_server.Faults(latency_ms=args.llm_latency_ms)
+    )
+
+    # Both workers share the state directory, as one multi-worker server does
+    state_dir = tempfile.mkdtemp(prefix="card-grader-workers-")
+    env = dict(
+        os.environ,
+        HF_ENDPOINT=hf_base,
+        OPENAI_BASE_URL=llm_base,
+        OPENAI_API_KEY="cross-worker-test",
+        CARD_GRADER_CACHE_PATH=os.path.join(state_dir, "evaluations.sqlite3"),
+        CARD_GRADER_FETCH_CACHE_PATH=os.path.join(state_dir, "fetch.sqlite3"),
+        CARD_GRADER_STORE_PATH=os.path.join(state_dir, "grades.sqlite3"),
+        CARD_GRADER_STATE_PATH=os.path.join(state_dir, "state.sqlite3"),
+        CARD_GRADER_CACHE_TTL="0",
+        CARD_GRADER_PREGRADE_RATE="0",
+        CARD_GRADER_SIMILARITY_THRESHOLD="0",
+    )
+    env.pop("HF_TOKEN", None)
+    ports = [free_port(), free_port()]
+    workers = [start_worker(port, env, os.path.join(state_dir, f"worker-{i}.log")) for i, port in enumerate(ports)]
+    try:
+        result = asyncio.run(run(args, [f"http://127.0.0.1:{port}" for port in ports]))
+    finally:
+        for worker in workers:
+            worker.terminate()
+            worker.wait()
+        hf_server.shutdown()
+        llm_server.shutdown()
+
+    lat = result["latency_ms"]
+    print(f"{result['completed']} jobs followed from the other worker, {result['errors']} failed "
+          f"in {result['elapsed_s']}s")
+    print(f"time to done ms  p50 {lat['p50']}  p95 {lat['p95']}  max {lat['max']}")
+    for sample in result["error_samples"]:
+        print(f"ERROR: {sample}", file=sys.stderr)
+    print(f"Worker logs in {state_dir}")
+    sys.exit(1 if result["errors"] else 0)
+
+
+if __name__ == "__main__":
+    main()
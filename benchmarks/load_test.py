@@ -0,0 +1,297 @@
+"""
+Offline load test of the grading backend.
+
+Starts the stand-in Hugging Face server (benchmarks/stub_hf_server.py) and the
+fake OpenAI API (benchmarks/stub_openai_server.py), then drives server.app
+in-process over ASGI at a fixed concurrency. It reports requests/sec, latency
+percentiles, time spent per evaluation stage (fetching, prompting, generating,
+parsing) and memory, and saves everything as JSON.
+
+Every request uses a distinct card revision URL and the evaluation cache is
+disabled (unless --cache), so each one does a full fetch + LLM call.
+
+Usage:
+  python benchmarks/load_test.py --requests 200 --concurrency 16 \
+      --llm-latency-ms 300 --hf-latency-ms 20 [--endpoint grade|stream] \
+      [--baseline benchmarks/results/previous.json --max-regression 0.2]
+
+Exits non-zero if any request failed or, with --baseline, if requests/sec
+dropped or p95 latency grew by more than --max-regression.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import pathlib
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import Counter, defaultdict
+
+ROOT = pathlib.Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "benchmarks"))
+
+import stub_hf_server  # noqa: E402
+import stub_openai_server  # noqa: E402
+
+STAGES = ("fetching", "prompting", "generating", "parsing")
+
+
+def percentile(values: list, q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    idx = min(len(ordered) - 1, max(0, round(q / 100.0 * (len(ordered) - 1))))
+    return ordered[idx]
+
+
+def summarize(values_s: list) -> dict:
+    ms = [v * 1000.0 for v in values_s]
+    return {
+        "count": len(ms),
+        "mean": round(statistics.fmean(ms), 2) if ms else 0.0,
+        "p50": round(percentile(ms, 50), 2),
+        "p95": round(percentile(ms, 95), 2),
+        "p99": round(percentile(ms, 99), 2),
+        "max": round(max(ms), 2) if ms else 0.0,
+    }
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def max_rss_mb() -> float:
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return round(rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024, 1)
+
+
+class StageRecorder:
+    """Timestamps of each evaluation's stage transitions, keyed by single-flight key."""
+
+    def __init__(self, publish_stage):
+        self._publish_stage = publish_stage
+        self.transitions = defaultdict(list)
+
+    def __call__(self, key: str, stage: str) -> None:
+        self.transitions[key].append((stage, time.perf_counter()))
+        self._publish_stage(key, stage)
+
+    def durations(self, key: str, finished_at: float) -> dict:
+        marks = self.transitions.pop(key, [])
+        out = {}
+        for (stage, start), (_, end) in zip(marks, marks[1:] + [(None, finished_at)]):
+            out[stage] = out.get(stage, 0.0) + (end - start)
+        return out
+
+
+def card_urls(n: int, unique: bool) -> list:
+    repos = list(stub_hf_server.load_cards(stub_hf_server.FIXTURES_DIR))
+    urls = []
+    for i in range(n):
+        repo = repos[i % len(repos)]
+        urls.append(f"https://huggingface.co/{repo}/tree/load-{i}" if unique else f"https://huggingface.co/{repo}")
+    return urls
+
+
+async def drive(server, args) -> dict:
+    import httpx
+
+    recorder = StageRecorder(server.jobs.publish_stage)
+    server.jobs.publish_stage = recorder
+    template_md = server.load_template(server.TEMPLATE_PATH)
+    path = "/grade/stream" if args.endpoint == "stream" else "/grade"
+
+    latencies, errors, body_bytes = [], [], []
+    tiers = Counter()
+    stage_times = defaultdict(list)
+    urls = card_urls(args.warmup + args.requests, unique=not args.same_url)
+    queue: asyncio.Queue = asyncio.Queue()
+    for url in urls[args.warmup:]:
+        queue.put_nowait(url)
+
+    async with server.app.router.lifespan_context(server.app):
+        transport = httpx.ASGITransport(app=server.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://loadtest", timeout=None) as client:
+
+            async def one(url: str, record: bool) -> None:
+                start = time.perf_counter()
+                try:
+                    resp = await client.post(
+                        path, params={"fields": args.fields}, json={"url": url}, headers={"Accept-Encoding": args.encoding}
+                    )
+                    ok = resp.status_code == 200 and (
+                        args.endpoint != "stream" or '"type": "result"' in resp.text.splitlines()[-1]
+                    )
+                    detail = None if ok else f"HTTP {resp.status_code}: {resp.text[-200:]}"
+                except Exception as e:  # transport-level failure inside the app
+                    ok, detail = False, repr(e)
+                finished = time.perf_counter()
+                stages = recorder.durations(server.flight_key(url, template_md), finished)
+                if not record:
+                    return
+                if ok:
+                    latencies.append(finished - start)
+                    body_bytes.append(resp.num_bytes_downloaded)
+                    if args.endpoint == "grade":
+                        tiers[resp.json().get("model_tier")] += 1
+                    for stage, seconds in stages.items():
+                        stage_times[stage].append(seconds)
+                else:
+                    errors.append(detail)
+
+            for url in urls[: args.warmup]:
+                await one(url, record=False)
+
+            async def worker():
+                while True:
+                    try:
+                        url = queue.get_nowait()
+                    except asyncio.QueueEmpty:
+                        return
+                    await one(url, record=True)
+
+            started = time.perf_counter()
+            await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+            elapsed = time.perf_counter() - started
+
+    return {
+        "elapsed_s": round(elapsed, 3),
+        "completed": len(latencies),
+        "errors": len(errors),
+        "error_samples": errors[:5],
+        "rps": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        "latency_ms": summarize(latencies),
+        "stages_ms": {stage: summarize(stage_times[stage]) for stage in STAGES if stage_times[stage]},
+        "response_bytes_mean": round(statistics.mean(body_bytes)) if body_bytes else 0,
+        "model_tiers": {str(tier): n for tier, n in tiers.items()},
+    }
+
+
+def compare(result: dict, baseline: dict, max_regression: float) -> list:
+    problems = []
+    base_rps, rps = baseline.get("rps") or 0, result["rps"]
+    if base_rps and rps < base_rps * (1 - max_regression):
+        problems.append(f"requests/sec dropped from {base_rps} to {rps}")
+    base_p95, p95 = baseline.get("latency_ms", {}).get("p95") or 0, result["latency_ms"]["p95"]
+    if base_p95 and p95 > base_p95 * (1 + max_regression):
+        problems.append(f"p95 latency grew from {base_p95} ms to {p95} ms")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--warmup", type=int, default=3)
+    parser.add_argument("--endpoint", choices=["grade", "stream"], default="grade")
+    parser.add_argument("--llm-latency-ms", type=float, default=200.0)
+    parser.add_argument("--llm-chunk-ms", type=float, default=0.0, help="delay between streamed chunks")
+    parser.add_argument("--llm-rate-429", type=float, default=0.0)
+    parser.add_argument("--llm-rate-5xx", type=float, default=0.0)
+    parser.add_argument("--hf-latency-ms", type=float, default=20.0)
+    parser.add_argument("--same-url", action="store_true", help="grade the fixture URLs repeatedly (exercises coalescing)")
+    parser.add_argument("--cache", action="store_true", help="leave the evaluation cache enabled")
+    parser.add_argument("--eval-mode", choices=["single", "fanout", "structured"], default="single")
+    parser.add_argument("--fields", default="full", help="fields= of each request (full, summary, or a list)")
+    parser.add_argument("--encoding", default="identity", help="Accept-Encoding of each request, e.g. gzip or br")
+    parser.add_argument("--fast-model", default="", help="enable the model cascade with this fast tier")
+    parser.add_argument("--fast-latency-ms", type=float, default=50.0)
+    parser.add_argument("--fast-bad-rate", type=float, default=0.0, help="share of fast answers failing the checks")
+    parser.add_argument("--tracemalloc", action="store_true", help="also report peak Python heap (slower)")
+    parser.add_argument("--out", default=None, help="result JSON (default benchmarks/results/load_<time>.json)")
+    parser.add_argument("--baseline", default=None, help="earlier result JSON to compare against")
+    parser.add_argument("--max-regression", type=float, default=0.2)
+    args = parser.parse_args()
+
+    hf_server, hf_base, hf_stats = stub_hf_server.start_in_thread(latency_ms=args.hf_latency_ms)
+    faults = stub_openai_server.Faults(
+        latency_ms=args.llm_latency_ms, chunk_ms=args.llm_chunk_ms,
+        rate_429=args.llm_rate_429, rate_5xx=args.llm_rate_5xx, retry_after=0.1,
+        fast_model=args.fast_model, fast_latency_ms=args.fast_latency_ms, fast_bad_rate=args.fast_bad_rate,
+    )
+    llm_server, llm_base, llm_stats, _ = stub_openai_server.start_in_thread(faults=faults)
+
+    # Configure the backend before importing it: stubs, throwaway stores, no cache
+    state_dir = tempfile.mkdtemp(prefix="card-grader-load-")
+    os.environ.update({
+        "HF_ENDPOINT": hf_base,
+        "OPENAI_BASE_URL": llm_base,
+        "OPENAI_API_KEY": "load-test",
+        "CARD_GRADER_CACHE_PATH": os.path.join(state_dir, "evaluations.sqlite3"),
+        "CARD_GRADER_FETCH_CACHE_PATH": os.path.join(state_dir, "fetch.sqlite3"),
+        "CARD_GRADER_STORE_PATH": os.path.join(state_dir, "grades.sqlite3"),
+        # LLM slots and leases too, so a dev server's calls don't compete with the run
+        "CARD_GRADER_STATE_PATH": os.path.join(state_dir, "state.sqlite3"),
+        "CARD_GRADER_EVAL_MODE": args.eval_mode,
+        "CARD_GRADER_FAST_MODEL": args.fast_model,
+        "CARD_GRADER_LLM_BASE_DELAY": "0.05",
+        # Background pre-grading would add LLM calls the driver didn't make
+        "CARD_GRADER_PREGRADE_RATE": "0",
+        # Revision URLs of one card would be served as near-duplicates of each other
+        "CARD_GRADER_SIMILARITY_THRESHOLD": "0",
+    })
+    os.environ.pop("HF_TOKEN", None)
+    if not args.cache:
+        os.environ["CARD_GRADER_CACHE_TTL"] = "0"
+
+    if args.tracemalloc:
+        tracemalloc.start()
+    import server  # noqa: E402
+
+    result = asyncio.run(drive(server, args))
+
+    result["memory"] = {"max_rss_mb": max_rss_mb()}
+    if args.tracemalloc:
+        result["memory"]["tracemalloc_peak_mb"] = round(tracemalloc.get_traced_memory()[1] / 1e6, 1)
+        tracemalloc.stop()
+    result["stub_stats"] = {"llm": dict(llm_stats), "hf": dict(hf_stats)}
+    result["config"] = {k: v for k, v in vars(args).items() if k not in ("out", "baseline")}
+    result["environment"] = {"git_rev": git_revision(), "python": platform.python_version(), "at": time.time()}
+    hf_server.shutdown()
+    llm_server.shutdown()
+
+    out = pathlib.Path(args.out) if args.out else ROOT / "benchmarks" / "results" / f"load_{time.strftime('%Y%m%d-%H%M%S')}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(result, indent=2) + "\n", encoding="utf-8")
+
+    lat = result["latency_ms"]
+    print(f"{result['completed']} ok, {result['errors']} failed in {result['elapsed_s']}s "
+          f"-> {result['rps']} req/s at concurrency {args.concurrency}")
+    print(f"latency ms  p50 {lat['p50']}  p95 {lat['p95']}  p99 {lat['p99']}  max {lat['max']}")
+    print(f"response body {result['response_bytes_mean']} bytes (mean, as sent)")
+    if args.fast_model:
+        print("model tiers " + "  ".join(f"{tier} {n}" for tier, n in sorted(result["model_tiers"].items())))
+    for stage, s in result["stages_ms"].items():
+        print(f"  {stage:<11} mean {s['mean']:>9} ms  p95 {s['p95']:>9} ms")
+    print(f"max RSS {result['memory']['max_rss_mb']} MB" + (
+        f", peak Python heap {result['memory']['tracemalloc_peak_mb']} MB" if args.tracemalloc else ""))
+    for sample in result["error_samples"]:
+        print(f"ERROR: {sample}", file=sys.stderr)
+    print(f"Saved {out}")
+
+    problems = []
+    if args.baseline:
+        problems = compare(result, json.loads(pathlib.Path(args.baseline).read_text(encoding="utf-8")),
+                           args.max_regression)
+        for problem in problems:
+            print(f"REGRESSION: {problem}", file=sys.stderr)
+    if result["errors"] or problems:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
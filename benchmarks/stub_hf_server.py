@@ -0,0 +1,184 @@
+"""
+Local stand-in for huggingface.co card pages.
+
+Serves every fixture in benchmarks/fixtures/cards/ (named `<org>--<name>.md`)
+two ways, like the Hub does:
+
+  /<org>/<name>                        rendered HTML page with navigation chrome
+  /<org>/<name>/raw/<rev>/README.md    raw README with ETag / Last-Modified,
+                                       answering conditional GETs with 304
+  /api/models?author=<org>             the fixture repos of an organization
+
+GET /__stats returns request counters. Point the grader at it with
+HF_ENDPOINT=http://127.0.0.1:<port>.
+
+Usage:
+  python benchmarks/stub_hf_server.py --port 8001 [--latency-ms 50]
+"""
+
+import argparse
+import hashlib
+import html
+import json
+import pathlib
+import threading
+import time
+from collections import Counter
+from email.utils import formatdate, parsedate_to_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+FIXTURES_DIR = pathlib.Path(__file__).resolve().parent / "fixtures" / "cards"
+
+NAV_LINKS = ["Models", "Datasets", "Spaces", "Posts", "Docs", "Enterprise", "Pricing", "Log In", "Sign Up"]
+
+
+def load_cards(fixtures_dir: pathlib.Path) -> dict:
+    """Map '<org>/<name>' to (markdown, mtime) for every fixture."""
+    cards = {}
+    for p in sorted(fixtures_dir.glob("*.md")):
+        org, _, name = p.stem.partition("--")
+        cards[f"{org}/{name}"] = (p.read_text(encoding="utf-8"), p.stat().st_mtime)
+    return cards
+
+
+def render_page(repo: str, markdown: str) -> str:
+    """Wrap a card in HF-like chrome: nav, file listing, hydration scripts."""
+    nav = "".join(f'<li><a href="/{link.lower()}">{link}</a></li>' for link in NAV_LINKS)
+    files = "".join(
+        f"<tr><td><a href='/{repo}/blob/main/{f}'>{f}</a></td><td>{i * 7 + 1} kB</td>"
+        f"<td>Upload {f}</td></tr>"
+        for i, f in enumerate(["config.json", "generation_config.json", "model.safetensors",
+                               "tokenizer.json", "tokenizer_config.json", "README.md"])
+    )
+    body = "".join(f"<p>{html.escape(line)}</p>\n" for line in markdown.splitlines() if line.strip())
+    props = json.dumps({"repo": repo, "widgets": ["text-generation"] * 50, "downloads": list(range(200))})
+    return f"""<!doctype html>
+<html><head><title>{repo} · Hugging Face</title>
+<style>.nav {{ display: flex; }} .model-card-content p {{ margin: 0; }}</style>
+<script>window.__HF_PROPS__ = {props};</script>
+</head><body>
+<header><nav class="nav"><ul>{nav}</ul></nav></header>
+<main>
+<div class="repo-header"><h1>{repo}</h1>
+<a class="tab-alternate active" href="/{repo}">Model card</a>
+<a class="tab-alternate" href="/{repo}/tree/main">Files and versions</a>
+<a class="tab-alternate" href="/{repo}/discussions">Community</a></div>
+<div class="model-card-content prose">
+{body}</div>
+<aside><table class="files">{files}</table>
+<noscript>Enable JavaScript to see the inference widget.</noscript></aside>
+</main>
+<footer>© Hugging Face · TOS · Privacy · About · Jobs</footer>
+<script>console.log("hydrate");</script>
+</body></html>
+"""
+
+
+def make_handler(cards: dict, latency_s: float, stats: Counter):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, fmt, *args):
+            pass
+
+        def _send(self, status: int, body: bytes = b"", headers: dict = None):
+            self.send_response(status)
+            for k, v in (headers or {}).items():
+                self.send_header(k, v)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            if body:
+                self.wfile.write(body)
+
+        def do_GET(self):
+            if latency_s:
+                time.sleep(latency_s)
+            path, _, query = self.path.partition("?")
+            path = path.strip("/")
+
+            if path == "__stats":
+                stats["stats"] += 1
+                return self._send(200, json.dumps(stats).encode(), {"Content-Type": "application/json"})
+
+            if path == "api/models":
+                stats["api_models"] += 1
+                params = parse_qs(query)
+                author = params.get("author", [""])[0]
+                limit = int(params.get("limit", ["1000"])[0])
+                models = [{"id": repo} for repo in sorted(cards) if repo.split("/")[0] == author][:limit]
+                return self._send(200, json.dumps(models).encode(), {"Content-Type": "application/json"})
+
+            segments = path.split("/")
+            repo = "/".join(segments[:2])
+            if repo not in cards:
+                stats["404"] += 1
+                return self._send(404, b"Not found", {"Content-Type": "text/plain"})
+            markdown, mtime = cards[repo]
+
+            if len(segments) == 5 and segments[2] == "raw" and segments[4] == "README.md":
+                etag = '"' + hashlib.sha1(markdown.encode("utf-8")).hexdigest() + '"'
+                last_modified = formatdate(mtime, usegmt=True)
+                if self.headers.get("If-None-Match") == etag or self._not_modified_since(mtime):
+                    stats["readme_304"] += 1
+                    return self._send(304, headers={"ETag": etag, "Last-Modified": last_modified})
+                stats["readme_200"] += 1
+                return self._send(
+                    200,
+                    markdown.encode("utf-8"),
+                    {"Content-Type": "text/plain; charset=utf-8", "ETag": etag, "Last-Modified": last_modified},
+                )
+
+            if len(segments) == 2:
+                stats["page_200"] += 1
+                return self._send(
+                    200, render_page(repo, markdown).encode("utf-8"), {"Content-Type": "text/html; charset=utf-8"}
+                )
+
+            stats["404"] += 1
+            return self._send(404, b"Not found", {"Content-Type": "text/plain"})
+
+        def _not_modified_since(self, mtime: float) -> bool:
+            if self.headers.get("If-None-Match"):
+                # ETag takes precedence over dates (RFC 9110)
+                return False
+            since = self.headers.get("If-Modified-Since")
+            if not since:
+                return False
+            try:
+                return int(mtime) <= parsedate_to_datetime(since).timestamp()
+            except (TypeError, ValueError):
+                return False
+
+    return Handler
+
+
+def start_in_thread(port: int = 0, fixtures_dir: pathlib.Path = FIXTURES_DIR, latency_ms: float = 0):
+    """Start the server on a background thread; returns (server, base_url, stats)."""
+    stats: Counter = Counter()
+    server = ThreadingHTTPServer(
+        ("127.0.0.1", port), make_handler(load_cards(fixtures_dir), latency_ms / 1000.0, stats)
+    )
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}", stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stand-in Hugging Face card server")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--fixtures", default=str(FIXTURES_DIR))
+    parser.add_argument("--latency-ms", type=float, default=0)
+    args = parser.parse_args()
+
+    cards = load_cards(pathlib.Path(args.fixtures))
+    stats: Counter = Counter()
+    server = ThreadingHTTPServer(("127.0.0.1", args.port), make_handler(cards, args.latency_ms / 1000.0, stats))
+    print(f"Serving {len(cards)} cards on http://127.0.0.1:{args.port}")
+    for repo in cards:
+        print(f"  http://127.0.0.1:{args.port}/{repo}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
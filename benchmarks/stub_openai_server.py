@@ -0,0 +1,305 @@
+"""
+Local OpenAI-compatible server with fault injection.
+
+Answers POST /v1/responses and POST /v1/chat/completions (including
+`stream: true` with a final usage chunk) by replaying the filled evaluations in
+evaluations/ round-robin (or a single --completion file). Requests asking for a
+JSON schema (structured outputs) get the JSON answers in
+benchmarks/fixtures/structured/ instead. Failures are injected at configurable
+rates:
+
+  --rate-429 0.2 --retry-after 0.5   429 with Retry-After / retry-after-ms headers
+  --rate-5xx 0.1                      500 / 502 / 503 responses
+  --latency-ms 200                    base latency of every answer
+  --slow-rate 0.05 --slow-ms 5000     occasional very slow answers (tail latency)
+  --chunk-ms 5                        delay between streamed chunks
+  --no-responses                      404 on /v1/responses, like many compatible servers
+  --fast-model M --fast-latency-ms 50 --fast-bad-rate 0.3
+                                      answers for model M (a cascade's fast tier) come
+                                      faster, and some lose their Total row
+
+GET /__stats returns request counters; POST /__faults with a JSON object
+changes fault settings at runtime. Point the grader at it with
+OPENAI_BASE_URL=http://127.0.0.1:<port>/v1 OPENAI_API_KEY=test.
+
+Usage:
+  python benchmarks/stub_openai_server.py --port 8002 --rate-429 0.2 --latency-ms 200
+"""
+
+import argparse
+import json
+import pathlib
+import random
+import re
+import threading
+import time
+from collections import Counter
+from dataclasses import asdict, dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ROOT = pathlib.Path(__file__).resolve().parent.parent
+DEFAULT_COMPLETIONS = ROOT / "evaluations"
+DEFAULT_STRUCTURED = ROOT / "benchmarks" / "fixtures" / "structured"
+
+
+@dataclass
+class Faults:
+    rate_429: float = 0.0
+    rate_5xx: float = 0.0
+    retry_after: float = 0.5  # seconds, sent with 429s
+    latency_ms: float = 0.0
+    slow_rate: float = 0.0
+    slow_ms: float = 5000.0
+    chunk_ms: float = 0.0
+    no_responses: bool = False
+    fast_model: str = ""
+    fast_latency_ms: float = 0.0
+    fast_bad_rate: float = 0.0
+
+
+def load_completions(path: pathlib.Path, pattern: str = "*.md") -> list:
+    """One file, or every file matching `pattern` in a directory."""
+    paths = sorted(path.glob(pattern)) if path.is_dir() else [path]
+    completions = [p.read_text(encoding="utf-8") for p in paths]
+    if not completions:
+        raise SystemExit(f"No completions found at {path}")
+    return completions
+
+
+TOTAL_ROW_RE = re.compile(r"^\|\s*\**Total.*\n?", re.MULTILINE)
+
+
+def count_input_tokens(body: dict) -> int:
+    """Rough prompt size (~4 chars per token)."""
+    text = body.get("input") or "".join(m.get("content", "") for m in body.get("messages", []))
+    text += body.get("instructions") or ""
+    return max(1, len(text) // 4)
+
+
+def wants_json_schema(body: dict) -> bool:
+    fmt = (body.get("text") or {}).get("format") or body.get("response_format") or {}
+    return fmt.get("type") == "json_schema"
+
+
+def make_handler(completions: list, faults: Faults, stats: Counter, rng: random.Random, structured: list = ()):
+    lock = threading.Lock()
+    served = [0]
+
+    def next_completion(body: dict) -> str:
+        answers = structured if structured and wants_json_schema(body) else completions
+        with lock:
+            served[0] += 1
+            return answers[(served[0] - 1) % len(answers)]
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, fmt, *args):
+            pass
+
+        def _send_json(self, status: int, obj: dict, headers: dict = None):
+            body = json.dumps(obj).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            for k, v in (headers or {}).items():
+                self.send_header(k, v)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            try:
+                self.wfile.write(body)
+            except (BrokenPipeError, ConnectionResetError):
+                # Client gave up (attempt timeout or a cancelled hedge)
+                with lock:
+                    stats["client_disconnected"] += 1
+
+        def _error(self, status: int, message: str, headers: dict = None):
+            self._send_json(status, {"error": {"message": message, "type": "stub_error", "code": status}}, headers)
+
+        def do_GET(self):
+            if self.path.split("?", 1)[0].rstrip("/") == "/__stats":
+                with lock:
+                    return self._send_json(200, dict(stats))
+            self._error(404, "Not found")
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            body = json.loads(self.rfile.read(length) or b"{}")
+            path = self.path.split("?", 1)[0].rstrip("/")
+
+            if path == "/__faults":
+                for key, value in body.items():
+                    if hasattr(faults, key):
+                        setattr(faults, key, type(getattr(faults, key))(value))
+                return self._send_json(200, asdict(faults))
+
+            if path not in ("/v1/responses", "/v1/chat/completions"):
+                return self._error(404, "Not found")
+            api = "responses" if path == "/v1/responses" else "chat"
+            with lock:
+                stats[f"{api}_requests"] += 1
+                roll, slow_roll, bad_roll = rng.random(), rng.random(), rng.random()
+            fast = bool(faults.fast_model) and body.get("model") == faults.fast_model
+
+            if api == "responses" and faults.no_responses:
+                with lock:
+                    stats["responses_404"] += 1
+                return self._error(404, "Responses API is not available")
+
+            delay = (faults.fast_latency_ms if fast else faults.latency_ms) / 1000.0
+            if slow_roll < faults.slow_rate:
+                delay += faults.slow_ms / 1000.0
+                with lock:
+                    stats["slow"] += 1
+            if delay:
+                time.sleep(delay)
+
+            if roll < faults.rate_429:
+                with lock:
+                    stats["injected_429"] += 1
+                return self._error(429, "Rate limit reached", {
+                    "Retry-After": str(max(1, round(faults.retry_after))),
+                    "retry-after-ms": str(int(faults.retry_after * 1000)),
+                })
+            if roll < faults.rate_429 + faults.rate_5xx:
+                status = (500, 502, 503)[int(roll * 1000) % 3]
+                with lock:
+                    stats[f"injected_{status}"] += 1
+                return self._error(status, "Injected upstream failure")
+
+            input_tokens = count_input_tokens(body)
+            completion = next_completion(body)
+            if fast and bad_roll < faults.fast_bad_rate:
+                completion = TOTAL_ROW_RE.sub("", completion)
+                with lock:
+                    stats["fast_bad"] += 1
+            output_tokens = max(1, len(completion) // 4)
+            with lock:
+                stats[f"{api}_200"] += 1
+            if api == "responses":
+                return self._send_json(200, responses_body(body, completion, input_tokens, output_tokens))
+            if body.get("stream"):
+                return self._stream_chat(body, completion, input_tokens, output_tokens)
+            return self._send_json(200, chat_body(body, completion, input_tokens, output_tokens))
+
+        def _stream_chat(self, body: dict, completion: str, input_tokens: int, output_tokens: int):
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Connection", "close")
+            self.end_headers()
+            self.close_connection = True
+            base = {"id": "chatcmpl-stub", "object": "chat.completion.chunk", "created": int(time.time()),
+                    "model": body.get("model", "stub")}
+            for i in range(0, len(completion), 64):
+                chunk = {**base, "choices": [{"index": 0, "delta": {"content": completion[i:i + 64]},
+                                              "finish_reason": None}]}
+                self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+                if faults.chunk_ms:
+                    self.wfile.flush()
+                    time.sleep(faults.chunk_ms / 1000.0)
+            final = {**base, "choices": [], "usage": chat_usage(input_tokens, output_tokens)}
+            self.wfile.write(f"data: {json.dumps(final)}\n\ndata: [DONE]\n\n".encode("utf-8"))
+            self.wfile.flush()
+
+    return Handler
+
+
+def chat_usage(input_tokens: int, output_tokens: int) -> dict:
+    return {
+        "prompt_tokens": input_tokens,
+        "completion_tokens": output_tokens,
+        "total_tokens": input_tokens + output_tokens,
+        "prompt_tokens_details": {"cached_tokens": 0},
+    }
+
+
+def chat_body(body: dict, completion: str, input_tokens: int, output_tokens: int) -> dict:
+    return {
+        "id": "chatcmpl-stub",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": body.get("model", "stub"),
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": completion}, "finish_reason": "stop"}],
+        "usage": chat_usage(input_tokens, output_tokens),
+    }
+
+
+def responses_body(body: dict, completion: str, input_tokens: int, output_tokens: int) -> dict:
+    return {
+        "id": "resp-stub",
+        "object": "response",
+        "created_at": int(time.time()),
+        "model": body.get("model", "stub"),
+        "status": "completed",
+        "output": [{
+            "type": "message",
+            "id": "msg-stub",
+            "status": "completed",
+            "role": "assistant",
+            "content": [{"type": "output_text", "text": completion, "annotations": []}],
+        }],
+        "parallel_tool_calls": False,
+        "tool_choice": "auto",
+        "tools": [],
+        "usage": {
+            "input_tokens": input_tokens,
+            "input_tokens_details": {"cached_tokens": 0},
+            "output_tokens": output_tokens,
+            "output_tokens_details": {"reasoning_tokens": 0},
+            "total_tokens": input_tokens + output_tokens,
+        },
+    }
+
+
+def start_in_thread(port: int = 0, completions_path: pathlib.Path = DEFAULT_COMPLETIONS,
+                    faults: Faults = None, seed: int = 0, structured_path: pathlib.Path = DEFAULT_STRUCTURED):
+    """Start the server on a background thread; returns (server, base_url, stats, faults)."""
+    stats: Counter = Counter()
+    faults = faults or Faults()
+    handler = make_handler(
+        load_completions(completions_path), faults, stats, random.Random(seed),
+        load_completions(structured_path, "*.json"),
+    )
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/v1", stats, faults
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stand-in OpenAI API with fault injection")
+    parser.add_argument("--port", type=int, default=8002)
+    parser.add_argument("--completion", default=str(DEFAULT_COMPLETIONS),
+                        help="Markdown file, or directory of them, replayed as answers")
+    parser.add_argument("--structured", default=str(DEFAULT_STRUCTURED),
+                        help="JSON file, or directory of them, replayed to structured-output requests")
+    parser.add_argument("--rate-429", type=float, default=0.0)
+    parser.add_argument("--rate-5xx", type=float, default=0.0)
+    parser.add_argument("--retry-after", type=float, default=0.5)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--slow-rate", type=float, default=0.0)
+    parser.add_argument("--slow-ms", type=float, default=5000.0)
+    parser.add_argument("--chunk-ms", type=float, default=0.0)
+    parser.add_argument("--no-responses", action="store_true")
+    parser.add_argument("--fast-model", default="")
+    parser.add_argument("--fast-latency-ms", type=float, default=0.0)
+    parser.add_argument("--fast-bad-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    faults = Faults(
+        rate_429=args.rate_429, rate_5xx=args.rate_5xx, retry_after=args.retry_after,
+        latency_ms=args.latency_ms, slow_rate=args.slow_rate, slow_ms=args.slow_ms,
+        chunk_ms=args.chunk_ms, no_responses=args.no_responses,
+        fast_model=args.fast_model, fast_latency_ms=args.fast_latency_ms, fast_bad_rate=args.fast_bad_rate,
+    )
+    completions = load_completions(pathlib.Path(args.completion))
+    structured = load_completions(pathlib.Path(args.structured), "*.json")
+    server = ThreadingHTTPServer(
+        ("127.0.0.1", args.port), make_handler(completions, faults, Counter(), random.Random(args.seed), structured)
+    )
+    print(f"Serving a fake OpenAI API on http://127.0.0.1:{args.port}/v1 ({faults})")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -275,6 +275,7 @@ function renderPanelContent(data) {
     standards_summary,
     gaps,
     filled_markdown,
+    evaluation_id,
   } = data;
 
   /* --- Basic info / header --- */
@@ -537,7 +538,8 @@ function renderPanelContent(data) {
   }
 
   /* --- Full review toggle --- */
-  if (filled_markdown) {
+  // Results are fetched as summaries; the review itself is loaded on first open
+  if (filled_markdown || evaluation_id) {
     const toggleBtn = document.createElement("button");
     toggleBtn.textContent = "View full model card review";
     toggleBtn.style.marginTop = "10px";
@@ -550,7 +552,7 @@ function renderPanelContent(data) {
     toggleBtn.style.color = "#111827";
 
     const pre = document.createElement("pre");
-    pre.textContent = filled_markdown;
+    pre.textContent = filled_markdown || "";
     pre.style.fontSize = "11px";
     pre.style.marginTop = "6px";
     pre.style.padding = "6px";
@@ -560,7 +562,21 @@ function renderPanelContent(data) {
     pre.style.wordBreak = "break-word";
     pre.style.display = "none";
 
-    toggleBtn.addEventListener("click", () => {
+    toggleBtn.addEventListener("click", async () => {
+      if (data.filled_markdown === undefined || data.filled_markdown === null) {
+        toggleBtn.disabled = true;
+        try {
+          const resp = await fetch(`${BACKEND_URL}/evaluations/${evaluation_id}/markdown`);
+          if (!resp.ok) throw new Error(`Review lookup failed: ${resp.status}`);
+          data.filled_markdown = await resp.text();
+          pre.textContent = data.filled_markdown;
+        } catch (err) {
+          console.error(err);
+          pre.textContent = "Could not load the full review.";
+        } finally {
+          toggleBtn.disabled = false;
+        }
+      }
       const isVisible = pre.style.display === "block";
       pre.style.display = isVisible ? "none" : "block";
       toggleBtn.textContent = isVisible ? "View full model card review" : "Hide full model card review";
@@ -591,6 +607,16 @@ async function maybeStartEvaluation() {
   await gradeCurrentPage();
 }
 
+const BACKEND_URL = "http://localhost:8000";
+
+const STAGE_LABELS = {
+  queued: "Queued…",
+  fetching: "Fetching model card…",
+  prompting: "Preparing prompt…",
+  generating: "Grading model card…",
+  parsing: "Parsing results…",
+};
+
 async function gradeCurrentPage() {
   const url = window.location.href;
   isGrading = true;
@@ -598,7 +624,8 @@ async function gradeCurrentPage() {
   updateBadge("Grading model card…", "#fbbf24");
 
   try {
-    const resp = await fetch("http://localhost:8000/grade", {
+    // Start a background job; the server answers immediately with a job id
+    const resp = await fetch(`${BACKEND_URL}/jobs`, {
       method: "POST",
       headers: {
         "Content-Type": "application/json",
@@ -613,31 +640,17 @@ async function gradeCurrentPage() {
       return;
     }
 
-    const data = await resp.json();
-    lastGradeData = data;
-
-    const score = data.score;
-    const label = data.label || "";
-
-    let dotColor = "#6b7280"; // default gray
-    if (typeof score === "number") {
-      if (score >= 85) dotColor = "#16a34a";
-      else if (score >= 70) dotColor = "#f97316";
-      else dotColor = "#dc2626";
-    }
+    const job = await resp.json();
+    const finished = await waitForJob(job.id);
 
-    let summary;
-    if (typeof score === "number") {
-      summary = `Model card score: ${score.toFixed(0)}`;
-      if (label) summary += ` (${label})`;
-      summary += " – click to open audit";
-    } else {
-      summary = "Model card score: N/A – click to open audit";
+    if (finished.status !== "done" || !finished.result) {
+      console.error("Backend error:", finished.error);
+      updateBadge("Model card grade: backend error", "#b91c1c");
+      return;
     }
 
-    updateBadge(summary, dotColor);
-    // After grading finishes, glow until user clicks
-    startAttentionGlow();
+    showGradeResult(finished.result);
+    showTimings(finished.timings);
   } catch (err) {
     console.error("Failed to grade page:", err);
     updateBadge("Model card grade: request failed", "#b91c1c");
@@ -646,3 +659,85 @@ async function gradeCurrentPage() {
     setSpinnerVisible(false);
   }
 }
+
+// Follow job progress over server-sent events; fall back to polling if the stream fails.
+function waitForJob(jobId) {
+  return new Promise((resolve, reject) => {
+    if (typeof EventSource === "undefined") {
+      pollJob(jobId).then(resolve, reject);
+      return;
+    }
+
+    const source = new EventSource(`${BACKEND_URL}/jobs/${jobId}/events?fields=summary`);
+
+    source.addEventListener("stage", (evt) => {
+      const { stage } = JSON.parse(evt.data);
+      if (STAGE_LABELS[stage]) updateBadge(STAGE_LABELS[stage], "#fbbf24");
+    });
+
+    const finish = (evt) => {
+      source.close();
+      resolve(JSON.parse(evt.data));
+    };
+    source.addEventListener("done", finish);
+    source.addEventListener("error", (evt) => {
+      source.close();
+      if (evt.data) {
+        // Job-level error event sent by the server
+        resolve(JSON.parse(evt.data));
+      } else {
+        // Connection-level failure: keep going by polling
+        pollJob(jobId).then(resolve, reject);
+      }
+    });
+  });
+}
+
+async function pollJob(jobId, intervalMs = 2000) {
+  for (;;) {
+    const resp = await fetch(`${BACKEND_URL}/jobs/${jobId}?fields=summary`);
+    if (!resp.ok) throw new Error(`Job lookup failed: ${resp.status}`);
+    const job = await resp.json();
+    if (job.status === "done" || job.status === "error") return job;
+    if (STAGE_LABELS[job.stage]) updateBadge(STAGE_LABELS[job.stage], "#fbbf24");
+    await new Promise((r) => setTimeout(r, intervalMs));
+  }
+}
+
+// Per-stage server timings (ms), shown as the badge tooltip
+function showTimings(timings) {
+  if (!timings || !Object.keys(timings).length) return;
+  const summary = Object.entries(timings)
+    .map(([stage, ms]) => `${stage} ${Math.round(ms)} ms`)
+    .join(" · ");
+  console.info("Model card grade timings:", summary);
+  const badge = document.getElementById("hf-modelcard-grade-badge");
+  if (badge) badge.title = `Server timing: ${summary}`;
+}
+
+function showGradeResult(data) {
+  lastGradeData = data;
+
+  const score = data.score;
+  const label = data.label || "";
+
+  let dotColor = "#6b7280"; // default gray
+  if (typeof score === "number") {
+    if (score >= 85) dotColor = "#16a34a";
+    else if (score >= 70) dotColor = "#f97316";
+    else dotColor = "#dc2626";
+  }
+
+  let summary;
+  if (typeof score === "number") {
+    summary = `Model card score: ${score.toFixed(0)}`;
+    if (label) summary += ` (${label})`;
+    summary += " – click to open audit";
+  } else {
+    summary = "Model card score: N/A – click to open audit";
+  }
+
+  updateBadge(summary, dotColor);
+  // After grading finishes, glow until user clicks
+  startAttentionGlow();
+}
@@ -1,31 +1,219 @@
 # server.py
+import asyncio
+import hashlib
+import hmac
+import ipaddress
+import argparse
+import json
+import logging
+import math
 import os
 import re
-from typing import Optional, List
+import time
+from collections import Counter
+from contextlib import asynccontextmanager
+from typing import TYPE_CHECKING, AsyncIterator, Callable, Dict, Optional, List, Tuple
 
-from fastapi import FastAPI, HTTPException
+from fastapi import Depends, FastAPI, Header, HTTPException, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from pydantic import BaseModel
 
-from dotenv import load_dotenv, find_dotenv
-
-# Load .env so OPENAI_API_KEY and OPENAI_MODEL work like in generate_eval.py
-load_dotenv(find_dotenv(), override=False)
-
-# Import existing helpers
+# Import existing helpers (importing generate_eval loads .env first, so
+# OPENAI_API_KEY, OPENAI_MODEL and the settings below work like in the CLI)
 from src.generate_eval import (
-    fetch_url_text,
+    fetch_card_text_async,
+    prepare_page_text,
     load_template,
-    build_prompt,
-    call_openai_with_fallback,
+    build_prompt_from_prefix,
+    compile_prompt_prefix,
+    normalize_url,
+    call_openai_with_fallback_async,
+    stream_openai_text_async,
     DEFAULT_MODEL,
+    SYSTEM_PROMPT_VERSION,
+)
+from src.eval_cache import EvaluationCache, make_cache_key
+from src.evaluation_store import EvaluationStore, to_store_payload
+from src import cascade, metrics
+from src.http_middleware import CompressionMiddleware, ETagMiddleware
+from src.llm_client import CircuitOpenError, resilient
+from src.shared_state import InflightLeases, LLMSlots, Overloaded, RecentRequests, SharedJobs, WORKER_ID
+from src.similarity import SimilarCard, SimilarityIndex
+from src.singleflight import SingleFlight
+from src.pregrade import PregradeScheduler, file_source, org_source, traffic_source
+from src.jobs import Job, JobStore, JobStoreFull
+from src.section_stream import SectionStreamParser
+from src.fanout import FANOUT_PROMPT_VERSION, run_fanout
+from src.structured_eval import (
+    STRUCTURED_PROMPT_VERSION,
+    StructuredOutputError,
+    build_structured_prompt,
+    parse_structured,
+    render_markdown,
+    response_schema,
+    summarize,
 )
-from openai import OpenAI
+from src.incremental import (
+    UPDATE_PROMPT_VERSION,
+    SectionSnapshotStore,
+    affected_categories,
+    build_update_prompt,
+    card_opening,
+    diff_sections,
+    merge_update,
+    section_snapshot,
+)
+
+# The HTTP and LLM client libraries are imported when the app starts (lifespan)
+if TYPE_CHECKING:
+    import httpx
+    from openai import AsyncOpenAI
+
+logger = logging.getLogger("card_grader")
 
 TEMPLATE_PATH = "templates/card_review_template.md"
 MODEL_NAME = os.getenv("OPENAI_MODEL", DEFAULT_MODEL)
 
-app = FastAPI()
+# "single" fills the template in one generation; "fanout" fills its sections
+# as concurrent sub-tasks, at most CARD_GRADER_FANOUT_PARALLELISM per request;
+# "structured" asks for a JSON object and renders the template locally
+EVAL_MODE = os.getenv("CARD_GRADER_EVAL_MODE", "single")
+FANOUT_PARALLELISM = int(os.getenv("CARD_GRADER_FANOUT_PARALLELISM", "3"))
+# Prompts a grade may come from, part of its cache key and fingerprint: grades
+# made in another mode or with an older prompt are never served, re-graded
+# from or derived from. The system prompt is always included (streaming and
+# the structured fallback use it), as is the incremental update prompt.
+MODE_PROMPT_VERSIONS = {"fanout": FANOUT_PROMPT_VERSION, "structured": STRUCTURED_PROMPT_VERSION}
+PROMPT_VERSION = "+".join((
+    f"system{SYSTEM_PROMPT_VERSION}",
+    f"{EVAL_MODE}{MODE_PROMPT_VERSIONS.get(EVAL_MODE, '')}",
+    f"update{UPDATE_PROMPT_VERSION}",
+))
+
+# Model cascade: with CARD_GRADER_FAST_MODEL set, cards are graded by that
+# model first and its answer is checked locally; failed checks, and cards
+# longer or with more sections than the limits below, go to MODEL_NAME
+FAST_MODEL_NAME = os.getenv("CARD_GRADER_FAST_MODEL", "")
+CASCADE_MAX_TOKENS = int(os.getenv("CARD_GRADER_CASCADE_MAX_TOKENS", "4000"))
+CASCADE_MAX_SECTIONS = int(os.getenv("CARD_GRADER_CASCADE_MAX_SECTIONS", "25"))
+TIER_MODELS = {cascade.FAST: FAST_MODEL_NAME, cascade.FULL: MODEL_NAME}
+# The models a grade may come from, part of its cache key and fingerprint
+GRADER_MODELS = f"{FAST_MODEL_NAME}>{MODEL_NAME}" if FAST_MODEL_NAME else MODEL_NAME
+
+# Persistent evaluation cache (content-addressed, TTL + LRU)
+CACHE_PATH = os.getenv("CARD_GRADER_CACHE_PATH", ".cache/evaluations.sqlite3")
+CACHE_TTL_SECONDS = float(os.getenv("CARD_GRADER_CACHE_TTL", str(7 * 24 * 3600)))
+CACHE_MAX_ENTRIES = int(os.getenv("CARD_GRADER_CACHE_MAX_ENTRIES", "5000"))
+# Required as X-Admin-Token on /admin endpoints; without it they only answer loopback clients
+ADMIN_TOKEN = os.getenv("CARD_GRADER_ADMIN_TOKEN")
+
+cache = EvaluationCache(CACHE_PATH, ttl_seconds=CACHE_TTL_SECONDS, max_entries=CACHE_MAX_ENTRIES)
+
+# Stale-while-revalidate: a card whose content was checked against the cache
+# less than the soft TTL ago is served by URL without fetching it; an older
+# grade is still served at once while a background refresh re-checks the card.
+# 0 fetches the card on every request.
+CACHE_SOFT_TTL_SECONDS = float(os.getenv("CARD_GRADER_CACHE_SOFT_TTL", "3600"))
+
+# Sectioned page text of each card's last grade, for incremental re-grading.
+# Re-grades touching more than these limits fall back to a full evaluation.
+snapshots = SectionSnapshotStore(CACHE_PATH)
+INCREMENTAL_MAX_CHANGED_FRACTION = float(os.getenv("CARD_GRADER_INCREMENTAL_MAX_CHANGED", "0.5"))
+INCREMENTAL_MAX_CATEGORIES = int(os.getenv("CARD_GRADER_INCREMENTAL_MAX_CATEGORIES", "5"))
+
+# Every fresh grade is also kept in a queryable store (GET /evaluations);
+# unlike the cache it never expires
+STORE_PATH = os.getenv("CARD_GRADER_STORE_PATH", "data/grades.sqlite3")
+store = EvaluationStore(STORE_PATH)
+
+# Near-duplicate cards (fine-tunes and quantizations copying a base model's
+# card): a card whose text is at least this similar to a graded card's is
+# graded by adapting that card's evaluation; 0 disables the lookup
+SIMILARITY_THRESHOLD = float(os.getenv("CARD_GRADER_SIMILARITY_THRESHOLD", "0.6"))
+similar_cards = SimilarityIndex(STORE_PATH)
+
+# Concurrent grades of the same card share one running evaluation
+inflight = SingleFlight()
+
+# Asynchronous grading jobs (bounded, expiring)
+JOB_TTL_SECONDS = float(os.getenv("CARD_GRADER_JOB_TTL", "3600"))
+MAX_JOBS = int(os.getenv("CARD_GRADER_MAX_JOBS", "1000"))
+
+# State shared by all worker processes: a global cap on concurrent LLM calls
+# (with a bounded wait queue per worker), leases on cache keys being graded and
+# job status snapshots
+STATE_PATH = os.getenv("CARD_GRADER_STATE_PATH", ".cache/state.sqlite3")
+LLM_CONCURRENCY = int(os.getenv("CARD_GRADER_LLM_CONCURRENCY", "16"))
+LLM_QUEUE_SIZE = int(os.getenv("CARD_GRADER_LLM_QUEUE", "64"))
+LLM_QUEUE_TIMEOUT = float(os.getenv("CARD_GRADER_LLM_QUEUE_TIMEOUT", "30"))
+LEASE_SECONDS = float(os.getenv("CARD_GRADER_LEASE_SECONDS", "300"))
+
+llm_slots = LLMSlots(
+    STATE_PATH,
+    max_concurrent=LLM_CONCURRENCY,
+    max_queue=LLM_QUEUE_SIZE,
+    queue_timeout=LLM_QUEUE_TIMEOUT,
+    lease_seconds=LEASE_SECONDS,
+)
+leases = InflightLeases(STATE_PATH, lease_seconds=LEASE_SECONDS)
+shared_jobs = SharedJobs(STATE_PATH, ttl_seconds=JOB_TTL_SECONDS)
+
+# Background pre-grading of a watchlist (a URL file, Hub organizations and the
+# most requested cards), using at most half of the LLM slots; rate 0 disables it
+PREGRADE_RATE_PER_MINUTE = float(os.getenv("CARD_GRADER_PREGRADE_RATE", "6"))
+PREGRADE_CONCURRENCY = int(os.getenv("CARD_GRADER_PREGRADE_CONCURRENCY", "2"))
+WATCHLIST_PATH = os.getenv("CARD_GRADER_WATCHLIST_PATH")
+WATCH_ORGS = [org.strip() for org in os.getenv("CARD_GRADER_WATCH_ORGS", "").split(",") if org.strip()]
+WATCH_ORG_LIMIT = int(os.getenv("CARD_GRADER_WATCH_ORG_LIMIT", "50"))
+WATCH_TOP_REQUESTED = int(os.getenv("CARD_GRADER_WATCH_TOP_REQUESTED", "100"))
+WATCH_RELOAD_SECONDS = float(os.getenv("CARD_GRADER_WATCH_RELOAD", "600"))
+recent_requests = RecentRequests(STATE_PATH)
+pregrader: Optional[PregradeScheduler] = None
+
+# POST /grade/batch limits
+BATCH_MAX_URLS = int(os.getenv("CARD_GRADER_BATCH_MAX_URLS", "500"))
+BATCH_CONCURRENCY = int(os.getenv("CARD_GRADER_BATCH_CONCURRENCY", "8"))
+
+jobs = JobStore(
+    max_jobs=MAX_JOBS,
+    ttl_seconds=JOB_TTL_SECONDS,
+    on_change=lambda job: shared_jobs.put(job.id, job_status(job).model_dump_json()),
+)
+# Keep references so running job tasks aren't garbage collected
+_job_tasks: set = set()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Create process-wide HTTP and LLM clients once so requests reuse pooled connections."""
+    import httpx
+    from openai import AsyncOpenAI
+
+    # Template and prompt prefix are immutable for the life of the process
+    app.state.template_md = load_template(TEMPLATE_PATH)
+    app.state.prompt_prefix = compile_prompt_prefix(app.state.template_md)
+    app.state.http_client = httpx.AsyncClient(
+        limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
+        timeout=30,
+    )
+    api_key = os.getenv("OPENAI_API_KEY")
+    # Retries are handled by src/llm_client.py; the SDK's own would multiply them
+    app.state.llm_client = AsyncOpenAI(api_key=api_key, max_retries=0) if api_key else None
+    if app.state.llm_client is not None:
+        resilient(app.state.llm_client).limiter = llm_slots.slot
+    pregrade_task = start_pregrader(app.state.http_client)
+    try:
+        yield
+    finally:
+        if pregrade_task is not None:
+            pregrade_task.cancel()
+        if app.state.llm_client is not None:
+            await app.state.llm_client.close()
+        await app.state.http_client.aclose()
+
+
+app = FastAPI(lifespan=lifespan)
 
 # Allow your Chrome extension to call us
 app.add_middleware(
@@ -34,7 +222,13 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing", "ETag"],
 )
+# Per-stage timings for /metrics and the Server-Timing header
+app.add_middleware(metrics.ServerTimingMiddleware)
+# Conditional GETs (ETag / 304), then brotli or gzip on the way out
+app.add_middleware(ETagMiddleware)
+app.add_middleware(CompressionMiddleware)
 
 
 # --------------------------------------------------------------------
@@ -72,6 +266,20 @@ class GradeRequest(BaseModel):
     url: str
 
 
+class BatchGradeRequest(BaseModel):
+    urls: List[str]
+    # Cards graded at once for this batch (capped at CARD_GRADER_BATCH_CONCURRENCY)
+    concurrency: Optional[int] = None
+
+
+class TokenUsage(BaseModel):
+    api: Optional[str] = None  # "responses" or "chat"
+    input_tokens: Optional[int] = None
+    output_tokens: Optional[int] = None
+    # Prompt tokens served from the provider's prompt cache
+    cached_tokens: Optional[int] = None
+
+
 class GradeResponse(BaseModel):
     # Normalized overall score (0–100)
     score: Optional[float] = None
@@ -89,31 +297,207 @@ class GradeResponse(BaseModel):
 
     filled_markdown: Optional[str] = None
 
+    # True when served from the evaluation cache (no LLM call was made)
+    cached: bool = False
+    # True when the cached grade is past its soft TTL (a background refresh was queued)
+    stale: bool = False
+    # Token usage of the LLM call that produced this grade (None on cache hits)
+    usage: Optional[TokenUsage] = None
+    # Model tier that produced the grade: "fast" or "full" (see the model cascade)
+    model_tier: Optional[str] = None
+    # Categories re-scored by an incremental re-grade (None after a full evaluation)
+    regraded_categories: Optional[List[str]] = None
+    # URL of the near-duplicate card whose evaluation this grade was adapted
+    # from, and the estimated similarity of the two card texts
+    derived_from: Optional[str] = None
+    similarity: Optional[float] = None
+    # Row in the evaluation store (GET /evaluations/{id}) this grade was saved as
+    evaluation_id: Optional[int] = None
+
+
+class JobEvent(BaseModel):
+    stage: str
+    at: float
+    error: Optional[str] = None
+
+
+class JobStatus(BaseModel):
+    id: str
+    url: str
+    status: str  # queued | running | done | error
+    stage: str
+    events: List[JobEvent] = []
+    result: Optional[GradeResponse] = None
+    error: Optional[str] = None
+    created_at: float
+    updated_at: float
+    # Milliseconds per stage (fetch, llm, parse, ...) once the job has run
+    timings: Dict[str, float] = {}
+
 
 # --------------------------------------------------------------------
 # LLM call
 # --------------------------------------------------------------------
-def run_card_evaluation(url: str) -> str:
+async def fetch_page_text(url: str) -> str:
+    """Fetch the card and reduce it to the prompt's context budget."""
+    with metrics.timed("fetch"):
+        page_text = await fetch_card_text_async(url, app.state.http_client)
+    return await asyncio.to_thread(prepare_page_text, url, page_text)
+
+
+async def run_card_evaluation(
+    url: str,
+    template_md: Optional[str] = None,
+    page_text: Optional[str] = None,
+    on_stage: Optional[Callable[[str], None]] = None,
+    on_usage: Optional[Callable[[dict], None]] = None,
+    model: Optional[str] = None,
+) -> str:
     """Use your existing pipeline to produce the filled evaluation markdown."""
-    template_md = load_template(TEMPLATE_PATH)
-    page_text = fetch_url_text(url)
+    model = model or MODEL_NAME
+    on_stage = on_stage or (lambda stage: None)
+    if page_text is None:
+        on_stage("fetching")
+        page_text = await fetch_page_text(url)
+
+    client = app.state.llm_client
+    if client is None:
+        raise RuntimeError("OPENAI_API_KEY is not set")
 
-    prompt = build_prompt(template_md, url, page_text)
+    on_stage("prompting")
+    if EVAL_MODE == "fanout":
+        on_stage("generating")
+        with metrics.timed("llm"):
+            return await run_fanout_evaluation(
+                client, template_md or app.state.template_md, url, page_text, on_usage, model
+            )
+
+    with metrics.timed("prompt"):
+        if template_md is None or template_md == app.state.template_md:
+            prefix = app.state.prompt_prefix
+        else:
+            prefix = compile_prompt_prefix(template_md)
+        prompt = build_prompt_from_prefix(prefix, url, page_text)
+
+    on_stage("generating")
+    with metrics.timed("llm"):
+        filled_md = await call_openai_with_fallback_async(
+            client=client,
+            model=model,
+            system=prompt["system"],
+            user=prompt["user"],
+            on_usage=lambda usage: record_usage(usage, on_usage),
+        )
 
-    api_key = os.getenv("OPENAI_API_KEY")
-    if not api_key:
+    return filled_md
+
+
+async def run_fanout_evaluation(
+    client: "AsyncOpenAI",
+    template_md: str,
+    url: str,
+    page_text: str,
+    on_usage: Optional[Callable[[dict], None]] = None,
+    model: Optional[str] = None,
+) -> str:
+    """Fill the template as concurrent sub-tasks; usage is summed over all calls."""
+    totals: dict = {}
+    add_usage = usage_adder(totals)
+
+    async def complete(system: str, user: str) -> str:
+        return await call_openai_with_fallback_async(
+            client=client,
+            model=model or MODEL_NAME,
+            system=system,
+            user=user,
+            on_usage=lambda usage: record_usage(usage, add_usage),
+        )
+
+    filled_md = await run_fanout(complete, template_md, url, page_text, max_parallel=FANOUT_PARALLELISM)
+    if on_usage and totals:
+        on_usage(totals)
+    return filled_md
+
+
+async def run_structured_evaluation(
+    url: str,
+    template_md: str,
+    page_text: str,
+    on_stage: Callable[[str], None],
+    on_usage: Callable[[dict], None],
+    model: Optional[str] = None,
+) -> Optional[GradeResponse]:
+    """
+    Grade from a schema-constrained JSON answer and fill the template locally.
+    Returns None (after logging) when the answer doesn't validate, so the
+    caller can fall back to a markdown evaluation.
+    """
+    client = app.state.llm_client
+    if client is None:
         raise RuntimeError("OPENAI_API_KEY is not set")
 
-    client = OpenAI(api_key=api_key)
+    on_stage("prompting")
+    with metrics.timed("prompt"):
+        prompt = build_structured_prompt(url, page_text)
+    on_stage("generating")
+    with metrics.timed("llm"):
+        answer = await call_openai_with_fallback_async(
+            client=client,
+            model=model or MODEL_NAME,
+            system=prompt["system"],
+            user=prompt["user"],
+            on_usage=lambda usage: record_usage(usage, on_usage),
+            json_schema=response_schema(),
+        )
+
+    on_stage("parsing")
+    with metrics.timed("parse"):
+        try:
+            evaluation = parse_structured(answer)
+        except StructuredOutputError as e:
+            logger.warning("%s; falling back to a markdown evaluation of %s", e, url)
+            return None
+        fields = summarize(evaluation)
+        filled_md = force_model_card_type(render_markdown(template_md, evaluation))
 
-    filled_md = call_openai_with_fallback(
-        client=client,
-        model=MODEL_NAME,
-        system=prompt["system"],
-        user=prompt["user"],
+    raw_total = fields["raw_total"]
+    score = compute_score_from_total(raw_total, max_total=30.0)
+    return GradeResponse(
+        score=score,
+        raw_total=raw_total,
+        max_total=30.0,
+        label=score_label(score),
+        details=f"Score computed from structured category scores: {raw_total:.0f}/30.",
+        basic_info=BasicInfo(**{**fields["basic_info"], "type": "Model Card"}),
+        category_scores=[CategoryScore(**row) for row in fields["category_scores"]],
+        standards_summary=StandardsSummary(**fields["standards_summary"]),
+        gaps=GapSummary(**fields["gaps"]),
+        filled_markdown=filled_md,
     )
 
-    return filled_md
+
+# Process-wide token totals, including provider-side prompt cache hits
+usage_totals = {"llm_calls": 0, "input_tokens": 0, "output_tokens": 0, "cached_tokens": 0}
+
+
+def record_usage(usage: dict, forward: Optional[Callable[[dict], None]] = None) -> None:
+    usage_totals["llm_calls"] += 1
+    for key in ("input_tokens", "output_tokens", "cached_tokens"):
+        usage_totals[key] += usage.get(key) or 0
+        metrics.LLM_TOKENS.inc(usage.get(key) or 0, kind=key[: -len("_tokens")])
+    if forward:
+        forward(usage)
+
+
+def usage_adder(totals: dict) -> Callable[[dict], None]:
+    """An on_usage callback that sums the usage of several LLM calls into `totals`."""
+
+    def add(usage: dict) -> None:
+        totals["api"] = usage.get("api")
+        for key in ("input_tokens", "output_tokens", "cached_tokens"):
+            totals[key] = (totals.get(key) or 0) + (usage.get(key) or 0)
+
+    return add
 
 
 # --------------------------------------------------------------------
@@ -349,6 +733,207 @@ def parse_gaps(filled_md: str) -> GapSummary:
     )
 
 
+# --------------------------------------------------------------------
+# Single-pass parser
+# --------------------------------------------------------------------
+TYPE_LINE_RE = re.compile(r"- \*\*Type:\*\*.*")
+TYPE_RE = re.compile(r"\*\*Type:\*\*\s*(.+)")
+VERSION_RE = re.compile(r"\*\*Version / Date:\*\*\s*(.+)")
+OWNER_RE = re.compile(r"\*\*Owner / Contact:\*\*\s*(.+)")
+FIRST_NUMBER_RE = re.compile(r"([0-9]+)")
+BOLD_MARKS_RE = re.compile(r"\*+")
+
+# Section headings the parser dispatches on (matched with startswith, like the
+# per-section parsers above)
+STANDARDS_HEADING = "## 2 Standards Comparison"
+GAPS_HEADING = "## 3 Gaps & Inconsistencies"
+SCORING_HEADING = "## 4 Scoring"
+
+GAP_HEADINGS = (
+    ("- **Missing:**", "missing"),
+    ("- **Inconsistent / conflicting:**", "inconsistent"),
+    ("- **Ambiguous:**", "ambiguous"),
+)
+
+
+class ParsedEvaluation(BaseModel):
+    filled_markdown: str
+    basic_info: BasicInfo
+    category_scores: List[CategoryScore] = []
+    raw_total: Optional[float] = None
+    standards_summary: StandardsSummary
+    gaps: GapSummary
+
+
+def parse_evaluation(filled_md: str) -> ParsedEvaluation:
+    """
+    Parse a filled evaluation in one walk over its lines.
+
+    Produces exactly what force_model_card_type followed by parse_basic_info,
+    parse_scoring_table, parse_standards_table and parse_gaps would, but the
+    document is split once and each line is dispatched to the handler of the
+    `## N` section it belongs to. Basic Info fields are matched on any line,
+    as parse_basic_info does.
+    """
+    filled_md = force_model_card_type(filled_md)
+    stripped_lines = [line.strip() for line in filled_md.splitlines()]
+    n_lines = len(stripped_lines)
+
+    def get_block_after(idx: int) -> str:
+        for j in range(idx + 1, n_lines):
+            if stripped_lines[j]:
+                return stripped_lines[j]
+        return ""
+
+    title = url = card_type = version = owner = None
+
+    category_scores: list[CategoryScore] = []
+    raw_total: Optional[float] = None
+
+    present = partial = missing = total_items = 0
+    missing_items: list[str] = []
+    partial_items: list[str] = []
+    in_table = False
+
+    gap_key = None
+    buckets = {"missing": [], "inconsistent": [], "ambiguous": []}
+
+    # Each section is parsed at most once: None (not seen) -> active -> closed
+    active = None
+    closed = set()
+
+    for i, stripped in enumerate(stripped_lines):
+        # ---- Basic Info (matched anywhere) ----
+        if "**" in stripped:
+            if "**Card Title / URL:**" in stripped:
+                next_line = get_block_after(i)
+                if "http://" in next_line or "https://" in next_line:
+                    url = next_line
+                else:
+                    title = next_line
+                    second = get_block_after(i + 1)
+                    if "http://" in second or "https://" in second:
+                        url = second
+            elif "**Type:**" in stripped:
+                m = TYPE_RE.search(stripped)
+                card_type = m.group(1).strip() if m else get_block_after(i)
+            elif "**Version / Date:**" in stripped:
+                m = VERSION_RE.search(stripped)
+                version = m.group(1).strip() if m else get_block_after(i)
+            elif "**Owner / Contact:**" in stripped:
+                m = OWNER_RE.search(stripped)
+                owner = m.group(1).strip() if m else get_block_after(i)
+
+        # ---- Section boundaries ----
+        if stripped.startswith("#") or stripped.startswith("---"):
+            if stripped.startswith(SCORING_HEADING):
+                heading = "scoring"
+            elif stripped.startswith(STANDARDS_HEADING):
+                heading = "standards"
+            elif stripped.startswith(GAPS_HEADING):
+                heading = "gaps"
+            else:
+                heading = None
+
+            if heading is not None and heading == active:
+                # Repeated heading inside its own section is skipped
+                continue
+            if active is not None and (stripped.startswith("## ") or stripped.startswith("---")):
+                closed.add(active)
+                active = None
+            if heading is not None and heading not in closed:
+                active = heading
+                continue
+            if active is None:
+                continue
+
+        if active is None:
+            continue
+
+        # ---- 4 Scoring ----
+        if active == "scoring":
+            if not stripped.startswith("|"):
+                continue
+            parts = [p.strip() for p in stripped.split("|")]
+            if len(parts) < 3:
+                continue
+            name = parts[1]
+            if name.lower().startswith("category"):
+                continue
+            m = FIRST_NUMBER_RE.search(parts[2])
+            if not m:
+                continue
+            value = float(m.group(1))
+            if "total" in name.lower():
+                raw_total = value
+            else:
+                category_scores.append(
+                    CategoryScore(name=BOLD_MARKS_RE.sub("", name).strip(), score=value)
+                )
+
+        # ---- 2 Standards Comparison ----
+        elif active == "standards":
+            if stripped.startswith("| Standard Item"):
+                in_table = True
+                continue
+            if not in_table or not stripped.startswith("|"):
+                continue
+            parts = [p.strip() for p in stripped.split("|")]
+            if len(parts) < 4:
+                continue
+            name = parts[1]
+            status = parts[2]
+            if not name or name.lower().startswith("standard item"):
+                continue
+            total_items += 1
+            if "✓" in status:
+                present += 1
+            elif "~" in status:
+                partial += 1
+                partial_items.append(name)
+            elif "✗" in status or "x" == status.lower():
+                missing += 1
+                missing_items.append(name)
+
+        # ---- 3 Gaps & Inconsistencies ----
+        elif active == "gaps":
+            if not stripped.startswith("- "):
+                continue
+            for prefix, key in GAP_HEADINGS:
+                if stripped.startswith(prefix):
+                    gap_key = key
+                    extra = stripped.replace(prefix, "").strip(" -")
+                    if extra:
+                        buckets[key].append(extra)
+                    break
+            else:
+                if gap_key:
+                    buckets[gap_key].append(stripped[2:].strip())
+
+    def join_or_none(lst: list[str]) -> Optional[str]:
+        return " ".join(lst) if lst else None
+
+    return ParsedEvaluation(
+        filled_markdown=filled_md,
+        basic_info=BasicInfo(title=title, url=url, type=card_type, version=version, owner=owner),
+        category_scores=category_scores,
+        raw_total=raw_total,
+        standards_summary=StandardsSummary(
+            present=present,
+            partial=partial,
+            missing=missing,
+            total_items=total_items,
+            missing_items=missing_items,
+            partial_items=partial_items,
+        ),
+        gaps=GapSummary(
+            missing=join_or_none(buckets["missing"]),
+            inconsistent=join_or_none(buckets["inconsistent"]),
+            ambiguous=join_or_none(buckets["ambiguous"]),
+        ),
+    )
+
+
 def compute_score_from_total(raw_total: Optional[float], max_total: float = 30.0) -> Optional[float]:
     if raw_total is None:
         return None
@@ -373,31 +958,23 @@ def score_label(score: Optional[float]) -> Optional[str]:
 
 
 # --------------------------------------------------------------------
-# Route
+# Response assembly
 # --------------------------------------------------------------------
-@app.post("/grade", response_model=GradeResponse)
-def grade(req: GradeRequest):
-    if "huggingface.co" not in req.url:
-        raise HTTPException(status_code=400, detail="Only Hugging Face URLs are supported")
-
-    try:
-        filled_md = run_card_evaluation(req.url)
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to evaluate model card: {e}")
-    
+def force_model_card_type(filled_md: str) -> str:
     # Force Type to "Model Card" before parsing for now
     # extension only for model cards atm
-    filled_md = re.sub(
-        r"- \*\*Type:\*\*.*",             
-        "- **Type:** Model Card",            
-        filled_md
-    )
+    return TYPE_LINE_RE.sub("- **Type:** Model Card", filled_md)
+
 
-    # Parse structured info
-    basic_info = parse_basic_info(filled_md)
-    category_scores, raw_total = parse_scoring_table(filled_md)
-    standards_summary = parse_standards_table(filled_md)
-    gaps = parse_gaps(filled_md)
+def build_grade_response(filled_md: str) -> GradeResponse:
+    """Parse a filled evaluation into the structured response."""
+    with metrics.timed("parse"):
+        parsed = parse_evaluation(filled_md)
+    filled_md = parsed.filled_markdown
+    basic_info = parsed.basic_info
+    category_scores, raw_total = parsed.category_scores, parsed.raw_total
+    standards_summary = parsed.standards_summary
+    gaps = parsed.gaps
 
     score = compute_score_from_total(raw_total, max_total=30.0)
     label = score_label(score)
@@ -422,8 +999,942 @@ def grade(req: GradeRequest):
     )
 
 
+SECTION_NUMBER_RE = re.compile(r"^(\d+)\s")
+
+
+def parse_section_fragment(heading: str, section_md: str) -> Optional[dict]:
+    """
+    Turn one completed section of a streamed evaluation into a partial
+    GradeResponse fragment. Sections without structured fields return None.
+    """
+    if heading.lower().startswith("basic info"):
+        basic_info = parse_basic_info(force_model_card_type(section_md))
+        return {"type": "basic_info", "data": basic_info.model_dump()}
+
+    m = SECTION_NUMBER_RE.match(heading)
+    number = m.group(1) if m else None
+    if number == "2":
+        return {"type": "standards_summary", "data": parse_standards_table(section_md).model_dump()}
+    if number == "3":
+        return {"type": "gaps", "data": parse_gaps(section_md).model_dump()}
+    if number == "4":
+        category_scores, raw_total = parse_scoring_table(section_md)
+        score = compute_score_from_total(raw_total, max_total=30.0)
+        return {
+            "type": "scoring",
+            "data": {
+                "category_scores": [c.model_dump() for c in category_scores],
+                "raw_total": raw_total,
+                "score": score,
+                "label": score_label(score),
+            },
+        }
+    return None
+
+
+# --------------------------------------------------------------------
+# Evaluation pipeline
+# --------------------------------------------------------------------
+def template_digest(template_md: str) -> str:
+    return hashlib.sha256(template_md.encode("utf-8")).hexdigest()
+
+
+def grade_fingerprint(template_md: str) -> str:
+    """Models, prompts (and eval mode) and template that a grade was produced with."""
+    return "|".join((GRADER_MODELS, PROMPT_VERSION, template_digest(template_md)))
+
+
+def save_evaluation(response: GradeResponse, url: str, template_md: str) -> None:
+    """Record a fresh grade in the evaluation store and tag it with its id."""
+    response.evaluation_id = store.add(
+        to_store_payload(response),
+        model=TIER_MODELS.get(response.model_tier) or MODEL_NAME,
+        prompt_version=PROMPT_VERSION,
+        template_sha=template_digest(template_md),
+        url=url,
+    )
+
+
+def flight_key(url: str, template_md: str) -> str:
+    """Requests with the same key can share one in-flight evaluation."""
+    return "|".join((normalize_url(url), grade_fingerprint(template_md)))
+
+
+def cached_response(cache_key: str) -> Optional[GradeResponse]:
+    cached = cache.get(cache_key)
+    if cached is None:
+        return None
+    response = GradeResponse.model_validate(cached)
+    response.cached = True
+    response.usage = None
+    return response
+
+
+def cache_grade(cache_key: str, url: str, template_md: str, response: Optional[GradeResponse] = None) -> None:
+    """Cache a new grade (if given) and record it as current for the URL's content."""
+    norm_url = normalize_url(url)
+    if response is not None:
+        cache.put(cache_key, norm_url, response.model_dump())
+    cache.mark_current(norm_url, grade_fingerprint(template_md), cache_key)
+
+
+def recent_grade(url: str, template_md: str) -> Optional[GradeResponse]:
+    """
+    The card's current grade by URL, without fetching the card. Past the soft
+    TTL it is marked stale and a background refresh is queued; without a
+    pre-grading scheduler to run that refresh, it isn't served at all.
+    """
+    if CACHE_SOFT_TTL_SECONDS <= 0:
+        return None
+    hit = cache.latest(normalize_url(url), grade_fingerprint(template_md))
+    if hit is None:
+        return None
+    payload, age = hit
+    stale = age > CACHE_SOFT_TTL_SECONDS
+    if stale:
+        if pregrader is None:
+            return None
+        pregrader.request_refresh(url)
+    response = GradeResponse.model_validate(payload)
+    response.cached = True
+    response.stale = stale
+    response.usage = None
+    metrics.EVALUATIONS.inc(result="stale" if stale else "recent")
+    return response
+
+
+async def evaluate_url(
+    url: str, template_md: str, on_stage: Optional[Callable[[str], None]] = None
+) -> GradeResponse:
+    """Fetch the card, serve it from the cache if possible, otherwise grade it."""
+    on_stage = on_stage or (lambda stage: None)
+    on_stage("fetching")
+    page_text = await fetch_page_text(url)
+    cache_key = make_cache_key(page_text, template_md, GRADER_MODELS, PROMPT_VERSION)
+
+    cached = cached_response(cache_key)
+    if cached is None:
+        # A request grading the same card text holds a lease on its cache key;
+        # wait for it and reuse its result rather than repeating the LLM call
+        async with leases.hold(cache_key) as waited:
+            cached = cached_response(cache_key) if waited else None
+            if cached is None:
+                return await grade_page(url, template_md, page_text, cache_key, on_stage)
+    cache_grade(cache_key, url, template_md)
+    metrics.EVALUATIONS.inc(result="cached")
+    return cached
+
+
+async def grade_page(
+    url: str, template_md: str, page_text: str, cache_key: str, on_stage: Callable[[str], None]
+) -> GradeResponse:
+    """Grade fetched page text (incrementally if possible) and cache the result."""
+    sections = section_snapshot(page_text)
+    signature = await card_signature(page_text)
+    usage: dict = {}
+    add_usage = usage_adder(usage)
+    response = await regrade_from_previous(url, template_md, sections, signature, on_stage, add_usage)
+    if response is None:
+        response = await run_cascade(url, template_md, page_text, on_stage, add_usage)
+    response.usage = TokenUsage(**usage) if usage else None
+    record_grade(response, url, template_md, cache_key, sections, signature)
+    return response
+
+
+async def card_signature(page_text: str) -> Optional[List[int]]:
+    """MinHash signature of the card text, or None when near-duplicate reuse is off."""
+    return await asyncio.to_thread(similar_cards.signature, page_text) if SIMILARITY_THRESHOLD > 0 else None
+
+
+async def regrade_from_previous(
+    url: str,
+    template_md: str,
+    sections: List[dict],
+    signature: Optional[List[int]],
+    on_stage: Callable[[str], None],
+    add_usage: Callable[[dict], None],
+) -> Optional[GradeResponse]:
+    """
+    Re-grade only the changed sections against the card's last snapshot, or
+    against the most similar graded card's; None if neither applies.
+    """
+    norm_url = normalize_url(url)
+    fingerprint = grade_fingerprint(template_md)
+    previous = snapshots.get(norm_url, fingerprint)
+    base = None
+    if previous is None and signature is not None:
+        base, previous = derived_base(norm_url, fingerprint, signature)
+    if previous is None:
+        return None
+    response = await regrade_changed_sections(
+        url, previous, sections, on_stage, add_usage, refresh_basic_info=base is not None
+    )
+    if response is not None and base is not None:
+        response.derived_from = base.url
+        response.similarity = round(base.similarity, 3)
+        response.details = f"{response.details} Adapted from the evaluation of {base.url}."
+    return response
+
+
+def record_grade(
+    response: GradeResponse,
+    url: str,
+    template_md: str,
+    cache_key: str,
+    sections: List[dict],
+    signature: Optional[List[int]],
+) -> None:
+    """
+    Count, save and cache a new grade, and keep its section snapshot and
+    similarity signature so later grades of this card or its near-duplicates
+    can be incremental.
+    """
+    if response.derived_from is not None:
+        result = "derived"
+    elif response.regraded_categories is None:
+        result = "full"
+    else:
+        result = "incremental" if response.regraded_categories else "unchanged"
+    metrics.EVALUATIONS.inc(result=result)
+    norm_url = normalize_url(url)
+    fingerprint = grade_fingerprint(template_md)
+    save_evaluation(response, norm_url, template_md)
+    cache_grade(cache_key, url, template_md, response)
+    snapshots.put(norm_url, fingerprint, sections, response.filled_markdown)
+    if signature is not None:
+        similar_cards.add(norm_url, fingerprint, signature, response.evaluation_id)
+
+
+def derived_base(norm_url: str, fingerprint: str, signature: List[int]) -> Tuple[Optional[SimilarCard], Optional[tuple]]:
+    """
+    The most similar graded card and its section snapshot, with the card URL
+    in its evaluation replaced by `norm_url`; (None, None) if there is none.
+    """
+    with metrics.timed("similarity"):
+        base = similar_cards.lookup(signature, fingerprint, SIMILARITY_THRESHOLD, exclude_url=norm_url)
+    if base is None:
+        return None, None
+    snapshot = snapshots.get(base.url, fingerprint)
+    if snapshot is None:
+        return None, None
+    sections, filled_md = snapshot
+    # Not followed by more of a path, so links to other cards of the same repo stay
+    filled_md = re.sub(re.escape(base.url) + r"(?![\w./-])", norm_url, filled_md, flags=re.IGNORECASE)
+    return base, (sections, filled_md)
+
+
+async def evaluate_with(
+    model: str,
+    url: str,
+    template_md: str,
+    page_text: str,
+    on_stage: Callable[[str], None],
+    on_usage: Callable[[dict], None],
+) -> GradeResponse:
+    """A full evaluation of the page text by `model`, in the configured EVAL_MODE."""
+    response = None
+    if EVAL_MODE == "structured":
+        response = await run_structured_evaluation(url, template_md, page_text, on_stage, on_usage, model=model)
+    if response is None:
+        filled_md = await run_card_evaluation(
+            url, template_md=template_md, page_text=page_text, on_stage=on_stage, on_usage=on_usage, model=model
+        )
+        on_stage("parsing")
+        response = build_grade_response(filled_md)
+    return response
+
+
+# Cascade decisions of this worker: (tier, reason) -> count
+cascade_outcomes: Counter = Counter()
+
+
+def record_cascade(tier: str, reason: str) -> None:
+    cascade_outcomes[(tier, reason)] += 1
+    metrics.CASCADE.inc(tier=tier, reason=reason)
+
+
+async def run_cascade(
+    url: str,
+    template_md: str,
+    page_text: str,
+    on_stage: Callable[[str], None],
+    on_usage: Callable[[dict], None],
+) -> GradeResponse:
+    """
+    Grade with the fast tier when the card qualifies and keep its answer if
+    it passes the local checks; otherwise (or without a fast model) grade
+    with MODEL_NAME.
+    """
+    reason = None
+    if FAST_MODEL_NAME:
+        reason = cascade.route(page_text, CASCADE_MAX_TOKENS, CASCADE_MAX_SECTIONS)
+        if reason is None:
+            try:
+                response = await evaluate_with(FAST_MODEL_NAME, url, template_md, page_text, on_stage, on_usage)
+            except (Overloaded, CircuitOpenError):
+                raise
+            except Exception as e:
+                logger.warning("fast tier failed on %s, escalating: %s", url, e)
+                reason = "error"
+            else:
+                failed = cascade.check_grade(response.category_scores, response.raw_total, response.standards_summary)
+                if not failed:
+                    record_cascade(cascade.FAST, "accepted")
+                    response.model_tier = cascade.FAST
+                    return response
+                logger.info("fast tier grade of %s failed checks (%s), escalating", url, ", ".join(failed))
+                reason = failed[0]
+        record_cascade(cascade.FULL, reason)
+
+    response = await evaluate_with(MODEL_NAME, url, template_md, page_text, on_stage, on_usage)
+    response.model_tier = cascade.FULL
+    return response
+
+
+async def regrade_changed_sections(
+    url: str,
+    previous: tuple,
+    sections: List[dict],
+    on_stage: Callable[[str], None],
+    on_usage: Callable[[dict], None],
+    refresh_basic_info: bool = False,
+) -> Optional[GradeResponse]:
+    """
+    Re-score only the categories touched by sections that changed since the
+    last grade and merge them into it. Returns None when a full evaluation is
+    needed instead (no usable diff, too much changed, or an unusable answer).
+    With `refresh_basic_info` (a grade adapted from another card), Basic Info
+    is filled again from the card's opening sections.
+    """
+    old_sections, previous_md = previous
+    diff = diff_sections(old_sections, sections)
+    if not diff.changed and not refresh_basic_info:
+        # Same card text as last time (its cache entry expired): the grade still holds
+        on_stage("parsing")
+        response = build_grade_response(previous_md)
+        response.regraded_categories = []
+        return response
+
+    categories = affected_categories(diff)
+    if diff.fraction_changed > INCREMENTAL_MAX_CHANGED_FRACTION or len(categories) > INCREMENTAL_MAX_CATEGORIES:
+        return None
+
+    client = app.state.llm_client
+    if client is None:
+        raise RuntimeError("OPENAI_API_KEY is not set")
+
+    on_stage("prompting")
+    with metrics.timed("prompt"):
+        opening = card_opening(sections) if refresh_basic_info else None
+        prompt = build_update_prompt(previous_md, diff, categories, url, opening)
+    on_stage("generating")
+    with metrics.timed("llm"):
+        update_md = await call_openai_with_fallback_async(
+            client=client,
+            model=MODEL_NAME,
+            system=prompt["system"],
+            user=prompt["user"],
+            on_usage=lambda usage: record_usage(usage, on_usage),
+        )
+
+    on_stage("parsing")
+    merged = merge_update(previous_md, update_md, categories, basic_info=refresh_basic_info)
+    if merged is None:
+        return None
+    response = build_grade_response(merged)
+    response.model_tier = cascade.FULL
+    response.regraded_categories = categories
+    if categories:
+        response.details = f"{response.details} Re-graded changed categories: {', '.join(categories)}."
+    return response
+
+
+async def stream_fresh_grade(url: str, template_md: str, page_text: str, cache_key: str) -> AsyncIterator[dict]:
+    """
+    Stream section fragments of a new grade, then its `result` (recorded like
+    any grade). A card with a previous or near-duplicate evaluation is
+    re-graded incrementally instead, and only its `result` is sent.
+    """
+    client = app.state.llm_client
+    if client is None:
+        raise RuntimeError("OPENAI_API_KEY is not set")
+    sections = section_snapshot(page_text)
+    signature = await card_signature(page_text)
+    usage: dict = {}
+    add_usage = usage_adder(usage)
+    response = await regrade_from_previous(url, template_md, sections, signature, lambda stage: None, add_usage)
+    if response is not None:
+        response.usage = TokenUsage(**usage) if usage else None
+        record_grade(response, url, template_md, cache_key, sections, signature)
+        yield {"type": "result", "data": response.model_dump()}
+        return
+
+    with metrics.timed("prompt"):
+        prompt = build_prompt_from_prefix(app.state.prompt_prefix, url, page_text)
+
+    parser = SectionStreamParser()
+    chunks: list[str] = []
+    llm_started = time.perf_counter()
+    async for delta in stream_openai_text_async(
+        client=client,
+        model=MODEL_NAME,
+        system=prompt["system"],
+        user=prompt["user"],
+        on_usage=lambda u: record_usage(u, add_usage),
+    ):
+        chunks.append(delta)
+        for heading, section_md in parser.feed(delta):
+            fragment = parse_section_fragment(heading, section_md)
+            if fragment:
+                yield fragment
+    metrics.record_stage("llm", time.perf_counter() - llm_started)
+    for heading, section_md in parser.close():
+        fragment = parse_section_fragment(heading, section_md)
+        if fragment:
+            yield fragment
+
+    response = build_grade_response("".join(chunks))
+    response.model_tier = cascade.FULL
+    response.usage = TokenUsage(**usage) if usage else None
+    record_grade(response, url, template_md, cache_key, sections, signature)
+    yield {"type": "result", "data": response.model_dump()}
+
+
+async def start_evaluation(url: str, template_md: str, revalidate: bool = False) -> GradeResponse:
+    """Grade `url`, sharing work with identical in-flight requests.
+
+    A recent grade of the URL is returned right away unless `revalidate`
+    asks to fetch the card. Stage transitions are published to every job
+    attached to the same evaluation, whichever caller happened to start it.
+    """
+    if not revalidate:
+        recent = recent_grade(url, template_md)
+        if recent is not None:
+            return recent
+    key = flight_key(url, template_md)
+    return await inflight.do(
+        key,
+        lambda: evaluate_url(url, template_md, on_stage=lambda stage: jobs.publish_stage(key, stage)),
+    )
+
+
+async def run_job(job: Job, template_md: str) -> None:
+    job.timings = metrics.begin_timings()
+    try:
+        response = await start_evaluation(job.url, template_md)
+    except Exception as e:
+        jobs.fail(job, f"Failed to evaluate model card: {e}")
+    else:
+        jobs.finish(job, response.model_dump())
+
+
+def job_status(job: Job) -> JobStatus:
+    return JobStatus(
+        id=job.id,
+        url=job.url,
+        status=job.status,
+        stage=job.stage,
+        events=job.events,
+        result=job.result,
+        error=job.error,
+        created_at=job.created_at,
+        updated_at=job.updated_at,
+        timings=metrics.timings_ms(job.timings),
+    )
+
+
+# --------------------------------------------------------------------
+# Background pre-grading
+# --------------------------------------------------------------------
+def llm_busy() -> bool:
+    """Requests need the LLM: some are queued, or half the slots are taken."""
+    if llm_slots.waiting:
+        return True
+    return LLM_CONCURRENCY > 0 and llm_slots.in_use() >= max(1, LLM_CONCURRENCY // 2)
+
+
+def pregrade_due(url: str) -> bool:
+    hit = cache.latest(url, grade_fingerprint(app.state.template_md))
+    return hit is None or hit[1] > CACHE_SOFT_TTL_SECONDS
+
+
+async def pregrade(url: str) -> str:
+    """Re-check one card off the request path: "current" if its grade still holds."""
+    response = await start_evaluation(url, app.state.template_md, revalidate=True)
+    return "current" if response.cached else "graded"
+
+
+def start_pregrader(http_client: "httpx.AsyncClient") -> Optional[asyncio.Task]:
+    """Start the pre-grading scheduler (unless disabled, or there's no LLM or cache)."""
+    global pregrader
+    if PREGRADE_RATE_PER_MINUTE <= 0 or CACHE_TTL_SECONDS <= 0 or app.state.llm_client is None:
+        return None
+    sources = {"requested": traffic_source(recent_requests, WATCH_TOP_REQUESTED)}
+    if WATCHLIST_PATH:
+        sources["file"] = file_source(WATCHLIST_PATH)
+    if WATCH_ORGS:
+        sources["orgs"] = org_source(http_client, WATCH_ORGS, WATCH_ORG_LIMIT)
+    pregrader = PregradeScheduler(
+        pregrade,
+        pregrade_due,
+        sources,
+        rate_per_minute=PREGRADE_RATE_PER_MINUTE,
+        max_concurrent=PREGRADE_CONCURRENCY,
+        reload_seconds=WATCH_RELOAD_SECONDS,
+        normalize=normalize_url,
+        is_busy=llm_busy,
+        # One worker scans the watchlist; each still refreshes what it served stale.
+        # The leader renews at every reload, so the lease has to outlast the interval.
+        is_leader=lambda: leases.claim("pregrade:watchlist", lease_seconds=2 * WATCH_RELOAD_SECONDS),
+    )
+    return asyncio.create_task(pregrader.run())
+
+
+# --------------------------------------------------------------------
+# Routes
+# --------------------------------------------------------------------
+def require_admin(request: Request, x_admin_token: Optional[str] = Header(default=None)):
+    if ADMIN_TOKEN:
+        if not hmac.compare_digest((x_admin_token or "").encode(), ADMIN_TOKEN.encode()):
+            raise HTTPException(status_code=403, detail="Invalid admin token")
+    elif not is_loopback(request.client.host if request.client else None):
+        raise HTTPException(status_code=403, detail="Set CARD_GRADER_ADMIN_TOKEN to use admin endpoints remotely")
+
+
+def is_loopback(host: Optional[str]) -> bool:
+    try:
+        return host is not None and ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+def overloaded_error(e: Overloaded) -> HTTPException:
+    return HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(math.ceil(e.retry_after))})
+
+
+def reject_if_queue_full() -> None:
+    """Refuse new LLM work up front while this worker's wait queue is full."""
+    if llm_slots.queue_full():
+        llm_slots.rejected += 1
+        raise overloaded_error(Overloaded("LLM queue is full; retry later", llm_slots.retry_after))
+
+
+# `fields` on endpoints returning grades: "full" (default), "summary" (all but
+# the filled markdown, which GET /evaluations/{id}/markdown serves on demand)
+# or a comma-separated list of GradeResponse fields
+SUMMARY_OMITS = {"filled_markdown"}
+FIELDS_HELP = "full, summary (no filled_markdown) or comma-separated GradeResponse fields"
+
+
+def omitted_fields(fields: str) -> set:
+    """GradeResponse fields to leave out for a `fields` value."""
+    if fields == "full":
+        return set()
+    if fields == "summary":
+        return set(SUMMARY_OMITS)
+    wanted = {name.strip() for name in fields.split(",") if name.strip()}
+    unknown = wanted - set(GradeResponse.model_fields)
+    if unknown or not wanted:
+        raise HTTPException(status_code=400, detail=f"Unknown fields {sorted(unknown) or fields!r}; use {FIELDS_HELP}")
+    return set(GradeResponse.model_fields) - wanted
+
+
+def without(data: Optional[dict], omit: set) -> Optional[dict]:
+    if not omit or data is None:
+        return data
+    return {key: value for key, value in data.items() if key not in omit}
+
+
+def json_response(model: BaseModel, exclude=None) -> Response:
+    """Serialize straight to JSON (skipping FastAPI's response_model pass)."""
+    return Response(model.model_dump_json(exclude=exclude or None), media_type="application/json")
+
+
+@app.post("/grade", response_model=GradeResponse)
+async def grade(req: GradeRequest, fields: str = Query("full", description=FIELDS_HELP)):
+    if "huggingface.co" not in req.url:
+        raise HTTPException(status_code=400, detail="Only Hugging Face URLs are supported")
+    omit = omitted_fields(fields)
+
+    await recent_requests.record_async(normalize_url(req.url))
+    try:
+        response = await start_evaluation(req.url, app.state.template_md)
+    except Overloaded as e:
+        raise overloaded_error(e)
+    except CircuitOpenError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to evaluate model card: {e}")
+    return json_response(response, exclude=omit)
+
+
+@app.post("/grade/stream")
+async def grade_stream(req: GradeRequest, fields: str = Query("full", description=FIELDS_HELP)):
+    """
+    Stream a grade as NDJSON. Structured fragments (`basic_info`,
+    `standards_summary`, `gaps`, `scoring`) are emitted as soon as their
+    section has been generated, followed by a final `result` line with the
+    full GradeResponse (or an `error` line).
+    """
+    if "huggingface.co" not in req.url:
+        raise HTTPException(status_code=400, detail="Only Hugging Face URLs are supported")
+    omit = omitted_fields(fields)
+    reject_if_queue_full()
+    await recent_requests.record_async(normalize_url(req.url))
+
+    def line(obj: dict) -> str:
+        return json.dumps(obj) + "\n"
+
+    async def stream():
+        try:
+            template_md = app.state.template_md
+            recent = recent_grade(req.url, template_md)
+            if recent is not None:
+                yield line({"type": "result", "data": recent.model_dump(exclude=omit)})
+                return
+            page_text = await fetch_page_text(req.url)
+            cache_key = make_cache_key(page_text, template_md, GRADER_MODELS, PROMPT_VERSION)
+
+            cached = cached_response(cache_key)
+            if cached is None:
+                # Share the grade with other requests, as in evaluate_url
+                async with leases.hold(cache_key) as waited:
+                    cached = cached_response(cache_key) if waited else None
+                    if cached is None:
+                        async for obj in stream_fresh_grade(req.url, template_md, page_text, cache_key):
+                            if obj["type"] == "result":
+                                obj = {**obj, "data": without(obj["data"], omit)}
+                            yield line(obj)
+                        return
+            cache_grade(cache_key, req.url, template_md)
+            metrics.EVALUATIONS.inc(result="cached")
+            yield line({"type": "result", "data": cached.model_dump(exclude=omit)})
+        except Exception as e:
+            yield line({"type": "error", "detail": f"Failed to evaluate model card: {e}"})
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+
+@app.post("/grade/batch")
+async def grade_batch(req: BatchGradeRequest, fields: str = Query("full", description=FIELDS_HELP)):
+    """
+    Grade many cards and stream NDJSON in completion order: one `result` or
+    `error` line per distinct URL (with its index in the request), then a
+    `summary` line. Duplicate URLs are graded once; a failing card doesn't
+    abort the batch.
+    """
+    if not req.urls:
+        raise HTTPException(status_code=400, detail="No URLs given")
+    if len(req.urls) > BATCH_MAX_URLS:
+        raise HTTPException(status_code=400, detail=f"At most {BATCH_MAX_URLS} URLs per batch")
+    omit = omitted_fields(fields)
+    reject_if_queue_full()
+
+    # First index of each distinct card
+    unique: Dict[str, int] = {}
+    for i, url in enumerate(req.urls):
+        unique.setdefault(normalize_url(url), i)
+    concurrency = max(1, min(req.concurrency or BATCH_CONCURRENCY, BATCH_CONCURRENCY))
+    template_md = app.state.template_md
+
+    def line(obj: dict) -> str:
+        return json.dumps(obj) + "\n"
+
+    async def grade_one(index: int, semaphore: asyncio.Semaphore) -> dict:
+        url = req.urls[index]
+        item = {"index": index, "url": url}
+        if "huggingface.co" not in url:
+            return {"type": "error", **item, "status": 400, "detail": "Only Hugging Face URLs are supported"}
+        try:
+            async with semaphore:
+                response = await start_evaluation(url, template_md)
+        except Overloaded as e:
+            return {"type": "error", **item, "status": 429, "detail": str(e), "retry_after": e.retry_after}
+        except CircuitOpenError as e:
+            return {"type": "error", **item, "status": 503, "detail": str(e)}
+        except Exception as e:
+            return {"type": "error", **item, "status": 500, "detail": f"Failed to evaluate model card: {e}"}
+        return {"type": "result", **item, "data": response.model_dump(exclude=omit)}
+
+    async def stream():
+        semaphore = asyncio.Semaphore(concurrency)
+        tasks = [asyncio.ensure_future(grade_one(index, semaphore)) for index in unique.values()]
+        succeeded = failed = 0
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                obj = await next_done
+                if obj["type"] == "result":
+                    succeeded += 1
+                else:
+                    failed += 1
+                yield line(obj)
+        finally:
+            # Client went away: stop grading the rest of the batch
+            for task in tasks:
+                task.cancel()
+        yield line({
+            "type": "summary",
+            "requested": len(req.urls),
+            "graded": len(unique),
+            "duplicates": len(req.urls) - len(unique),
+            "succeeded": succeeded,
+            "failed": failed,
+        })
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+
+@app.post("/jobs", response_model=JobStatus, status_code=202)
+async def create_job(req: GradeRequest):
+    """Start grading in the background and return a job id immediately."""
+    if "huggingface.co" not in req.url:
+        raise HTTPException(status_code=400, detail="Only Hugging Face URLs are supported")
+
+    reject_if_queue_full()
+    await recent_requests.record_async(normalize_url(req.url))
+    template_md = app.state.template_md
+    try:
+        job = jobs.create(req.url, flight_key(req.url, template_md))
+    except JobStoreFull as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    # Other workers answer for the job from its snapshot as soon as the id is out
+    await shared_jobs.flush()
+
+    task = asyncio.create_task(run_job(job, template_md))
+    _job_tasks.add(task)
+    task.add_done_callback(_job_tasks.discard)
+    return job_status(job)
+
+
+@app.get("/jobs/{job_id}", response_model=JobStatus)
+def get_job(job_id: str, fields: str = Query("full", description=FIELDS_HELP)):
+    omit = omitted_fields(fields)
+    exclude = {"result": omit} if omit else None
+    job = jobs.get(job_id)
+    if job is None:
+        # Possibly started on another worker
+        snapshot = shared_jobs.get(job_id)
+        if snapshot is None:
+            raise HTTPException(status_code=404, detail="Job not found or expired")
+        return json_response(JobStatus.model_validate_json(snapshot), exclude=exclude)
+    response = json_response(job_status(job), exclude=exclude)
+    if job.timings:
+        # Report the job's stages rather than this lookup's
+        response.headers["Server-Timing"] = metrics.server_timing(job.timings)
+    return response
+
+
+async def remote_job_events(
+    job_id: str, omit: set, poll_seconds: float = 0.5, keepalive_seconds: float = 15
+):
+    """Event stream of a job running on another worker, polled from its shared snapshot."""
+    seen = 0
+    idle = 0.0
+    while True:
+        snapshot = shared_jobs.get(job_id)
+        if snapshot is None:
+            yield f"event: error\ndata: {json.dumps({'detail': 'Job expired'})}\n\n"
+            return
+        status = JobStatus.model_validate_json(snapshot)
+        for event in status.events[seen:]:
+            if event.stage in ("done", "error"):
+                payload = status.model_dump_json(exclude={"result": omit}) if omit else snapshot
+                yield f"event: {event.stage}\ndata: {payload}\n\n"
+                return
+            # Same shape as the owning worker's events
+            yield f"event: stage\ndata: {json.dumps(event.model_dump(exclude_none=True))}\n\n"
+            idle = 0.0
+        seen = len(status.events)
+        await asyncio.sleep(poll_seconds)
+        idle += poll_seconds
+        if idle >= keepalive_seconds:
+            idle = 0.0
+            yield ": keep-alive\n\n"
+
+
+@app.get("/jobs/{job_id}/events")
+async def job_events(job_id: str, fields: str = Query("full", description=FIELDS_HELP)):
+    """Server-sent events: one `stage` event per transition, then `done` or `error`."""
+    omit = omitted_fields(fields)
+    job = jobs.get(job_id)
+    if job is None:
+        if shared_jobs.get(job_id) is None:
+            raise HTTPException(status_code=404, detail="Job not found or expired")
+        return StreamingResponse(
+            remote_job_events(job_id, omit),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+
+    async def stream():
+        seen = 0
+        while True:
+            while seen < len(job.events):
+                event = job.events[seen]
+                seen += 1
+                if event["stage"] in ("done", "error"):
+                    payload = job_status(job).model_dump_json(exclude={"result": omit} if omit else None)
+                    yield f"event: {event['stage']}\ndata: {payload}\n\n"
+                    return
+                yield f"event: stage\ndata: {json.dumps(event)}\n\n"
+            await job.wait_for_change(seen, timeout=15)
+            if seen == len(job.events):
+                # Keep proxies from closing an idle connection
+                yield ": keep-alive\n\n"
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.get("/evaluations")
+def list_evaluations(
+    org: Optional[str] = None,
+    url: Optional[str] = None,
+    label: Optional[str] = None,
+    model: Optional[str] = None,
+    min_total: Optional[float] = None,
+    max_total: Optional[float] = None,
+    category: Optional[str] = None,
+    min_category_score: Optional[float] = None,
+    max_category_score: Optional[float] = None,
+    latest: bool = True,
+    sort: str = "created_at",
+    order: str = Query("desc", pattern="^(asc|desc)$"),
+    limit: int = Query(50, ge=1, le=200),
+    offset: int = Query(0, ge=0),
+):
+    """
+    Stored evaluations, filtered and sorted. `sort` is created_at, score,
+    raw_total, org, url or a category name (sorting by its score). With
+    `latest` (default) only the newest grade of each card is considered.
+    """
+    try:
+        total, items = store.query(
+            org=org,
+            url=normalize_url(url) if url else None,
+            label=label,
+            model=model,
+            min_total=min_total,
+            max_total=max_total,
+            category=category,
+            min_category_score=min_category_score,
+            max_category_score=max_category_score,
+            latest_only=latest,
+            sort=sort,
+            order=order,
+            limit=limit,
+            offset=offset,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"total": total, "limit": limit, "offset": offset, "items": items}
+
+
+@app.get("/evaluations/aggregates")
+def evaluation_aggregates(group_by: str = "org", min_count: int = Query(1, ge=1), latest: bool = True):
+    """Leaderboard: average total and per-category scores per org (or model, label, card_type)."""
+    try:
+        groups = store.aggregates(group_by=group_by, min_count=min_count, latest_only=latest)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"group_by": group_by, "groups": groups}
+
+
+# Stored evaluations never change
+IMMUTABLE = {"Cache-Control": "public, max-age=31536000, immutable"}
+
+
+@app.get("/evaluations/{evaluation_id}")
+def get_evaluation(evaluation_id: int, fields: str = Query("full", description=FIELDS_HELP)):
+    omit = omitted_fields(fields)
+    item = store.get(evaluation_id)
+    if item is None:
+        raise HTTPException(status_code=404, detail="Evaluation not found")
+    item["result"] = without(item["result"], omit)
+    return JSONResponse(item, headers=IMMUTABLE)
+
+
+@app.get("/evaluations/{evaluation_id}/markdown", response_class=PlainTextResponse)
+def get_evaluation_markdown(evaluation_id: int):
+    """The filled review template of a stored grade (what `fields=summary` leaves out)."""
+    markdown = store.markdown(evaluation_id)
+    if markdown is None:
+        raise HTTPException(status_code=404, detail="Evaluation not found")
+    return PlainTextResponse(markdown, media_type="text/markdown; charset=utf-8", headers=IMMUTABLE)
+
+
+@app.delete("/admin/cache", dependencies=[Depends(require_admin)])
+def invalidate_cache(url: Optional[str] = None, key: Optional[str] = None):
+    """Drop cached evaluations for a URL or key; with neither, clear the whole cache."""
+    removed = cache.invalidate(key=key, url=normalize_url(url) if url else None)
+    if key is None:
+        # Otherwise the next grade would be merged into the invalidated one
+        snapshots.invalidate(normalize_url(url) if url else None)
+        similar_cards.remove(normalize_url(url) if url else None)
+    return {"invalidated": removed}
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def prometheus_metrics():
+    """Prometheus text exposition of stage, LLM, token and request metrics."""
+    return PlainTextResponse(metrics.REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+
+def cascade_stats() -> Optional[dict]:
+    if not FAST_MODEL_NAME:
+        return None
+    decisions = sum(cascade_outcomes.values())
+    escalated = sum(n for (tier, _), n in cascade_outcomes.items() if tier == cascade.FULL)
+    return {
+        "fast_model": FAST_MODEL_NAME,
+        "model": MODEL_NAME,
+        "outcomes": {f"{tier}:{reason}": n for (tier, reason), n in cascade_outcomes.items()},
+        "escalation_rate": round(escalated / decisions, 3) if decisions else None,
+    }
+
+
+@app.get("/admin/stats", dependencies=[Depends(require_admin)])
+def stats():
+    return {
+        "cache_entries": len(cache),
+        "stored_evaluations": len(store),
+        "similar_cards": len(similar_cards),
+        "in_flight": inflight.in_flight(),
+        "coalesced_requests": inflight.coalesced,
+        "jobs": len(jobs),
+        "worker": WORKER_ID,
+        "llm_slots": {
+            "limit": LLM_CONCURRENCY,
+            "in_use": llm_slots.in_use(),
+            "waiting": llm_slots.waiting,
+            "rejected": llm_slots.rejected,
+        },
+        "leases": len(leases),
+        "pregrade": pregrader.stats() if pregrader else None,
+        "cascade": cascade_stats(),
+        "usage": usage_totals,
+        "llm": resilient(app.state.llm_client).stats() if app.state.llm_client else None,
+    }
+
+
 if __name__ == "__main__":
     import uvicorn
 
-    port = int(os.environ.get("CARD_GRADER_PORT", "8000"))
-    uvicorn.run("server:app", host="0.0.0.0", port=port, reload=True)
+    parser = argparse.ArgumentParser(description="Serve the card grading API.")
+    parser.add_argument("--host", default=os.environ.get("CARD_GRADER_HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.environ.get("CARD_GRADER_PORT", "8000")))
+    parser.add_argument("--workers", type=int,
+                        default=int(os.environ.get("CARD_GRADER_WORKERS", str(min(4, os.cpu_count() or 1)))),
+                        help="worker processes (state is shared through CARD_GRADER_STATE_PATH)")
+    parser.add_argument("--reload", action="store_true", help="development mode: one process, reload on changes")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s:  %(message)s")
+
+    if args.reload:
+        uvicorn.run("server:app", host=args.host, port=args.port, reload=True)
+    else:
+        uvicorn.run("server:app", host=args.host, port=args.port, workers=args.workers)
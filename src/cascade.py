@@ -0,0 +1,59 @@
+"""
+Cost-aware model cascade: a fast model grades first, the large model only
+when needed.
+
+`route` decides from the card text alone whether the fast tier may try it:
+long cards and cards with many sections go straight to the large model.
+`check_grade` then validates the fast tier's answer locally, with the same
+parsed fields the response is built from. Every category must be scored
+0-3, the total must equal their sum and the standards table must have a
+status for each item. Any failed check escalates the card.
+"""
+
+from typing import List, Optional
+
+try:
+    from src.context_reducer import estimate_tokens, split_sections
+    from src.incremental import CATEGORY_STANDARDS
+except ImportError:  # imported from within src/
+    from context_reducer import estimate_tokens, split_sections
+    from incremental import CATEGORY_STANDARDS
+
+FAST = "fast"
+FULL = "full"
+
+# Escalation reasons checked before the fast tier runs, then after it answered
+ROUTE_REASONS = ("long", "complex")
+CHECK_REASONS = ("categories", "total", "standards")
+
+
+def route(page_text: str, max_tokens: int, max_sections: int) -> Optional[str]:
+    """Why the card should skip the fast tier ("long" / "complex"), or None if it may try."""
+    if estimate_tokens(page_text) > max_tokens:
+        return "long"
+    if len(split_sections(page_text)) > max_sections:
+        return "complex"
+    return None
+
+
+def check_grade(category_scores, raw_total: Optional[float], standards_summary) -> List[str]:
+    """
+    Local checks of a parsed grade (CategoryScore list, Total(/30), StandardsSummary).
+    Returns the names of the failed checks, in CHECK_REASONS order.
+    """
+    failed = []
+    scores = {c.name: c.score for c in category_scores or []}
+    if set(scores) != set(CATEGORY_STANDARDS) or any(
+        score is None or score != int(score) or not 0 <= score <= 3 for score in scores.values()
+    ):
+        failed.append("categories")
+    if raw_total is None or not scores or raw_total != sum(s or 0 for s in scores.values()):
+        failed.append("total")
+    # total_items also counts the table's separator row, so count statuses instead
+    statuses = (
+        standards_summary.present + standards_summary.partial + standards_summary.missing
+        if standards_summary is not None else 0
+    )
+    if statuses != len(CATEGORY_STANDARDS):
+        failed.append("standards")
+    return failed
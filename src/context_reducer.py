@@ -0,0 +1,206 @@
+"""
+Token-budgeted context reduction between fetching a card and building the prompt.
+
+Page text is split into sections, repeated boilerplate and navigation noise are
+dropped, and sections are ranked by how much they say about the ten template
+scoring categories. The best sections are packed into a token budget and
+emitted in their original order, so the prompt keeps the card's structure while
+paying only for the parts the reviewer needs.
+"""
+
+import re
+from collections import Counter
+from dataclasses import dataclass
+from typing import List, Tuple
+
+# Keywords per template scoring category (lowercase substrings)
+CATEGORY_KEYWORDS = {
+    "Identity": ["model name", "version", "parameters", "architecture", "model type", "developed by",
+                 "release", "variant", "checkpoint", "model details"],
+    "Intended Use": ["intended use", "use case", "out-of-scope", "out of scope", "downstream",
+                     "direct use", "misuse", "limitations", "should not", "uses"],
+    "Data": ["training data", "dataset", "corpus", "data collection", "preprocessing", "tokens",
+             "filtering", "deduplicat", "pretraining", "fine-tuning data"],
+    "Evaluations": ["evaluation", "benchmark", "accuracy", "score", "metric", "results",
+                    "mmlu", "gsm8k", "humaneval", "f1", "perplexity"],
+    "Risks": ["risk", "bias", "ethic", "safety", "harm", "toxicity", "fairness",
+              "limitation", "responsible", "red team"],
+    "Governance": ["contact", "maintain", "maintenance", "owner", "organization", "funded",
+                   "support", "update", "feedback", "issues"],
+    "Licensing": ["license", "licence", "terms of use", "acceptable use", "apache", "mit",
+                  "cc-by", "commercial", "gated", "access"],
+    "Reproducibility": ["hyperparameter", "learning rate", "batch size", "epochs", "seed",
+                        "training procedure", "hardware", "gpu", "compute", "config", "code"],
+    "Clarity": ["overview", "summary", "description", "how to use", "quickstart", "example",
+                "getting started", "usage"],
+    "Traceability": ["citation", "bibtex", "paper", "arxiv", "github", "base_model", "finetuned from",
+                     "repository", "references", "doi"],
+}
+
+# Whole lines that are site chrome rather than card content
+NAV_NOISE = {
+    "models", "datasets", "spaces", "posts", "docs", "enterprise", "pricing", "log in", "sign up",
+    "model card", "files and versions", "community", "settings", "like", "follow", "copied",
+    "use this model", "edit model card", "deploy", "train", "downloads last month", "inference providers",
+    "hugging face", "tos", "privacy", "about", "jobs", "website", "text generation", "safetensors",
+    "transformers", "new discussion", "new pull request", "expand inference providers",
+}
+
+HEADING_RE = re.compile(r"^#{1,6}\s+\S")
+TABLE_SEPARATOR_RE = re.compile(r"^\|[\s:|-]+\|$")
+FRONT_MATTER_RE = re.compile(r"\A---\n.*?\n---\n", re.DOTALL)
+
+# Sections in text without headings (scraped HTML) are cut into chunks of this many lines
+FALLBACK_CHUNK_LINES = 40
+
+
+@dataclass
+class Section:
+    index: int
+    heading: str
+    text: str
+    score: float = 0.0
+    pinned: bool = False
+
+
+@dataclass
+class ReductionStats:
+    chars_before: int
+    chars_after: int
+    tokens_before: int
+    tokens_after: int
+    sections_total: int
+    sections_kept: int
+    lines_dropped: int
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (~4 chars per token)."""
+    return max(1, len(text) // 4) if text else 0
+
+
+def drop_boilerplate(text: str) -> Tuple[str, int]:
+    """
+    Remove navigation noise and repeated lines (keeping the first copy), and
+    collapse runs of blank lines. Table separators, code fences and rules are
+    structural and never deduplicated.
+    """
+    lines = text.splitlines()
+    counts = Counter(line.strip() for line in lines)
+    seen = set()
+    kept: List[str] = []
+    dropped = 0
+    for line in lines:
+        stripped = line.strip()
+        key = stripped.lower()
+        if key in NAV_NOISE:
+            dropped += 1
+            continue
+        if not stripped:
+            if kept and not kept[-1].strip():
+                continue
+        elif (
+            counts[stripped] > 1
+            and not stripped.startswith("```")
+            and stripped != "---"
+            and not TABLE_SEPARATOR_RE.match(stripped)
+        ):
+            if stripped in seen:
+                dropped += 1
+                continue
+            seen.add(stripped)
+        kept.append(line)
+    return "\n".join(kept), dropped
+
+
+def split_sections(text: str) -> List[Section]:
+    """Split on markdown headings; fall back to fixed-size line chunks."""
+    sections: List[Section] = []
+
+    m = FRONT_MATTER_RE.match(text)
+    if m:
+        # YAML front matter carries license, datasets, base model: always keep it
+        sections.append(Section(index=0, heading="front matter", text=m.group(0).rstrip("\n"), pinned=True))
+        text = text[m.end():]
+
+    lines = text.splitlines()
+    has_headings = any(HEADING_RE.match(line) for line in lines)
+
+    current: List[str] = []
+    heading = ""
+
+    def flush():
+        if any(ch.isalnum() for line in current for ch in line):
+            sections.append(Section(index=len(sections), heading=heading, text="\n".join(current)))
+
+    for line in lines:
+        starts_new = HEADING_RE.match(line) if has_headings else len(current) >= FALLBACK_CHUNK_LINES
+        if starts_new and current:
+            flush()
+            current = []
+        if has_headings and HEADING_RE.match(line):
+            heading = line.lstrip("#").strip()
+        current.append(line)
+    flush()
+
+    # The title / intro block identifies the card
+    for section in sections:
+        if not section.pinned:
+            section.pinned = True
+            break
+    return sections
+
+
+def score_section(section: Section) -> float:
+    """Relevance to the template categories: breadth of categories hit, then density."""
+    lowered = section.text.lower()
+    heading = section.heading.lower()
+    score = 0.0
+    for keywords in CATEGORY_KEYWORDS.values():
+        hits = sum(lowered.count(k) for k in keywords)
+        if hits:
+            score += 1.0 + min(hits, 10) * 0.2
+        if any(k in heading for k in keywords):
+            score += 2.0
+    # Prefer dense sections over long ones with a few incidental matches
+    return score / (1.0 + estimate_tokens(section.text) / 2000.0)
+
+
+def reduce_context(text: str, budget_tokens: int) -> Tuple[str, ReductionStats]:
+    """Return page text packed into `budget_tokens`, plus before/after statistics."""
+    cleaned, dropped = drop_boilerplate(text)
+    sections = split_sections(cleaned)
+    for section in sections:
+        section.score = score_section(section)
+
+    ranked = sorted(sections, key=lambda s: (not s.pinned, -s.score, s.index))
+    remaining = budget_tokens
+    chosen = {}
+    for section in ranked:
+        cost = estimate_tokens(section.text) + 1
+        if cost <= remaining:
+            chosen[section.index] = section.text
+            remaining -= cost
+        elif remaining > 200 and (section.pinned or section.score > 0):
+            # Take the head of a section that doesn't fit whole, cut at a line boundary
+            head = section.text[: remaining * 4]
+            head = head[: head.rfind("\n")] if "\n" in head else head
+            if head.strip():
+                chosen[section.index] = head + "\n...[section truncated]..."
+                remaining -= estimate_tokens(chosen[section.index]) + 1
+
+    reduced = "\n".join(chosen[i] for i in sorted(chosen))
+    omitted = len(sections) - len(chosen)
+    if omitted:
+        reduced += f"\n...[{omitted} less relevant section(s) omitted]..."
+
+    stats = ReductionStats(
+        chars_before=len(text),
+        chars_after=len(reduced),
+        tokens_before=estimate_tokens(text),
+        tokens_after=estimate_tokens(reduced),
+        sections_total=len(sections),
+        sections_kept=len(chosen),
+        lines_dropped=dropped,
+    )
+    return reduced, stats
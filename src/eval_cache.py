@@ -0,0 +1,169 @@
+"""
+Persistent, content-addressed cache for graded evaluations.
+
+Entries are keyed on a hash of everything that determines the LLM output
+(normalized page text, template, model name, system prompt version) and are
+stored in SQLite so they survive server restarts. Expired entries are dropped
+lazily on read, and the least recently used entries are evicted once the cache
+grows past `max_entries`.
+
+Each URL also remembers which entry matched its content when it was last
+fetched (per model / prompt / template fingerprint), so a recent grade can
+be served by URL without fetching the page again (`latest`).
+"""
+
+import hashlib
+import json
+import pathlib
+import sqlite3
+import threading
+import time
+from typing import Optional, Tuple
+
+
+def normalize_page_text(text: str) -> str:
+    """Collapse whitespace so cosmetic re-renders of a page hash the same."""
+    lines = (" ".join(line.split()) for line in text.splitlines())
+    return "\n".join(line for line in lines if line)
+
+
+def make_cache_key(page_text: str, template_md: str, model: str, prompt_version: str) -> str:
+    h = hashlib.sha256()
+    for part in (normalize_page_text(page_text), template_md, model, prompt_version):
+        h.update(part.encode("utf-8"))
+        h.update(b"\x00")
+    return h.hexdigest()
+
+
+class EvaluationCache:
+    def __init__(self, path: str, ttl_seconds: float = 7 * 24 * 3600, max_entries: int = 5000):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+
+        if path != ":memory:":
+            pathlib.Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS grade_cache (
+                key TEXT PRIMARY KEY,
+                url TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_grade_cache_url ON grade_cache(url)")
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_grade_cache_last_access ON grade_cache(last_access)"
+        )
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS url_current (
+                url TEXT NOT NULL,
+                fingerprint TEXT NOT NULL,
+                key TEXT NOT NULL,
+                checked_at REAL NOT NULL,
+                PRIMARY KEY (url, fingerprint)
+            )
+            """
+        )
+
+    def get(self, key: str) -> Optional[dict]:
+        """Return the cached payload for `key`, or None on a miss / expired entry."""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT payload, created_at FROM grade_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            payload, created_at = row
+            if now - created_at > self.ttl_seconds:
+                self._conn.execute("DELETE FROM grade_cache WHERE key = ?", (key,))
+                return None
+            self._conn.execute(
+                "UPDATE grade_cache SET last_access = ? WHERE key = ?", (now, key)
+            )
+        return json.loads(payload)
+
+    def put(self, key: str, url: str, payload: dict) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                """
+                INSERT OR REPLACE INTO grade_cache (key, url, payload, created_at, last_access)
+                VALUES (?, ?, ?, ?, ?)
+                """,
+                (key, url, json.dumps(payload), now, now),
+            )
+            self._evict_locked()
+
+    def mark_current(self, url: str, fingerprint: str, key: str) -> None:
+        """Record that `url`'s content, fetched just now, grades to entry `key`."""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO url_current (url, fingerprint, key, checked_at) VALUES (?, ?, ?, ?)",
+                (url, fingerprint, key, time.time()),
+            )
+
+    def latest(self, url: str, fingerprint: str) -> Optional[Tuple[dict, float]]:
+        """
+        The entry `url` was last known to grade to, with the seconds since its
+        content was last checked; None if there is none or it has expired.
+        """
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                """
+                SELECT c.key, c.payload, u.checked_at FROM url_current u
+                JOIN grade_cache c ON c.key = u.key
+                WHERE u.url = ? AND u.fingerprint = ? AND c.created_at >= ?
+                """,
+                (url, fingerprint, now - self.ttl_seconds),
+            ).fetchone()
+            if row is None:
+                return None
+            key, payload, checked_at = row
+            self._conn.execute("UPDATE grade_cache SET last_access = ? WHERE key = ?", (now, key))
+        return json.loads(payload), now - checked_at
+
+    def invalidate(self, key: Optional[str] = None, url: Optional[str] = None) -> int:
+        """Drop entries by key and/or URL. With neither given, clear everything."""
+        with self._lock:
+            if key is None and url is None:
+                self._conn.execute("DELETE FROM url_current")
+                cur = self._conn.execute("DELETE FROM grade_cache")
+            elif key is not None and url is not None:
+                cur = self._conn.execute(
+                    "DELETE FROM grade_cache WHERE key = ? AND url = ?", (key, url)
+                )
+            elif key is not None:
+                cur = self._conn.execute("DELETE FROM grade_cache WHERE key = ?", (key,))
+            else:
+                self._conn.execute("DELETE FROM url_current WHERE url = ?", (url,))
+                cur = self._conn.execute("DELETE FROM grade_cache WHERE url = ?", (url,))
+            return cur.rowcount
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM grade_cache").fetchone()[0]
+
+    def _evict_locked(self) -> None:
+        cutoff = time.time() - self.ttl_seconds
+        self._conn.execute("DELETE FROM grade_cache WHERE created_at < ?", (cutoff,))
+        count = self._conn.execute("SELECT COUNT(*) FROM grade_cache").fetchone()[0]
+        overflow = count - self.max_entries
+        if overflow > 0:
+            self._conn.execute(
+                """
+                DELETE FROM grade_cache WHERE key IN (
+                    SELECT key FROM grade_cache ORDER BY last_access ASC LIMIT ?
+                )
+                """,
+                (overflow,),
+            )
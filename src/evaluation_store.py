@@ -0,0 +1,425 @@
+"""
+Indexed store of finished evaluations.
+
+Every grade is kept as one row with its per-category scores and standards
+statuses as columns (plus the full response JSON), so listing, filtering and
+per-org aggregates run as indexed SQL queries instead of re-parsing markdown.
+"""
+
+import json
+import pathlib
+import re
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+try:
+    from src.incremental import CATEGORY_STANDARDS
+except ImportError:  # imported from within src/
+    from incremental import CATEGORY_STANDARDS
+
+# Template scoring category -> column suffix
+CATEGORY_COLUMNS = {category: re.sub(r"\W+", "_", category.lower()) for category in CATEGORY_STANDARDS}
+
+STATUS_BY_MARK = {"✓": "present", "~": "partial", "✗": "missing"}
+
+# GradeResponse fields describing one delivery rather than the grade; not stored
+RESPONSE_ONLY_FIELDS = {"cached", "stale", "evaluation_id"}
+
+# Newest grade of each card (rows without a URL stand alone), kept as a flag by add()
+LATEST_ONLY = "is_latest = 1"
+
+# Columns that GET /evaluations may sort on, besides the per-category scores
+SORT_COLUMNS = {"created_at", "score", "raw_total", "org", "url"}
+
+URL_RE = re.compile(r"https?://[^\s)\]>]+")
+TITLE_LINE_RE = re.compile(r"\*\*Card Title / URL:\*\*\s*(.+)")
+LINK_RE = re.compile(r"\[([^\]]+)\]\((https?://[^)\s]+)\)")
+
+
+def card_org(url: Optional[str]) -> Optional[str]:
+    """Owning org of a card URL: the namespace on huggingface.co, else the host."""
+    if not url:
+        return None
+    parts = urlsplit(url)
+    segments = [s for s in parts.path.split("/") if s]
+    if parts.netloc.lower().endswith("huggingface.co"):
+        if segments and segments[0] in ("datasets", "spaces"):
+            segments = segments[1:]
+        return segments[0].lower() if segments else None
+    return parts.netloc.lower() or None
+
+
+def card_title_url(filled_md: str) -> Tuple[Optional[str], Optional[str]]:
+    """Title and URL from the 'Card Title / URL' line ('[Title](url)' or 'Title — url')."""
+    m = TITLE_LINE_RE.search(filled_md or "")
+    if not m:
+        return None, None
+    value = m.group(1).strip()
+    link = LINK_RE.search(value)
+    if link:
+        return link.group(1).strip(), link.group(2)
+    url = URL_RE.search(value)
+    if not url:
+        return value or None, None
+    title = value[: url.start()].strip(" —-:|")
+    return title or None, url.group(0).rstrip(".,;")
+
+
+def to_store_payload(response) -> dict:
+    """The GradeResponse as stored: its dump without RESPONSE_ONLY_FIELDS."""
+    return response.model_dump(exclude=RESPONSE_ONLY_FIELDS)
+
+
+def standards_statuses(filled_md: str) -> Dict[str, str]:
+    """Status per template standards item, keyed by scoring category."""
+    by_key = {item.split()[0].lower(): category for category, item in CATEGORY_STANDARDS.items()}
+    statuses: Dict[str, str] = {}
+    in_standards = False
+    for line in (filled_md or "").splitlines():
+        stripped = line.strip()
+        if stripped.startswith("## "):
+            in_standards = stripped.startswith("## 2")
+            continue
+        if not in_standards or not stripped.startswith("|"):
+            continue
+        cells = [c.strip() for c in stripped.strip("|").split("|")]
+        if len(cells) < 2:
+            continue
+        words = cells[0].replace("*", "").lower().split()
+        category = by_key.get(words[0]) if words else None
+        status = cell_status(cells[1])
+        if category and status and category not in statuses:
+            statuses[category] = status
+    return statuses
+
+
+def cell_status(cell: str) -> Optional[str]:
+    """Status of a standards table cell, matched as parse_standards_table does (a bare 'x' is missing)."""
+    cell = cell.strip()
+    for mark, status in STATUS_BY_MARK.items():
+        if mark in cell:
+            return status
+    return "missing" if cell.lower() == "x" else None
+
+
+class EvaluationStore:
+    """Finished grades in SQLite, one row per evaluation."""
+
+    def __init__(self, path: str):
+        self._lock = threading.Lock()
+        if path != ":memory:":
+            pathlib.Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        score_columns = ",\n".join(f"score_{c} REAL" for c in CATEGORY_COLUMNS.values())
+        status_columns = ",\n".join(f"std_{c} TEXT" for c in CATEGORY_COLUMNS.values())
+        self._conn.execute(
+            f"""
+            CREATE TABLE IF NOT EXISTS evaluations (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                url TEXT,
+                org TEXT,
+                title TEXT,
+                card_type TEXT,
+                model TEXT,
+                prompt_version TEXT,
+                template_sha TEXT,
+                source TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                score REAL,
+                raw_total REAL,
+                label TEXT,
+                standards_present INTEGER,
+                standards_partial INTEGER,
+                standards_missing INTEGER,
+                {score_columns},
+                {status_columns},
+                payload TEXT NOT NULL,
+                is_latest INTEGER NOT NULL DEFAULT 1
+            )
+            """
+        )
+        # Stores created before the flag: add it and mark the newest row of each card
+        # (checked inside the write lock, as another worker may be migrating too)
+        if not self._has_latest_flag():
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                if not self._has_latest_flag():
+                    self._conn.execute("ALTER TABLE evaluations ADD COLUMN is_latest INTEGER NOT NULL DEFAULT 0")
+                    # Newest created_at wins, ties going to the later row
+                    self._conn.execute(
+                        """
+                        UPDATE evaluations SET is_latest = 1 WHERE url IS NULL OR NOT EXISTS (
+                            SELECT 1 FROM evaluations AS newer WHERE newer.url = evaluations.url
+                            AND (newer.created_at > evaluations.created_at
+                                 OR (newer.created_at = evaluations.created_at AND newer.id > evaluations.id))
+                        )
+                        """
+                    )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        indexes = {
+            "idx_evaluations_url": "url, created_at",
+            "idx_evaluations_org": "org, created_at",
+            "idx_evaluations_created": "created_at",
+            "idx_evaluations_total": "raw_total",
+            "idx_evaluations_label": "label",
+            "idx_evaluations_source": "source",
+        }
+        for column in CATEGORY_COLUMNS.values():
+            indexes[f"idx_evaluations_{column}"] = f"org, score_{column}"
+        for name, columns in indexes.items():
+            self._conn.execute(f"CREATE INDEX IF NOT EXISTS {name} ON evaluations({columns})")
+        # Partial indexes for the default latest-only listings and aggregates
+        for name, columns in {
+            "idx_evaluations_latest_created": "created_at",
+            "idx_evaluations_latest_org": "org, created_at",
+        }.items():
+            self._conn.execute(f"CREATE INDEX IF NOT EXISTS {name} ON evaluations({columns}) WHERE {LATEST_ONLY}")
+
+    # ----------------------------------------------------------------
+    # Writes
+    # ----------------------------------------------------------------
+    def add(
+        self,
+        response: dict,
+        model: Optional[str],
+        prompt_version: Optional[str],
+        template_sha: Optional[str],
+        source: str = "grade",
+        url: Optional[str] = None,
+        created_at: Optional[float] = None,
+    ) -> int:
+        """Store one GradeResponse (as a dict) and return its evaluation id."""
+        basic_info = response.get("basic_info") or {}
+        title, card_link = card_title_url(response.get("filled_markdown") or "")
+        url = url or basic_info.get("url") or card_link
+        scores = {
+            (c.get("name") or "").replace("*", "").strip().lower(): c.get("score")
+            for c in response.get("category_scores") or []
+        }
+        statuses = standards_statuses(response.get("filled_markdown") or "")
+        standards = response.get("standards_summary") or {}
+
+        row = {
+            "url": url,
+            "org": card_org(url),
+            "title": title or basic_info.get("title"),
+            "card_type": basic_info.get("type"),
+            "model": model,
+            "prompt_version": prompt_version,
+            "template_sha": template_sha,
+            "source": source,
+            "created_at": created_at or time.time(),
+            "score": response.get("score"),
+            "raw_total": response.get("raw_total"),
+            "label": response.get("label"),
+            "standards_present": standards.get("present"),
+            "standards_partial": standards.get("partial"),
+            "standards_missing": standards.get("missing"),
+            "payload": json.dumps(response),
+            "is_latest": 1,
+        }
+        for category, column in CATEGORY_COLUMNS.items():
+            row[f"score_{column}"] = scores.get(category.lower())
+            row[f"std_{column}"] = statuses.get(category)
+
+        columns = ", ".join(row)
+        placeholders = ", ".join("?" for _ in row)
+        with self._lock:
+            # The new row replaces the card's latest grade unless that one is
+            # newer (a backfilled import of an old evaluation stays behind it)
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                if url:
+                    demoted = self._conn.execute(
+                        "UPDATE evaluations SET is_latest = 0 WHERE url = ? AND is_latest = 1 AND created_at <= ?",
+                        (url, row["created_at"]),
+                    ).rowcount
+                    if not demoted:
+                        row["is_latest"] = int(self._conn.execute(
+                            "SELECT 1 FROM evaluations WHERE url = ? AND is_latest = 1 LIMIT 1", (url,)
+                        ).fetchone() is None)
+                cur = self._conn.execute(
+                    f"INSERT INTO evaluations ({columns}) VALUES ({placeholders})", tuple(row.values())
+                )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            return cur.lastrowid
+
+    def has_source(self, source: str) -> bool:
+        with self._lock:
+            return self._conn.execute(
+                "SELECT 1 FROM evaluations WHERE source = ? LIMIT 1", (source,)
+            ).fetchone() is not None
+
+    # ----------------------------------------------------------------
+    # Queries
+    # ----------------------------------------------------------------
+    def get(self, evaluation_id: int) -> Optional[dict]:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM evaluations WHERE id = ?", (evaluation_id,)).fetchone()
+        if row is None:
+            return None
+        item = self._summary(row)
+        item["result"] = json.loads(row["payload"])
+        return item
+
+    def markdown(self, evaluation_id: int) -> Optional[str]:
+        """The filled template of an evaluation ("" if it has none), None if there is no such row."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT json_extract(payload, '$.filled_markdown') FROM evaluations WHERE id = ?", (evaluation_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        return row[0] or ""
+
+    def query(
+        self,
+        org: Optional[str] = None,
+        url: Optional[str] = None,
+        label: Optional[str] = None,
+        model: Optional[str] = None,
+        min_total: Optional[float] = None,
+        max_total: Optional[float] = None,
+        category: Optional[str] = None,
+        min_category_score: Optional[float] = None,
+        max_category_score: Optional[float] = None,
+        latest_only: bool = True,
+        sort: str = "created_at",
+        order: str = "desc",
+        limit: int = 50,
+        offset: int = 0,
+    ) -> Tuple[int, List[dict]]:
+        """Filtered, sorted page of evaluations; returns (total matches, items)."""
+        where, params = self._filters(org, url, label, model, min_total, max_total,
+                                      category, min_category_score, max_category_score, latest_only)
+        sort_column = self._sort_column(sort)
+        direction = "ASC" if order.lower() == "asc" else "DESC"
+        clause = f" WHERE {' AND '.join(where)}" if where else ""
+        with self._lock:
+            total = self._conn.execute(f"SELECT COUNT(*) FROM evaluations{clause}", params).fetchone()[0]
+            # created_at is never NULL; leaving out its NULLs-last term lets the index serve the order
+            nulls_last = "" if sort_column == "created_at" else f"{sort_column} IS NULL, "
+            rows = self._conn.execute(
+                f"SELECT * FROM evaluations{clause} "
+                f"ORDER BY {nulls_last}{sort_column} {direction}, id {direction} LIMIT ? OFFSET ?",
+                params + [limit, offset],
+            ).fetchall()
+        return total, [self._summary(row) for row in rows]
+
+    def aggregates(self, group_by: str = "org", min_count: int = 1, latest_only: bool = True) -> List[dict]:
+        """Average total and per-category scores per group, best average first."""
+        if group_by not in ("org", "model", "label", "card_type"):
+            raise ValueError(f"Cannot group by {group_by!r}")
+        averages = ", ".join(f"AVG(score_{c}) AS avg_{c}" for c in CATEGORY_COLUMNS.values())
+        where = f" WHERE {LATEST_ONLY}" if latest_only else ""
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {group_by} AS grp, COUNT(*) AS n, AVG(raw_total) AS avg_total, "
+                f"AVG(score) AS avg_score, {averages} FROM evaluations{where} "
+                f"GROUP BY {group_by} HAVING COUNT(*) >= ? ORDER BY avg_total IS NULL, avg_total DESC",
+                (min_count,),
+            ).fetchall()
+        return [
+            {
+                group_by: row["grp"],
+                "count": row["n"],
+                "avg_raw_total": _round(row["avg_total"]),
+                "avg_score": _round(row["avg_score"]),
+                "category_averages": {
+                    category: _round(row[f"avg_{column}"]) for category, column in CATEGORY_COLUMNS.items()
+                },
+            }
+            for row in rows
+        ]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM evaluations").fetchone()[0]
+
+    # ----------------------------------------------------------------
+    # Helpers
+    # ----------------------------------------------------------------
+    def _has_latest_flag(self) -> bool:
+        return any(row["name"] == "is_latest" for row in self._conn.execute("PRAGMA table_info(evaluations)"))
+
+    @staticmethod
+    def _sort_column(sort: str) -> str:
+        if sort in SORT_COLUMNS:
+            return sort
+        column = CATEGORY_COLUMNS.get(_category_name(sort))
+        if column:
+            return f"score_{column}"
+        raise ValueError(f"Cannot sort by {sort!r}")
+
+    @staticmethod
+    def _filters(org, url, label, model, min_total, max_total,
+                 category, min_category_score, max_category_score, latest_only) -> Tuple[List[str], list]:
+        where: List[str] = []
+        params: list = []
+        for column, value in (("org", org.lower() if org else None), ("url", url), ("label", label), ("model", model)):
+            if value is not None:
+                where.append(f"{column} = ?")
+                params.append(value)
+        if min_total is not None:
+            where.append("raw_total >= ?")
+            params.append(min_total)
+        if max_total is not None:
+            where.append("raw_total <= ?")
+            params.append(max_total)
+        if min_category_score is not None or max_category_score is not None:
+            column = CATEGORY_COLUMNS.get(_category_name(category or ""))
+            if column is None:
+                raise ValueError("A known category is required for category score filters")
+            if min_category_score is not None:
+                where.append(f"score_{column} >= ?")
+                params.append(min_category_score)
+            if max_category_score is not None:
+                where.append(f"score_{column} <= ?")
+                params.append(max_category_score)
+        if latest_only:
+            where.append(LATEST_ONLY)
+        return where, params
+
+    @staticmethod
+    def _summary(row: sqlite3.Row) -> dict:
+        return {
+            "id": row["id"],
+            "url": row["url"],
+            "org": row["org"],
+            "title": row["title"],
+            "card_type": row["card_type"],
+            "model": row["model"],
+            "prompt_version": row["prompt_version"],
+            "template_sha": row["template_sha"],
+            "source": row["source"],
+            "created_at": row["created_at"],
+            "score": row["score"],
+            "raw_total": row["raw_total"],
+            "label": row["label"],
+            "category_scores": {c: row[f"score_{col}"] for c, col in CATEGORY_COLUMNS.items()},
+            "standards": {c: row[f"std_{col}"] for c, col in CATEGORY_COLUMNS.items()},
+        }
+
+
+def _category_name(name: str) -> str:
+    """Match a category case-insensitively ('intended_use' -> 'Intended Use')."""
+    wanted = re.sub(r"[\W_]+", " ", name).strip().lower()
+    for category in CATEGORY_COLUMNS:
+        if category.lower() == wanted:
+            return category
+    return name
+
+
+def _round(value: Optional[float]) -> Optional[float]:
+    return round(value, 2) if value is not None else None
@@ -0,0 +1,148 @@
+"""
+Fan-out evaluation: fill the review template as independent sub-tasks.
+
+The template is split at its `---` rules into parts (basic info + snapshot,
+standards comparison, gaps, scoring, resources, recommendations + overall
+comments). Each part is filled by its own LLM call over the same page context,
+with a per-request bound on how many calls run at once, and the filled parts are
+joined back in template order so the result parses exactly like a single-call
+evaluation. The scoring total is then checked against the category scores.
+"""
+
+import asyncio
+import logging
+import re
+from dataclasses import dataclass
+from typing import Awaitable, Callable, List, Optional
+
+try:
+    from src.incremental import reconcile_total
+except ImportError:  # imported from within src/
+    from incremental import reconcile_total
+
+logger = logging.getLogger("card_grader")
+
+# Sub-task per template section; sections sharing a name are filled together
+SECTION_TASKS = {
+    "basic info": "basic_info",
+    "1": "basic_info",
+    "2": "standards",
+    "3": "gaps",
+    "4": "scoring",
+    "5": "resources",
+    "6": "recommendations",
+    "overall comments": "recommendations",
+}
+
+# Bump whenever the prompt rules or layout change so cached evaluations are not reused.
+FANOUT_PROMPT_VERSION = "1"
+FANOUT_SYSTEM_PROMPT = (
+    "You are an AI transparency reviewer evaluating model cards on Hugging Face.\n"
+    "You are filling ONE PART of a larger review template. You MUST obey all of the following rules:\n"
+    "1. Fill the provided TEMPLATE PART EXACTLY AS-IS and output only that part.\n"
+    "   - Do not add, remove, or rename any headings or tables, and do not output other parts.\n"
+    "2. You may ONLY use information that comes from the provided PAGE TEXT or the URL.\n"
+    "   - Do NOT use outside knowledge, training data, or assumptions.\n"
+    "3. If a field is unknown or not specified in PAGE TEXT:\n"
+    "   - Leave it blank, or write a very short note like 'N/A – not specified in model card text'.\n"
+    "4. Scores MUST be integers 0, 1, 2, or 3, and 'Total (/30)' MUST equal their sum.\n"
+    "5. Use only '✓', '~', or '✗' as standards statuses."
+)
+
+RULE_RE = re.compile(r"^\s*---\s*$", re.MULTILINE)
+CODE_FENCE_RE = re.compile(r"\A```[a-z]*\n(.*)\n```\Z", re.DOTALL)
+
+
+@dataclass
+class TemplatePart:
+    task: Optional[str]  # None for static text copied verbatim (e.g. the scoring guide)
+    text: str
+
+
+def section_task(block: str) -> Optional[str]:
+    for line in block.splitlines():
+        if line.startswith("## "):
+            heading = line[3:].strip().lower()
+            number = heading.split()[0] if heading else ""
+            return SECTION_TASKS.get(heading, SECTION_TASKS.get(number))
+    return None
+
+
+def split_template(template_md: str) -> List[TemplatePart]:
+    """Split the template at its rules and merge adjacent blocks of the same sub-task."""
+    parts: List[TemplatePart] = []
+    for block in RULE_RE.split(template_md):
+        block = block.strip()
+        if not block:
+            continue
+        task = section_task(block)
+        if parts and task is not None and parts[-1].task == task:
+            parts[-1].text += "\n\n---\n\n" + block
+        else:
+            parts.append(TemplatePart(task=task, text=block))
+    return parts
+
+
+def build_part_prompt(part: TemplatePart, url: str, page_text: str) -> dict:
+    # Page context first so every sub-task shares the same prompt prefix
+    user = (
+        "CONTEXT (URL + scraped text):\n"
+        f"URL: {url}\n\n"
+        "PAGE TEXT (possibly truncated):\n"
+        f"{page_text}\n\n"
+        "TEMPLATE PART (fill exactly, keep headings/format identical):\n"
+        "---\n"
+        f"{part.text}\n"
+        "---\n"
+    )
+    return {"system": FANOUT_SYSTEM_PROMPT, "user": user}
+
+
+def clean_part_output(text: str) -> str:
+    """Drop code fences and the surrounding rules models sometimes echo back."""
+    text = text.strip()
+    m = CODE_FENCE_RE.match(text)
+    if m:
+        text = m.group(1).strip()
+    if text.startswith("---\n"):
+        text = text[4:]
+    if text.endswith("\n---"):
+        text = text[:-4]
+    return text.strip()
+
+
+def assemble(parts: List[TemplatePart], filled: List[str]) -> str:
+    return "\n\n---\n\n".join(filled[i] if part.task else part.text for i, part in enumerate(parts)) + "\n"
+
+
+async def run_fanout(
+    complete: Callable[[str, str], Awaitable[str]],
+    template_md: str,
+    url: str,
+    page_text: str,
+    max_parallel: int = 3,
+) -> str:
+    """
+    Fill `template_md` with one `complete(system, user)` call per sub-task, at
+    most `max_parallel` at a time, and return the assembled evaluation.
+    """
+    parts = split_template(template_md)
+    semaphore = asyncio.Semaphore(max(1, max_parallel))
+
+    async def fill(part: TemplatePart) -> str:
+        if part.task is None:
+            return part.text
+        prompt = build_part_prompt(part, url, page_text)
+        async with semaphore:
+            output = await complete(prompt["system"], prompt["user"])
+        return clean_part_output(output)
+
+    filled = await asyncio.gather(*(fill(part) for part in parts))
+    filled_md = assemble(parts, list(filled))
+
+    filled_md, total, disagreed = reconcile_total(filled_md)
+    if total is None:
+        logger.warning("Fan-out evaluation of %s has no parsable scoring table", url)
+    elif disagreed:
+        logger.info("Fan-out evaluation of %s: corrected scoring total to %d", url, total)
+    return filled_md
@@ -9,74 +9,203 @@ Usage:
       --outdir evaluations \
       --model gpt-4o
 
+Batch mode (one URL per line; "-" reads stdin):
+  python src/generate_eval.py --batch urls.txt --concurrency 8 \
+      --rpm 60 --tpm 400000 --results evaluations/batch_results.jsonl --resume
+
 Env:
   OPENAI_API_KEY must be set.
+
+Importing this module stays cheap: the OpenAI SDK, requests and python-dotenv
+are imported where they are first needed (see benchmarks/check_import_time.py).
 """
 
+import asyncio
 import os
 import re
 import sys
 import time
 import argparse
+import functools
+import json
+import logging
 import pathlib
-import textwrap
-from typing import Optional
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, AsyncIterator, Callable, Optional
+from urllib.parse import urlsplit, urlunsplit
+
+if TYPE_CHECKING:
+    import httpx
+    import requests
+    from openai import AsyncOpenAI, OpenAI
 
-from dotenv import load_dotenv, find_dotenv
-load_dotenv(find_dotenv(), override=False)  
+ROOT_DIR = pathlib.Path(__file__).resolve().parent.parent
 
 
-try:
-    import requests
-except ImportError as e:
-    print("Please `pip install requests`", file=sys.stderr)
-    raise
+@functools.lru_cache(maxsize=None)
+def load_env() -> Optional[str]:
+    """
+    Load the first `.env` in the working directory or the repo root, without
+    overriding variables already set. python-dotenv is only imported when a
+    file exists. Returns its path.
+    """
+    for directory in (pathlib.Path.cwd(), ROOT_DIR):
+        path = directory / ".env"
+        if path.is_file():
+            from dotenv import load_dotenv
 
-try:
-    from bs4 import BeautifulSoup
-    HAS_BS4 = True
-except Exception:
-    HAS_BS4 = False
+            load_dotenv(path, override=False)
+            return str(path)
+    return None
 
 
-try:
-    from openai import OpenAI
-except ImportError:
-    print("Please `pip install openai` (official OpenAI Python SDK).", file=sys.stderr)
-    raise
+# Before any setting below (or in the modules imported here) is read
+load_env()
+
+try:  # imported as src.generate_eval (server.py)
+    from src import context_reducer, html_extract, llm_client, metrics, readme_fetch
+except ImportError:  # run as `python src/generate_eval.py`
+    import context_reducer
+    import html_extract
+    import llm_client
+    import metrics
+    import readme_fetch
+
+logger = logging.getLogger("card_grader")
 
 
 MAX_INPUT_CHARS = 150_000 
 DEFAULT_MODEL = os.getenv("OPENAI_MODEL", "gpt-4o")
+# "auto" tries the raw README.md first and falls back to scraping the HTML page;
+# "readme" / "html" force one path.
+FETCH_MODE = os.getenv("CARD_FETCH_MODE", "auto")
+# Token budget for page text sent to the model; 0 disables reduction and falls
+# back to plain truncation at MAX_INPUT_CHARS.
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "12000"))
+# Bump whenever the prompt rules or layout change so cached evaluations are not reused.
+SYSTEM_PROMPT_VERSION = "2"
+
+
+FETCH_HEADERS = {
+    "User-Agent": "card-review-bot/1.0 (+https://github.com/your-org)"
+}
+
+_session: Optional["requests.Session"] = None
+
+
+def get_session() -> "requests.Session":
+    """Shared requests session so repeated fetches reuse pooled connections."""
+    global _session
+    if _session is None:
+        try:
+            import requests
+        except ImportError:
+            print("Please `pip install requests`", file=sys.stderr)
+            raise
+        _session = requests.Session()
+        _session.headers.update(FETCH_HEADERS)
+    return _session
+
+
+def html_to_text(text: str, content_type: str) -> str:
+    """
+    Model card text of an HTML page (other content passes through).
+
+    Extraction stops at MAX_INPUT_CHARS, the most any later stage keeps.
+    """
+    if "html" in content_type:
+        text = html_extract.extract_text(text, max_chars=MAX_INPUT_CHARS)
+    return text
 
 
 def fetch_url_text(url: str) -> str:
-    """Fetch URL and return lightly cleaned text (HTML stripped if bs4 present)."""
-    headers = {
-        "User-Agent": "card-review-bot/1.0 (+https://github.com/your-org)"
-    }
-    resp = requests.get(url, headers=headers, timeout=30)
+    """Fetch URL and return lightly cleaned text (HTML reduced to the card text)."""
+    resp = get_session().get(url, timeout=30)
     resp.raise_for_status()
 
     content_type = resp.headers.get("Content-Type", "").lower()
-    text = resp.text
+    return html_to_text(resp.text, content_type)
 
-    if "html" in content_type and HAS_BS4:
-        soup = BeautifulSoup(text, "html.parser")
-        for tag in soup(["script", "style", "noscript"]):
-            tag.decompose()
-        text = soup.get_text(separator="\n")
-        text = "\n".join(line.strip() for line in text.splitlines() if line.strip())
 
-        if len(text) > MAX_INPUT_CHARS:
-            text = text[:MAX_INPUT_CHARS] + "\n...[truncated]..."
+def truncate_text(text: str) -> str:
+    if len(text) > MAX_INPUT_CHARS:
+        text = text[:MAX_INPUT_CHARS] + "\n...[truncated]..."
+    return text
 
-    # focus on the model card section if possible
-    # text = focus_on_model_card(text)
 
-    return text
+def prepare_page_text(url: str, page_text: str, budget_tokens: Optional[int] = None) -> str:
+    """Reduce fetched page text to the prompt budget and log the savings."""
+    budget = CONTEXT_TOKEN_BUDGET if budget_tokens is None else budget_tokens
+    metrics.PAGE_TEXT_CHARS.observe(len(page_text), phase="fetched")
+    if budget <= 0:
+        reduced = truncate_text(page_text)
+        metrics.PAGE_TEXT_CHARS.observe(len(reduced), phase="prompt")
+        return reduced
+
+    with metrics.timed("reduce"):
+        reduced, stats = context_reducer.reduce_context(page_text, budget)
+    metrics.PAGE_TEXT_CHARS.observe(len(reduced), phase="prompt")
+    logger.info(
+        "context %s: %d -> %d chars (~%d -> ~%d tokens), kept %d/%d sections, dropped %d boilerplate lines",
+        url, stats.chars_before, stats.chars_after, stats.tokens_before, stats.tokens_after,
+        stats.sections_kept, stats.sections_total, stats.lines_dropped,
+    )
+    return reduced
+
+
+def fetch_card_text(url: str, mode: Optional[str] = None) -> str:
+    """
+    Fetch the card text for `url`: the raw README.md (with conditional GETs)
+    when available, otherwise the scraped HTML page.
+    """
+    mode = mode or FETCH_MODE
+    if mode != "html":
+        try:
+            text = readme_fetch.fetch_readme_text(url, get_session())
+        except Exception as e:
+            if mode == "readme":
+                raise
+            print(f"Warning: README fetch failed ({e}). Falling back to HTML.", file=sys.stderr)
+            text = None
+        if text is not None:
+            return text
+        if mode == "readme":
+            raise RuntimeError(f"No raw README available for {url}")
+    return fetch_url_text(readme_fetch.hub_url(url))
+
+
+async def fetch_card_text_async(url: str, client: "httpx.AsyncClient", mode: Optional[str] = None) -> str:
+    """Async variant of fetch_card_text over a shared, pooled httpx client."""
+    mode = mode or FETCH_MODE
+    if mode != "html":
+        try:
+            text = await readme_fetch.fetch_readme_text_async(url, client)
+        except Exception as e:
+            if mode == "readme":
+                raise
+            logger.warning("README fetch failed for %s (%s); falling back to HTML", url, e)
+            text = None
+        if text is not None:
+            return text
+        if mode == "readme":
+            raise RuntimeError(f"No raw README available for {url}")
+    return await fetch_url_text_async(readme_fetch.hub_url(url), client)
+
+
+async def fetch_url_text_async(url: str, client: "httpx.AsyncClient") -> str:
+    """Async variant of fetch_url_text over a shared, pooled httpx client."""
+    resp = await client.get(url, headers=FETCH_HEADERS, timeout=30, follow_redirects=True)
+    resp.raise_for_status()
 
+    content_type = resp.headers.get("Content-Type", "").lower()
+    # HTML parsing is CPU-bound; keep it off the event loop
+    with metrics.timed("html_to_text"):
+        return await asyncio.to_thread(html_to_text, resp.text, content_type)
 
+
+@functools.lru_cache(maxsize=8)
 def load_template(path: str) -> str:
     p = pathlib.Path(path)
     if not p.exists():
@@ -95,78 +224,125 @@ def sanitize_filename(s: str) -> str:
     return s[:120]
 
 
-def build_prompt(template_md: str, url: str, page_text: str) -> dict:
-    system = (
-        "You are an AI transparency reviewer evaluating model cards on Hugging Face.\n"
-        "You MUST obey all of the following rules:\n"
-        "1. Fill the provided Markdown template EXACTLY AS-IS.\n"
-        "   - Do not add, remove, or rename any sections, headings, or tables.\n"
-        "   - Keep the same ordering and formatting of headings and table columns.\n"
-        "2. You may ONLY use information that comes from the provided PAGE TEXT or the URL.\n"
-        "   - Do NOT use outside knowledge, training data, or assumptions.\n"
-        "   - If something is not clearly supported by PAGE TEXT, treat it as unknown.\n"
-        "3. If a field is unknown or not specified in PAGE TEXT:\n"
-        "   - Leave it blank, or write a very short note like 'N/A – not specified in model card text'.\n"
-        "   - Do NOT guess, infer, or hallucinate plausible details.\n"
-        "4. For the scoring table:\n"
-        "   - Each category score MUST be an integer 0, 1, 2, or 3.\n"
-        "   - The 'Total (/30)' MUST equal the sum of all category scores.\n"
-        "5. For the standards comparison table:\n"
-        "   - Use only '✓', '~', or '✗' as statuses.\n"
-        "6. Do not output anything outside the template boundaries."
+def normalize_url(url: str) -> str:
+    """Canonical form of a card URL: lowercase host, no query/fragment or trailing slash."""
+    parts = urlsplit(url.strip())
+    path = parts.path.rstrip("/") or "/"
+    return urlunsplit((parts.scheme.lower() or "https", parts.netloc.lower(), path, "", ""))
+
+
+SYSTEM_PROMPT = (
+    "You are an AI transparency reviewer evaluating model cards on Hugging Face.\n"
+    "You MUST obey all of the following rules:\n"
+    "1. Fill the provided Markdown template EXACTLY AS-IS.\n"
+    "   - Do not add, remove, or rename any sections, headings, or tables.\n"
+    "   - Keep the same ordering and formatting of headings and table columns.\n"
+    "2. You may ONLY use information that comes from the provided PAGE TEXT or the URL.\n"
+    "   - Do NOT use outside knowledge, training data, or assumptions.\n"
+    "   - If something is not clearly supported by PAGE TEXT, treat it as unknown.\n"
+    "3. If a field is unknown or not specified in PAGE TEXT:\n"
+    "   - Leave it blank, or write a very short note like 'N/A – not specified in model card text'.\n"
+    "   - Do NOT guess, infer, or hallucinate plausible details.\n"
+    "4. For the scoring table:\n"
+    "   - Each category score MUST be an integer 0, 1, 2, or 3.\n"
+    "   - The 'Total (/30)' MUST equal the sum of all category scores.\n"
+    "5. For the standards comparison table:\n"
+    "   - Use only '✓', '~', or '✗' as statuses.\n"
+    "6. Do not output anything outside the template boundaries."
+)
+
+
+@dataclass(frozen=True)
+class PromptPrefix:
+    """
+    The request-independent part of a prompt: system rules, then the template.
+    It is byte-identical for every card so provider-side prompt caching can
+    reuse it; only the URL and page text are appended after it.
+    """
+    system: str
+    user_prefix: str
+
+
+@functools.lru_cache(maxsize=8)
+def compile_prompt_prefix(template_md: str) -> PromptPrefix:
+    user_prefix = (
+        "TEMPLATE (fill exactly, keep headings/format identical):\n"
+        "---\n"
+        f"{template_md.strip()}\n"
+        "---\n\n"
+        "IMPORTANT: All facts MUST be supported by the PAGE TEXT below.\n"
+        "If unsure, leave fields blank or mark them as 'N/A – not specified in model card text'.\n\n"
     )
+    return PromptPrefix(system=SYSTEM_PROMPT, user_prefix=user_prefix)
 
-    user = textwrap.dedent(f"""
-    TEMPLATE (fill exactly, keep headings/format identical):
-    ---
-    {template_md}
-    ---
-
-    CONTEXT (URL + scraped text):
-    URL: {url}
 
-    IMPORTANT: All facts MUST be supported by the PAGE TEXT below.
-    If unsure, leave fields blank or mark them as 'N/A – not specified in model card text'.
+def build_prompt_from_prefix(prefix: PromptPrefix, url: str, page_text: str) -> dict:
+    user = (
+        prefix.user_prefix
+        + "CONTEXT (URL + scraped text):\n"
+        + f"URL: {url}\n\n"
+        + "PAGE TEXT (possibly truncated):\n"
+        + page_text
+    )
+    return {"system": prefix.system, "user": user}
 
-    PAGE TEXT (possibly truncated):
-    """) + page_text
 
-    return {"system": system, "user": user}
+def build_prompt(template_md: str, url: str, page_text: str) -> dict:
+    return build_prompt_from_prefix(compile_prompt_prefix(template_md), url, page_text)
 
 
 def call_openai_with_fallback(
-    client: OpenAI, model: str, system: str, user: str, retries: int = 3
+    client: "OpenAI",
+    model: str,
+    system: str,
+    user: str,
+    retries: Optional[int] = None,
+    on_usage: Optional[Callable[[dict], None]] = None,
+    before_attempt: Optional[Callable[[], None]] = None,
 ) -> str:
-    last_err: Optional[Exception] = None
-    for attempt in range(retries):
-        try:
-            # Primary path: Responses API
-            resp = client.responses.create(
-                model=model,
-                instructions=system,
-                input=user,
-                temperature=0.0,  # fully deterministic
-            )
-            return resp.output_text
-        except Exception as e:
-            last_err = e
-            # Fallback: Chat Completions
-            try:
-                chat = client.chat.completions.create(
-                    model=model,
-                    temperature=0.0,
-                    messages=[
-                        {"role": "system", "content": system},
-                        {"role": "user", "content": user},
-                    ],
-                )
-                return chat.choices[0].message.content
-            except Exception as e2:
-                last_err = e2
-                time.sleep(1.5 * (attempt + 1))
-                continue
-
-    raise RuntimeError(f"OpenAI call failed after {retries} attempts: {last_err}")
+    """
+    Fill the prompt via the Responses API, or Chat Completions where that isn't
+    served. Retries, backoff and deadlines are handled by llm_client; `retries`
+    overrides the attempt limit and `before_attempt` runs before every request.
+    """
+    return llm_client.resilient(client).complete_sync(
+        model, system, user, on_usage=on_usage, max_attempts=retries, before_attempt=before_attempt
+    )
+
+
+async def call_openai_with_fallback_async(
+    client: "AsyncOpenAI",
+    model: str,
+    system: str,
+    user: str,
+    retries: Optional[int] = None,
+    on_usage: Optional[Callable[[dict], None]] = None,
+    json_schema: Optional[dict] = None,
+) -> str:
+    """Async variant of call_openai_with_fallback for a shared AsyncOpenAI client.
+
+    With `json_schema` ({"name": ..., "schema": ...}) the answer is a JSON
+    document constrained to that schema (structured outputs).
+    """
+    return await llm_client.resilient(client).complete(
+        model, system, user, on_usage=on_usage, max_attempts=retries, json_schema=json_schema
+    )
+
+
+async def stream_openai_text_async(
+    client: "AsyncOpenAI",
+    model: str,
+    system: str,
+    user: str,
+    on_usage: Optional[Callable[[dict], None]] = None,
+) -> AsyncIterator[str]:
+    """Yield the model's output text incrementally (Chat Completions streaming).
+
+    Only opening the stream is retried; once tokens have been yielded an error
+    is raised to the caller rather than restarting mid-output.
+    """
+    async for delta in llm_client.resilient(client).stream(model, system, user, on_usage=on_usage):
+        yield delta
 
 def write_output(outdir: str, url: str, md_text: str) -> str:
     pathlib.Path(outdir).mkdir(parents=True, exist_ok=True)
@@ -197,33 +373,246 @@ def focus_on_model_card(text: str) -> str:
     end = min(len(text), idx + 50_000)
     return text[start:end]
 
+# Batch mode: rough output size of a filled template, used to reserve TPM budget up front
+EXPECTED_OUTPUT_TOKENS = 2_500
+
+
+class TokenBucket:
+    """Thread-safe token bucket refilled continuously at `rate_per_minute`."""
+
+    def __init__(self, rate_per_minute: float, capacity: Optional[float] = None):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity if capacity is not None else rate_per_minute
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, amount: float = 1.0) -> None:
+        """Block until `amount` tokens are available, then take them."""
+        amount = min(amount, self.capacity)
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= amount:
+                    self._tokens -= amount
+                    return
+                wait = (amount - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class RateLimiter:
+    """Requests-per-minute and tokens-per-minute limits (either may be disabled)."""
+
+    def __init__(self, rpm: Optional[float] = None, tpm: Optional[float] = None):
+        self.requests = TokenBucket(rpm) if rpm else None
+        self.tokens = TokenBucket(tpm) if tpm else None
+
+    def acquire(self, tokens: int) -> None:
+        if self.requests:
+            self.requests.acquire(1)
+        if self.tokens:
+            self.tokens.acquire(tokens)
+
+
+def read_url_list(path: str) -> list[str]:
+    """Read URLs (one per line, '#' comments allowed) from a file or '-' for stdin."""
+    if path == "-":
+        lines = sys.stdin.read().splitlines()
+    else:
+        lines = pathlib.Path(path).read_text(encoding="utf-8").splitlines()
+
+    urls: list[str] = []
+    seen = set()
+    for line in lines:
+        url = line.split("#", 1)[0].strip()
+        if url and url not in seen:
+            seen.add(url)
+            urls.append(url)
+    return urls
+
+
+def load_completed(results_path: str) -> set[str]:
+    """URLs already graded successfully according to a results JSONL checkpoint."""
+    done = set()
+    p = pathlib.Path(results_path)
+    if not p.exists():
+        return done
+    for line in p.read_text(encoding="utf-8").splitlines():
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError:
+            # A crash can leave a partially written last line
+            continue
+        if record.get("status") == "ok":
+            done.add(record["url"])
+    return done
+
+
+def grade_one(
+    url: str,
+    template_md: str,
+    client: "OpenAI",
+    model: str,
+    outdir: str,
+    limiter: RateLimiter,
+    no_fetch: bool = False,
+) -> dict:
+    """Grade a single URL for batch mode and return its JSONL record."""
+    started = time.monotonic()
+    page_text = ""
+    if not no_fetch:
+        try:
+            page_text = prepare_page_text(url, fetch_card_text(url))
+        except Exception as e:
+            print(f"Warning: failed to fetch {url} ({e}). Continuing with URL only.", file=sys.stderr)
+
+    prompt = build_prompt(template_md, url, page_text)
+    # Charged per request sent, so retries and the fallback surface count too
+    cost = context_reducer.estimate_tokens(prompt["system"] + prompt["user"]) + EXPECTED_OUTPUT_TOKENS
+
+    filled_md = call_openai_with_fallback(
+        client=client,
+        model=model,
+        system=prompt["system"],
+        user=prompt["user"],
+        before_attempt=lambda: limiter.acquire(cost),
+    )
+    outpath = write_output(outdir, url, filled_md)
+    return {
+        "url": url,
+        "status": "ok",
+        "model": model,
+        "output": outpath,
+        "elapsed_s": round(time.monotonic() - started, 3),
+        "filled_markdown": filled_md,
+    }
+
+
+def run_batch(
+    urls: list[str],
+    template_md: str,
+    client: "OpenAI",
+    model: str,
+    outdir: str,
+    results_path: str,
+    concurrency: int = 4,
+    limiter: Optional[RateLimiter] = None,
+    no_fetch: bool = False,
+    resume: bool = False,
+) -> tuple[int, int]:
+    """
+    Grade many URLs with bounded concurrency, appending one JSONL record per
+    URL as soon as it finishes. With `resume`, URLs already recorded as ok in
+    `results_path` are skipped. Returns (succeeded, failed).
+    """
+    limiter = limiter or RateLimiter()
+    pathlib.Path(results_path).parent.mkdir(parents=True, exist_ok=True)
+
+    if resume:
+        completed = load_completed(results_path)
+        pending = [u for u in urls if u not in completed]
+        print(f"Resuming: {len(urls) - len(pending)} already done, {len(pending)} to go.")
+    else:
+        pending = urls
+        pathlib.Path(results_path).write_text("", encoding="utf-8")
+
+    write_lock = threading.Lock()
+    succeeded = failed = 0
+
+    with open(results_path, "a", encoding="utf-8") as results, \
+            ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+        futures = {
+            pool.submit(grade_one, url, template_md, client, model, outdir, limiter, no_fetch): url
+            for url in pending
+        }
+        for fut in as_completed(futures):
+            url = futures[fut]
+            try:
+                record = fut.result()
+                succeeded += 1
+                print(f"✔ {url} -> {record['output']}")
+            except Exception as e:
+                record = {"url": url, "status": "error", "model": model, "error": str(e)}
+                failed += 1
+                print(f"✘ {url}: {e}", file=sys.stderr)
+
+            with write_lock:
+                results.write(json.dumps(record, ensure_ascii=False) + "\n")
+                results.flush()
+                os.fsync(results.fileno())
+
+    return succeeded, failed
+
+
 def main():
     parser = argparse.ArgumentParser(description="Fill AI card template from a URL.")
-    parser.add_argument("--url", required=True, help="URL of the model/dataset card")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--url", help="URL of the model/dataset card")
+    source.add_argument("--batch", metavar="FILE",
+                        help="File with one URL per line ('-' for stdin) to grade in batch mode")
     parser.add_argument("--template", default="templates/card_review_template.md",
                         help="Path to the Markdown template")
     parser.add_argument("--outdir", default="evaluations", help="Output folder")
     parser.add_argument("--model", default=DEFAULT_MODEL, help="OpenAI model (e.g., gpt-4o)")
     parser.add_argument("--no-fetch", action="store_true",
                         help="Do not fetch page text; only send URL + template")
+    parser.add_argument("--concurrency", type=int, default=4,
+                        help="Batch mode: number of cards graded in parallel")
+    parser.add_argument("--rpm", type=float, default=None,
+                        help="Batch mode: max LLM requests per minute")
+    parser.add_argument("--tpm", type=float, default=None,
+                        help="Batch mode: max (estimated) LLM tokens per minute")
+    parser.add_argument("--results", default=None,
+                        help="Batch mode: JSONL results/checkpoint file (default: <outdir>/batch_results.jsonl)")
+    parser.add_argument("--resume", action="store_true",
+                        help="Batch mode: skip URLs already recorded as ok in the results file")
     args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
 
     api_key = os.getenv("OPENAI_API_KEY")
     if not api_key:
         print("ERROR: OPENAI_API_KEY is not set.", file=sys.stderr)
         sys.exit(1)
 
+    try:
+        from openai import OpenAI
+    except ImportError:
+        print("Please `pip install openai` (official OpenAI Python SDK).", file=sys.stderr)
+        raise
+
     template_md = load_template(args.template)
+    # Retries are handled by llm_client; the SDK's own would multiply them
+    client = OpenAI(api_key=api_key, max_retries=0)
+
+    if args.batch:
+        urls = read_url_list(args.batch)
+        results_path = args.results or str(pathlib.Path(args.outdir) / "batch_results.jsonl")
+        succeeded, failed = run_batch(
+            urls,
+            template_md=template_md,
+            client=client,
+            model=args.model,
+            outdir=args.outdir,
+            results_path=results_path,
+            concurrency=args.concurrency,
+            limiter=RateLimiter(rpm=args.rpm, tpm=args.tpm),
+            no_fetch=args.no_fetch,
+            resume=args.resume,
+        )
+        print(f"Batch finished: {succeeded} ok, {failed} failed. Results: {results_path}")
+        sys.exit(1 if failed else 0)
+
     page_text = ""
     if not args.no_fetch:
         try:
-            page_text = fetch_url_text(args.url)
+            page_text = prepare_page_text(args.url, fetch_card_text(args.url))
         except Exception as e:
             print(f"Warning: failed to fetch URL text ({e}). Continuing with URL only.", file=sys.stderr)
             page_text = ""
 
     prompt = build_prompt(template_md, args.url, page_text)
-    client = OpenAI(api_key=api_key)
 
     filled_md = call_openai_with_fallback(
         client=client,
@@ -0,0 +1,217 @@
+"""
+HTML to plain text for card pages.
+
+The default "stream" engine feeds the page through `html.parser` incrementally
+without building a tree: it keeps only the text inside the model card's
+`model-card-content` container (the whole document when there is none), skips
+`script` / `style` / `noscript` subtrees, and stops parsing once `max_chars`
+of text have been collected. The "bs4" engine is the original BeautifulSoup
+path and serves as the reference: both produce the same text, one stripped
+line per text node (see benchmarks/bench_extractor.py).
+
+Engines are looked up by name (`CARD_GRADER_HTML_ENGINE`, default "stream");
+`register_engine` adds others.
+"""
+
+import importlib.util
+import os
+from html.parser import HTMLParser
+from typing import Callable, Dict, List, Optional
+
+# BeautifulSoup is only imported when the bs4 engine runs
+HAS_BS4 = importlib.util.find_spec("bs4") is not None
+
+CONTENT_CLASS = "model-card-content"
+SKIP_TAGS = {"script", "style", "noscript"}
+VOID_TAGS = {
+    "area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta",
+    "param", "source", "track", "wbr",
+}
+TRUNCATION_MARK = "\n...[truncated]..."
+FEED_CHUNK_CHARS = 64 * 1024
+
+# name -> fn(html, max_chars) -> text
+Engine = Callable[[str, Optional[int]], str]
+ENGINES: Dict[str, Engine] = {}
+
+
+def register_engine(name: str, engine: Engine) -> None:
+    ENGINES[name] = engine
+
+
+def truncate(text: str, max_chars: Optional[int]) -> str:
+    if max_chars is not None and len(text) > max_chars:
+        return text[:max_chars] + TRUNCATION_MARK
+    return text
+
+
+class _Done(Exception):
+    pass
+
+
+class StreamingExtractor(HTMLParser):
+    """
+    Incremental text extractor: `feed()` chunks until `done`, then `text()`.
+
+    With `container_class`, only text inside the first element carrying that
+    class is kept and parsing ends when the element closes.
+    """
+
+    def __init__(self, container_class: Optional[str] = None, max_chars: Optional[int] = None):
+        super().__init__(convert_charrefs=True)
+        self.container_class = container_class
+        self.max_chars = max_chars
+        self.done = False
+        self.truncated = False
+        self.found_container = False
+        self._lines: List[str] = []
+        self._chars = 0
+        self._pending: List[str] = []
+        # Open elements as seen by the text collector (names only)
+        self._stack: List[str] = []
+        # Stack depth of the container element once entered (None: not yet / no container)
+        self._container_depth: Optional[int] = None
+        self._skip_depth: Optional[int] = None
+
+    # ----------------------------------------------------------------
+    # Public API
+    # ----------------------------------------------------------------
+    def feed(self, data: str) -> None:
+        if self.done:
+            return
+        try:
+            super().feed(data)
+        except _Done:
+            self.done = True
+
+    def close(self) -> None:
+        if not self.done:
+            try:
+                super().close()
+                self._flush()
+            except _Done:
+                pass
+        self.done = True
+
+    def text(self) -> str:
+        text = "\n".join(self._lines)
+        if self.truncated:
+            return truncate(text, self.max_chars)
+        return text
+
+    # ----------------------------------------------------------------
+    # Parser callbacks
+    # ----------------------------------------------------------------
+    def handle_starttag(self, tag, attrs):
+        self._flush()
+        if tag in VOID_TAGS:
+            return
+        self._stack.append(tag)
+        if self._skip_depth is None and tag in SKIP_TAGS:
+            self._skip_depth = len(self._stack)
+        if (
+            self.container_class
+            and self._container_depth is None
+            and any(name == "class" and value and self.container_class in value.split() for name, value in attrs)
+        ):
+            self._container_depth = len(self._stack)
+            self.found_container = True
+
+    def handle_startendtag(self, tag, attrs):
+        self._flush()
+
+    def handle_endtag(self, tag):
+        self._flush()
+        if tag not in self._stack:
+            return
+        # Close the most recent matching element and anything left open inside it
+        while self._stack:
+            depth = len(self._stack)
+            closed = self._stack.pop()
+            if self._skip_depth == depth:
+                self._skip_depth = None
+            if self._container_depth == depth:
+                raise _Done()
+            if closed == tag:
+                break
+
+    def handle_data(self, data):
+        if self._skip_depth is None and self._collecting():
+            self._pending.append(data)
+
+    def handle_comment(self, data):
+        self._flush()
+
+    def handle_decl(self, decl):
+        self._flush()
+
+    def handle_pi(self, data):
+        self._flush()
+
+    # ----------------------------------------------------------------
+    # Helpers
+    # ----------------------------------------------------------------
+    def _collecting(self) -> bool:
+        return not self.container_class or self._container_depth is not None
+
+    def _flush(self) -> None:
+        """End the current text node: keep its stripped, non-empty lines."""
+        if not self._pending:
+            return
+        data = "".join(self._pending)
+        self._pending = []
+        for line in data.splitlines():
+            line = line.strip()
+            if line:
+                self._lines.append(line)
+                self._chars += len(line) + 1
+        if self.max_chars is not None and self._chars - 1 > self.max_chars:
+            self.truncated = True
+            raise _Done()
+
+
+def _stream(html: str, container_class: Optional[str], max_chars: Optional[int]) -> StreamingExtractor:
+    extractor = StreamingExtractor(container_class=container_class, max_chars=max_chars)
+    for start in range(0, len(html), FEED_CHUNK_CHARS):
+        extractor.feed(html[start:start + FEED_CHUNK_CHARS])
+        if extractor.done:
+            break
+    extractor.close()
+    return extractor
+
+
+def stream_engine(html: str, max_chars: Optional[int] = None) -> str:
+    if CONTENT_CLASS in html:
+        extractor = _stream(html, CONTENT_CLASS, max_chars)
+        if extractor.found_container:
+            return extractor.text()
+        # The class name only appeared in CSS or scripts
+    return _stream(html, None, max_chars).text()
+
+
+def bs4_engine(html: str, max_chars: Optional[int] = None) -> str:
+    """Reference extractor: full BeautifulSoup tree, same container and skip rules."""
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, "html.parser")
+    root = soup.find(class_=CONTENT_CLASS) or soup
+    for tag in root(list(SKIP_TAGS)):
+        tag.decompose()
+    text = root.get_text(separator="\n")
+    text = "\n".join(line.strip() for line in text.splitlines() if line.strip())
+    return truncate(text, max_chars)
+
+
+register_engine("stream", stream_engine)
+if HAS_BS4:
+    register_engine("bs4", bs4_engine)
+
+
+def extract_text(html: str, max_chars: Optional[int] = None, engine: Optional[str] = None) -> str:
+    """Card text of an HTML page, at most `max_chars` (plus a truncation mark)."""
+    name = engine or os.getenv("CARD_GRADER_HTML_ENGINE", "stream")
+    try:
+        fn = ENGINES[name]
+    except KeyError:
+        raise ValueError(f"Unknown HTML extractor engine {name!r} (have {', '.join(ENGINES)})")
+    return fn(html, max_chars)
@@ -0,0 +1,213 @@
+"""
+HTTP response middleware: content negotiation and conditional GETs.
+
+  * `CompressionMiddleware` compresses responses with brotli (when the
+    optional `brotli` package is installed) or gzip, whichever the client
+    prefers in Accept-Encoding. Streamed bodies (NDJSON) are flushed chunk by
+    chunk so lines still arrive as soon as they are produced; server-sent
+    events are left alone.
+  * `ETagMiddleware` tags successful GET responses with a hash of their body
+    and answers a matching If-None-Match with 304 Not Modified.
+"""
+
+import hashlib
+import zlib
+from typing import Dict, Optional
+
+try:
+    import brotli
+    HAS_BROTLI = True
+except ImportError:
+    HAS_BROTLI = False
+
+# Compressing these doesn't pay off, or would hold back events
+EXCLUDED_CONTENT_TYPES = (b"text/event-stream", b"image/", b"application/gzip", b"application/zip")
+
+
+def _header(headers, name: bytes) -> Optional[bytes]:
+    for key, value in headers:
+        if key.lower() == name:
+            return value
+    return None
+
+
+def accepted_encodings(accept_encoding: str) -> Dict[str, float]:
+    """Accept-Encoding as {coding: q}; codings with q=0 are refused."""
+    accepted = {}
+    for part in accept_encoding.split(","):
+        coding, _, params = part.strip().partition(";")
+        if not coding:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        accepted[coding.strip().lower()] = q
+    return accepted
+
+
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    accepted = accepted_encodings(accept_encoding)
+    offered = ["br", "gzip"] if HAS_BROTLI else ["gzip"]
+    best, best_q = None, 0.0
+    for coding in offered:
+        q = accepted.get(coding, accepted.get("*", 0.0))
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+
+class _GzipStream:
+    def __init__(self, level: int):
+        self._z = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        return self._z.compress(data) + self._z.flush(zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH)
+
+
+class _BrotliStream:
+    def __init__(self, quality: int):
+        self._c = brotli.Compressor(quality=quality)
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        out = self._c.process(data)
+        return out + (self._c.finish() if final else self._c.flush())
+
+
+class CompressionMiddleware:
+    """Brotli / gzip response compression for bodies of at least `minimum_size` bytes."""
+
+    def __init__(self, app, minimum_size: int = 500, gzip_level: int = 6, brotli_quality: int = 4):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    def _compressor(self, encoding: str):
+        if encoding == "br":
+            return _BrotliStream(self.brotli_quality)
+        return _GzipStream(self.gzip_level)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = choose_encoding((_header(scope["headers"], b"accept-encoding") or b"").decode("latin-1"))
+
+        start = None
+        compressor = None
+        passthrough = False
+
+        async def send_compressed(message):
+            nonlocal start, compressor, passthrough
+            if message["type"] == "http.response.start":
+                start = message
+                return
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if compressor is None:
+                headers = list(start.get("headers", []))
+                content_type = _header(headers, b"content-type") or b""
+                compressible = (
+                    start["status"] not in (204, 304)
+                    and _header(headers, b"content-encoding") is None
+                    and not content_type.startswith(EXCLUDED_CONTENT_TYPES)
+                )
+                if compressible:
+                    headers.append((b"vary", b"Accept-Encoding"))
+                if not compressible or encoding is None or (not more_body and len(body) < self.minimum_size):
+                    passthrough = True
+                    await send({**start, "headers": headers})
+                    await send(message)
+                    return
+
+                compressor = self._compressor(encoding)
+                headers = [(k, v) for k, v in headers if k.lower() != b"content-length"]
+                headers.append((b"content-encoding", encoding.encode("latin-1")))
+                data = compressor.compress(body, final=not more_body)
+                if not more_body:
+                    headers.append((b"content-length", str(len(data)).encode("latin-1")))
+                await send({**start, "headers": headers})
+                await send({"type": "http.response.body", "body": data, "more_body": more_body})
+                return
+
+            await send({
+                "type": "http.response.body",
+                "body": compressor.compress(body, final=not more_body),
+                "more_body": more_body,
+            })
+
+        await self.app(scope, receive, send_compressed)
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against `etag` (RFC 9110)."""
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == opaque:
+            return True
+    return False
+
+
+class ETagMiddleware:
+    """
+    ETags for GET / HEAD responses sent in one piece. Tags are weak: the
+    compression middleware may re-encode the body.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] not in ("GET", "HEAD"):
+            await self.app(scope, receive, send)
+            return
+        if_none_match = _header(scope["headers"], b"if-none-match")
+
+        start = None
+        passthrough = False
+
+        async def send_tagged(message):
+            nonlocal start, passthrough
+            if message["type"] == "http.response.start":
+                start = message
+                return
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            passthrough = True
+            headers = list(start.get("headers", []))
+            body = message.get("body", b"")
+            if start["status"] != 200 or message.get("more_body", False) or _header(headers, b"etag"):
+                await send(start)
+                await send(message)
+                return
+
+            etag = 'W/"%s"' % hashlib.sha256(body).hexdigest()[:32]
+            headers.append((b"etag", etag.encode("latin-1")))
+            if _header(headers, b"cache-control") is None:
+                # Cacheable, but revalidate before every reuse
+                headers.append((b"cache-control", b"no-cache"))
+            if if_none_match is not None and etag_matches(if_none_match.decode("latin-1"), etag):
+                headers = [(k, v) for k, v in headers if k.lower() not in (b"content-length", b"content-type")]
+                await send({**start, "status": 304, "headers": headers})
+                await send({"type": "http.response.body", "body": b""})
+                return
+            await send({**start, "headers": headers})
+            await send(message)
+
+        await self.app(scope, receive, send_tagged)
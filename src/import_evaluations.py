@@ -0,0 +1,64 @@
+"""
+Backfill the evaluation store from filled evaluations on disk.
+
+Parses every evaluations/*.md with the server's parser and stores it like a
+fresh grade, dated by the file's modification time. Files that were already
+imported are skipped, so the importer can be re-run safely.
+
+Usage (from the repository root):
+  python -m src.import_evaluations [--dir evaluations] [--db data/grades.sqlite3]
+"""
+
+import argparse
+import os
+import pathlib
+
+try:
+    from src.evaluation_store import card_title_url, to_store_payload
+except ImportError:  # imported from within src/
+    from evaluation_store import card_title_url, to_store_payload
+
+
+def import_directory(store, directory: pathlib.Path, build_grade_response, normalize_url) -> tuple:
+    """Store each *.md in `directory` not imported before; returns (imported, skipped)."""
+    imported = skipped = 0
+    for path in sorted(directory.glob("*.md")):
+        source = f"import:{path.name}"
+        if store.has_source(source):
+            skipped += 1
+            continue
+        filled_md = path.read_text(encoding="utf-8")
+        response = build_grade_response(filled_md)
+        _, url = card_title_url(filled_md)
+        store.add(
+            to_store_payload(response),
+            model=None,
+            prompt_version=None,
+            template_sha=None,
+            source=source,
+            url=normalize_url(url) if url else None,
+            created_at=path.stat().st_mtime,
+        )
+        imported += 1
+    return imported, skipped
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import filled evaluations into the evaluation store.")
+    parser.add_argument("--dir", default="evaluations", help="Directory of filled evaluation markdown files")
+    parser.add_argument("--db", default=None, help="Store path (default CARD_GRADER_STORE_PATH or data/grades.sqlite3)")
+    args = parser.parse_args()
+
+    if args.db:
+        os.environ["CARD_GRADER_STORE_PATH"] = args.db
+    # The server module owns the parser and opens the configured store
+    import server
+
+    imported, skipped = import_directory(
+        server.store, pathlib.Path(args.dir), server.build_grade_response, server.normalize_url
+    )
+    print(f"Imported {imported} evaluations ({skipped} already present) into {server.STORE_PATH}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,368 @@
+"""
+Incremental re-grading of cards whose text changed only in a few sections.
+
+After each full evaluation the sectioned page text is stored per URL. On the
+next grade the new text is diffed section by section; when only a few sections
+changed, the model is asked to re-score just the template categories (and the
+matching standards rows) those sections touch. Its answer is merged into the
+previous filled evaluation, and the total is recomputed locally.
+"""
+
+import hashlib
+import json
+import pathlib
+import re
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+try:
+    from src.context_reducer import CATEGORY_KEYWORDS, split_sections
+except ImportError:  # imported from within src/
+    from context_reducer import CATEGORY_KEYWORDS, split_sections
+
+# Scoring category -> row of the standards comparison table it corresponds to
+CATEGORY_STANDARDS = {
+    "Identity": "Identity & versioning",
+    "Intended Use": "Intended use(s) & limitations",
+    "Data": "Data provenance & composition",
+    "Evaluations": "Evaluation data & metrics",
+    "Risks": "Risks / ethical considerations",
+    "Governance": "Governance / maintenance",
+    "Licensing": "Licensing & access",
+    "Reproducibility": "Reproducibility (code, configs, seeds)",
+    "Clarity": "Clarity & structure",
+    "Traceability": "Cross-references / traceability",
+}
+
+# Bump whenever the prompt rules or layout change so cached evaluations are not reused.
+UPDATE_PROMPT_VERSION = "2"
+UPDATE_SYSTEM_PROMPT = (
+    "You are an AI transparency reviewer updating an existing evaluation of a Hugging Face model card.\n"
+    "Only some sections of the card changed. You MUST obey all of the following rules:\n"
+    "1. Output ONLY the sections and Markdown tables requested, with exactly the rows listed, nothing else.\n"
+    "2. Base every judgement on the CHANGED SECTIONS together with the PREVIOUS EVALUATION.\n"
+    "   - Do NOT use outside knowledge or guess details that are not in the text.\n"
+    "3. Each category score MUST be an integer 0, 1, 2, or 3.\n"
+    "4. Use only '✓', '~', or '✗' as standards statuses."
+)
+
+SCORE_CELL_RE = re.compile(r"[0-9]+")
+
+# Basic Info of the template, filled again when a grade is adapted from another card
+BASIC_INFO_HEADING = "## Basic Info"
+BASIC_INFO_FIELDS = ("Card Title / URL", "Type", "Version / Date", "Owner / Contact")
+# How much of the card's opening sections the model sees to fill Basic Info
+BASIC_INFO_CONTEXT_CHARS = 4000
+
+
+@dataclass
+class SectionDiff:
+    changed: List[dict] = field(default_factory=list)  # {"heading", "old", "new"}
+    total_sections: int = 0
+
+    @property
+    def fraction_changed(self) -> float:
+        return len(self.changed) / self.total_sections if self.total_sections else 1.0
+
+
+def section_snapshot(page_text: str) -> List[dict]:
+    """Section the page text the same way the context reducer does."""
+    snapshot = []
+    occurrences: Dict[str, int] = {}
+    for section in split_sections(page_text):
+        n = occurrences.get(section.heading, 0)
+        occurrences[section.heading] = n + 1
+        snapshot.append({
+            "key": f"{section.heading}#{n}",
+            "heading": section.heading,
+            "hash": hashlib.sha256(section.text.encode("utf-8")).hexdigest(),
+            "text": section.text,
+        })
+    return snapshot
+
+
+def diff_sections(old: List[dict], new: List[dict]) -> SectionDiff:
+    old_by_key = {s["key"]: s for s in old}
+    new_by_key = {s["key"]: s for s in new}
+    diff = SectionDiff(total_sections=len(set(old_by_key) | set(new_by_key)))
+    for key in list(old_by_key) + [k for k in new_by_key if k not in old_by_key]:
+        before, after = old_by_key.get(key), new_by_key.get(key)
+        if before and after and before["hash"] == after["hash"]:
+            continue
+        diff.changed.append({
+            "heading": (after or before)["heading"],
+            "old": before["text"] if before else "",
+            "new": after["text"] if after else "",
+        })
+    return diff
+
+
+def affected_categories(diff: SectionDiff) -> List[str]:
+    """Template categories whose evidence lives in the changed sections."""
+    # Only the edited lines count, so a new benchmark row doesn't drag in every
+    # category the rest of its section happens to mention
+    touched = []
+    for change in diff.changed:
+        old_lines, new_lines = set(change["old"].splitlines()), set(change["new"].splitlines())
+        edited = "\n".join(sorted(old_lines ^ new_lines))
+        touched.append(f"{change['heading']}\n{edited}".lower())
+
+    categories = [
+        category
+        for category, keywords in CATEGORY_KEYWORDS.items()
+        if any(k in text for text in touched for k in keywords)
+    ]
+    if diff.changed and not categories:
+        # Edits that don't touch any category still affect how the card reads
+        categories.append("Clarity")
+    return categories
+
+
+def card_opening(sections: List[dict], limit: int = BASIC_INFO_CONTEXT_CHARS) -> str:
+    """The card's leading sections (front matter, title, overview), up to `limit` characters."""
+    parts: List[str] = []
+    size = 0
+    for section in sections:
+        if parts and size + len(section["text"]) > limit:
+            break
+        parts.append(section["text"])
+        size += len(section["text"])
+    return "\n\n".join(parts)[:limit]
+
+
+def build_update_prompt(
+    previous_md: str, diff: SectionDiff, categories: List[str], url: str, opening: Optional[str] = None
+) -> dict:
+    """
+    Prompt for re-scoring `categories`. With `opening` (the current card's
+    leading sections), Basic Info is requested for the current card too.
+    """
+    changes = "\n\n".join(
+        f"### {c['heading'] or '(untitled section)'}\nBEFORE:\n{c['old'] or '(new section)'}\n"
+        f"AFTER:\n{c['new'] or '(section removed)'}"
+        for c in diff.changed
+    ) or "(none)"
+    requested = []
+    if opening is not None:
+        fields = "\n".join(f"- **{name}:**  " for name in BASIC_INFO_FIELDS)
+        requested.append(
+            "Fill this section for the current card, from its opening below (not from the previous evaluation):\n\n"
+            f"{BASIC_INFO_HEADING}\n{fields}\n\n"
+            f"CURRENT CARD OPENING:\n{opening}\n"
+        )
+    if categories:
+        standards_rows = "\n".join(f"| {CATEGORY_STANDARDS[c]} |  |  |" for c in categories)
+        scoring_rows = "\n".join(f"| {c} |  |" for c in categories)
+        requested.append(
+            "Fill these two tables for the current card (same columns, only these rows):\n\n"
+            "| Standard Item | Status | Notes |\n"
+            "|----------------|---------|-------|\n"
+            f"{standards_rows}\n\n"
+            "| Category | Score (0–3) |\n"
+            "|-----------|-------------|\n"
+            f"{scoring_rows}\n"
+        )
+    user = (
+        "PREVIOUS EVALUATION:\n---\n"
+        f"{previous_md.strip()}\n"
+        "---\n\n"
+        f"URL: {url}\n\n"
+        f"CHANGED SECTIONS:\n{changes}\n\n"
+        + "\n".join(requested)
+    )
+    return {"system": UPDATE_SYSTEM_PROMPT, "user": user}
+
+
+def _row_cells(line: str) -> List[str]:
+    return [p.strip() for p in line.strip().strip("|").split("|")]
+
+
+def _norm(name: str) -> str:
+    return re.sub(r"\*+", "", name).strip().lower()
+
+
+def _standards_key(name: str) -> str:
+    # LLM output varies the tail ("Reproducibility (code, configs)"); match on the first word
+    words = _norm(name).split()
+    return words[0] if words else ""
+
+
+def _basic_info_lines(filled_md: str) -> List[str]:
+    """The field lines of the Basic Info section (up to its closing '---' or the next heading)."""
+    lines: List[str] = []
+    inside = False
+    for line in filled_md.splitlines():
+        stripped = line.strip()
+        if stripped.startswith("## "):
+            if inside:
+                break
+            inside = stripped.lower() == BASIC_INFO_HEADING.lower()
+        elif inside:
+            if stripped == "---":
+                break
+            if stripped:
+                lines.append(line.rstrip())
+    return lines
+
+
+def replace_basic_info(previous_md: str, update_md: str) -> Optional[str]:
+    """`previous_md` with its Basic Info fields taken from `update_md`; None if the update has none."""
+    fields = _basic_info_lines(update_md)
+    if not any(BASIC_INFO_FIELDS[0] in line for line in fields):
+        return None
+    out: List[str] = []
+    inside = replaced = False
+    for line in previous_md.splitlines():
+        stripped = line.strip()
+        if stripped.startswith("## "):
+            inside = stripped.lower() == BASIC_INFO_HEADING.lower() and not replaced
+            out.append(line)
+            if inside:
+                out.extend(fields)
+                out.append("")
+                replaced = True
+            continue
+        if inside:
+            if stripped != "---":
+                continue
+            inside = False
+        out.append(line)
+    return "\n".join(out) if replaced else None
+
+
+def merge_update(previous_md: str, update_md: str, categories: List[str], basic_info: bool = False) -> Optional[str]:
+    """
+    Replace the re-scored standards and scoring rows of `previous_md` with the
+    rows from `update_md`, then rewrite the Total row as the sum of categories.
+    With `basic_info`, the Basic Info fields are replaced from `update_md` too.
+    Returns None if the update doesn't cover everything requested.
+    """
+    if basic_info:
+        previous_md = replace_basic_info(previous_md, update_md)
+        if previous_md is None:
+            return None
+    wanted_scores = {_norm(c): c for c in categories}
+    wanted_standards = {_standards_key(CATEGORY_STANDARDS[c]) for c in categories}
+
+    new_scores: Dict[str, str] = {}
+    new_standards: Dict[str, str] = {}
+    for line in update_md.splitlines():
+        if not line.strip().startswith("|"):
+            continue
+        cells = _row_cells(line)
+        if len(cells) >= 3 and _standards_key(cells[0]) in wanted_standards and cells[1]:
+            new_standards[_standards_key(cells[0])] = line.strip()
+        elif len(cells) >= 2 and _norm(cells[0]) in wanted_scores and SCORE_CELL_RE.search(cells[1]):
+            new_scores[_norm(cells[0])] = line.strip()
+    if set(new_scores) != set(wanted_scores):
+        return None
+
+    out: List[str] = []
+    section = None
+    for line in previous_md.splitlines():
+        stripped = line.strip()
+        if stripped.startswith("## "):
+            section = "standards" if stripped.startswith("## 2") else "scoring" if stripped.startswith("## 4") else None
+        elif stripped.startswith("|") and section == "standards":
+            key = _standards_key(_row_cells(stripped)[0])
+            if key in new_standards:
+                line = new_standards[key]
+        elif stripped.startswith("|") and section == "scoring":
+            name = _norm(_row_cells(stripped)[0])
+            if name in new_scores:
+                line = new_scores[name]
+        out.append(line)
+    return reconcile_total("\n".join(out))[0]
+
+
+def reconcile_total(filled_md: str) -> Tuple[str, Optional[int], bool]:
+    """
+    Rewrite the scoring table's Total row as the sum of its category rows.
+    Returns (markdown, total, whether the stated total disagreed); the total is
+    None when there is no scoring table.
+    """
+    out: List[str] = []
+    in_scoring = False
+    total = 0
+    seen_scores = False
+    total_idx = None
+    for line in filled_md.splitlines():
+        stripped = line.strip()
+        if stripped.startswith("## "):
+            in_scoring = stripped.startswith("## 4")
+        elif stripped.startswith("|") and in_scoring:
+            cells = _row_cells(stripped)
+            name = _norm(cells[0])
+            if "total" in name:
+                total_idx = len(out)
+            elif len(cells) > 1 and not name.startswith("category"):
+                m = SCORE_CELL_RE.search(cells[1])
+                if m:
+                    total += int(m.group(0))
+                    seen_scores = True
+        out.append(line)
+
+    if total_idx is None or not seen_scores:
+        return filled_md, None, False
+    stated_cells = _row_cells(out[total_idx])
+    stated = SCORE_CELL_RE.search(stated_cells[1]) if len(stated_cells) > 1 else None
+    disagreed = stated is None or int(stated.group(0)) != total
+    if disagreed:
+        out[total_idx] = f"| **Total (/30)** | **{total} / 30** |"
+    return "\n".join(out), total, disagreed
+
+
+class SectionSnapshotStore:
+    """Sectioned page text and filled evaluation of the last grade per URL."""
+
+    def __init__(self, path: str):
+        self._lock = threading.Lock()
+        if path != ":memory:":
+            pathlib.Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS card_sections (
+                url TEXT NOT NULL,
+                fingerprint TEXT NOT NULL,
+                sections TEXT NOT NULL,
+                filled_markdown TEXT NOT NULL,
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (url, fingerprint)
+            )
+            """
+        )
+
+    def get(self, url: str, fingerprint: str) -> Optional[tuple]:
+        """Return (sections, filled_markdown) for the last evaluation, if any."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT sections, filled_markdown FROM card_sections WHERE url = ? AND fingerprint = ?",
+                (url, fingerprint),
+            ).fetchone()
+        if row is None:
+            return None
+        return json.loads(row[0]), row[1]
+
+    def put(self, url: str, fingerprint: str, sections: List[dict], filled_markdown: str) -> None:
+        with self._lock:
+            self._conn.execute(
+                """
+                INSERT OR REPLACE INTO card_sections (url, fingerprint, sections, filled_markdown, updated_at)
+                VALUES (?, ?, ?, ?, ?)
+                """,
+                (url, fingerprint, json.dumps(sections), filled_markdown, time.time()),
+            )
+
+    def invalidate(self, url: Optional[str] = None) -> int:
+        """Forget snapshots for `url`, or all of them."""
+        with self._lock:
+            if url is None:
+                cur = self._conn.execute("DELETE FROM card_sections")
+            else:
+                cur = self._conn.execute("DELETE FROM card_sections WHERE url = ?", (url,))
+            return cur.rowcount
@@ -0,0 +1,126 @@
+"""
+Bounded in-process store for asynchronous grading jobs.
+
+A job records its stage transitions (fetching, prompting, generating, parsing,
+done) so clients can poll for status or follow a server-sent event stream
+instead of holding one request open for the whole LLM call. Finished jobs expire
+after `ttl_seconds`, and the store never holds more than `max_jobs` entries.
+"""
+
+import asyncio
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Callable, List, Optional
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+ERROR = "error"
+
+
+class JobStoreFull(Exception):
+    pass
+
+
+@dataclass
+class Job:
+    id: str
+    url: str
+    flight_key: str
+    status: str = QUEUED
+    stage: str = QUEUED
+    result: Optional[dict] = None
+    error: Optional[str] = None
+    created_at: float = field(default_factory=time.time)
+    updated_at: float = field(default_factory=time.time)
+    events: List[dict] = field(default_factory=list)
+    # (stage, seconds) pairs from src/metrics.py, filled while the job runs
+    timings: list = field(default_factory=list)
+    _changed: asyncio.Event = field(default_factory=asyncio.Event, repr=False)
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (DONE, ERROR)
+
+    async def wait_for_change(self, seen: int, timeout: float) -> None:
+        """Wait until more than `seen` events exist (or the timeout passes)."""
+        if len(self.events) > seen or self.finished:
+            return
+        try:
+            await asyncio.wait_for(self._changed.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            pass
+
+
+class JobStore:
+    def __init__(
+        self, max_jobs: int = 1000, ttl_seconds: float = 3600, on_change: Optional[Callable[[Job], None]] = None
+    ):
+        self.max_jobs = max_jobs
+        self.ttl_seconds = ttl_seconds
+        # Called after every transition (e.g. to publish the job to other workers)
+        self.on_change = on_change
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+
+    def create(self, url: str, flight_key: str) -> Job:
+        self._expire()
+        if len(self._jobs) >= self.max_jobs:
+            # Make room by dropping the oldest finished job
+            for job_id, job in self._jobs.items():
+                if job.finished:
+                    del self._jobs[job_id]
+                    break
+            else:
+                raise JobStoreFull(f"Too many active jobs (max {self.max_jobs})")
+
+        job = Job(id=uuid.uuid4().hex, url=url, flight_key=flight_key)
+        self._jobs[job.id] = job
+        self._record(job, QUEUED)
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        self._expire()
+        return self._jobs.get(job_id)
+
+    def publish_stage(self, flight_key: str, stage: str) -> None:
+        """Advance every unfinished job attached to the evaluation `flight_key`."""
+        for job in self._jobs.values():
+            if job.flight_key == flight_key and not job.finished and job.stage != stage:
+                job.status = RUNNING
+                self._record(job, stage)
+
+    def finish(self, job: Job, result: dict) -> None:
+        job.status = DONE
+        job.result = result
+        self._record(job, DONE)
+
+    def fail(self, job: Job, error: str) -> None:
+        job.status = ERROR
+        job.error = error
+        self._record(job, ERROR, error=error)
+
+    def __len__(self) -> int:
+        return len(self._jobs)
+
+    def _record(self, job: Job, stage: str, **extra) -> None:
+        now = time.time()
+        job.stage = stage
+        job.updated_at = now
+        job.events.append({"stage": stage, "at": now, **extra})
+        # Wake up any stream waiting on this job, then arm a fresh event
+        changed, job._changed = job._changed, asyncio.Event()
+        changed.set()
+        if self.on_change:
+            self.on_change(job)
+
+    def _expire(self) -> None:
+        cutoff = time.time() - self.ttl_seconds
+        expired = [
+            job_id
+            for job_id, job in self._jobs.items()
+            if job.finished and job.updated_at < cutoff
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
@@ -0,0 +1,598 @@
+"""
+Resilient calls to an OpenAI-compatible API.
+
+`ResilientLLM` wraps an OpenAI / AsyncOpenAI client (created with
+max_retries=0 so retries aren't stacked) and adds:
+
+  * capped exponential backoff with full jitter between attempts,
+  * honoring Retry-After / retry-after-ms on 429 and 503 responses,
+  * a per-attempt timeout and an overall deadline for the whole call,
+  * remembering which API surface (Responses or Chat Completions) works,
+    instead of probing both on every attempt,
+  * a circuit breaker that fails fast after repeated upstream failures,
+  * optional hedging: a duplicate request is sent if the first hasn't
+    answered after `hedge_after` seconds, and the first answer wins,
+  * an optional `limiter` (an async context manager factory, e.g. a
+    cross-worker semaphore) held for the whole of each async call, and a
+    `before_attempt` hook on blocking calls, run before every request sent
+    (e.g. to charge a rate limiter for retries too),
+  * structured outputs: pass `json_schema={"name": ..., "schema": ...}` and
+    the answer is constrained to that JSON schema on either surface.
+
+Settings come from CARD_GRADER_LLM_* environment variables (see RetryPolicy).
+The `openai` package is imported only when an error has to be classified, by
+which time a client exists and the SDK is loaded anyway.
+"""
+
+import asyncio
+import logging
+import os
+import random
+import threading
+import time
+import weakref
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from contextlib import nullcontext
+from typing import AsyncContextManager, AsyncIterator, Callable, Optional
+
+try:
+    from src import metrics
+except ImportError:  # imported from within src/
+    import metrics
+
+logger = logging.getLogger("card_grader")
+
+RESPONSES = "responses"
+CHAT = "chat"
+
+# Status codes worth retrying; anything else from the API is the caller's fault
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504}
+# Status codes meaning the endpoint itself isn't served (e.g. no Responses API)
+UNSUPPORTED_STATUS = {404, 405, 501}
+
+
+class LLMCallError(RuntimeError):
+    """The call failed for good: attempts or deadline exhausted, or a non-retryable error."""
+
+
+class CircuitOpenError(LLMCallError):
+    """Upstream has been failing; calls are refused until the breaker's cool-down ends."""
+
+
+@dataclass
+class RetryPolicy:
+    max_attempts: int = 4
+    base_delay: float = 0.5  # seconds; doubled per attempt before jitter
+    max_delay: float = 20.0
+    attempt_timeout: float = 90.0
+    deadline: float = 180.0  # for the whole call, including backoff sleeps
+    hedge_after: Optional[float] = None  # seconds; None disables hedging
+
+    @classmethod
+    def from_env(cls) -> "RetryPolicy":
+        hedge_after = os.getenv("CARD_GRADER_LLM_HEDGE_AFTER")
+        return cls(
+            max_attempts=int(os.getenv("CARD_GRADER_LLM_MAX_ATTEMPTS", "4")),
+            base_delay=float(os.getenv("CARD_GRADER_LLM_BASE_DELAY", "0.5")),
+            max_delay=float(os.getenv("CARD_GRADER_LLM_MAX_DELAY", "20")),
+            attempt_timeout=float(os.getenv("CARD_GRADER_LLM_ATTEMPT_TIMEOUT", "90")),
+            deadline=float(os.getenv("CARD_GRADER_LLM_DEADLINE", "180")),
+            hedge_after=float(hedge_after) if hedge_after else None,
+        )
+
+    def backoff(self, attempt: int) -> float:
+        """Full-jitter delay before retry number `attempt` (1-based)."""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+
+
+class CircuitBreaker:
+    """
+    Opens after `failure_threshold` consecutive failures and refuses calls for
+    `reset_after` seconds; then lets one trial call through (half-open), which
+    closes it again on success.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_after: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_after = reset_after
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._trial_in_flight = False
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            if time.monotonic() - self._opened_at >= self.reset_after:
+                return "half-open"
+            return "open"
+
+    def check(self) -> bool:
+        """Raise CircuitOpenError unless a call may go through; True if it is the half-open trial."""
+        with self._lock:
+            if self._opened_at is None:
+                return False
+            waited = time.monotonic() - self._opened_at
+            if waited >= self.reset_after and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            raise CircuitOpenError(
+                f"LLM circuit breaker open after {self._failures} consecutive failures; "
+                f"retry in {max(0.0, self.reset_after - waited):.0f}s"
+            )
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._trial_in_flight or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+            self._trial_in_flight = False
+
+    def release_trial(self) -> None:
+        """End a trial that neither succeeded nor failed (e.g. cancelled); the next call becomes the trial."""
+        with self._lock:
+            self._trial_in_flight = False
+
+
+def status_of(err: Exception) -> Optional[int]:
+    return getattr(err, "status_code", None)
+
+
+def is_retryable(err: Exception) -> bool:
+    import openai
+
+    if isinstance(err, (openai.APITimeoutError, openai.APIConnectionError, asyncio.TimeoutError)):
+        return True
+    return status_of(err) in RETRYABLE_STATUS
+
+
+def is_outage(err: Exception) -> bool:
+    """Failures that count toward the circuit breaker; 429s are backpressure, not an outage."""
+    return is_retryable(err) and status_of(err) != 429
+
+
+def is_unsupported(err: Exception) -> bool:
+    """The endpoint itself isn't served (e.g. no Responses API), as opposed to an unknown model."""
+    if isinstance(err, AttributeError):
+        return True
+    return status_of(err) in UNSUPPORTED_STATUS and not is_model_error(err)
+
+
+def is_model_error(err: Exception) -> bool:
+    """The request named a model the server doesn't know (OpenAI answers 404 model_not_found)."""
+    if getattr(err, "code", None) == "model_not_found" or getattr(err, "param", None) == "model":
+        return True
+    return "model" in str(getattr(err, "message", None) or err).lower()
+
+
+def retry_after(err: Exception) -> Optional[float]:
+    """Seconds the server asked us to wait, from retry-after-ms or Retry-After."""
+    response = getattr(err, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+    ms = headers.get("retry-after-ms")
+    if ms:
+        try:
+            return max(0.0, float(ms) / 1000.0)
+        except ValueError:
+            pass
+    value = headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def attempt_outcome(err: Optional[BaseException]) -> str:
+    import openai
+
+    if err is None:
+        return "ok"
+    if isinstance(err, asyncio.CancelledError):
+        return "cancelled"  # lost a hedge race
+    if isinstance(err, (openai.APITimeoutError, asyncio.TimeoutError)):
+        return "timeout"
+    if isinstance(err, openai.APIConnectionError):
+        return "connection_error"
+    status = status_of(err)
+    if status == 429:
+        return "rate_limited"
+    if status is not None and status >= 500:
+        return "server_error"
+    if is_unsupported(err):
+        return "unsupported"
+    return "client_error"
+
+
+def record_attempt(api: str, started: float, err: Optional[BaseException] = None) -> None:
+    metrics.LLM_ATTEMPTS.inc(api=api, outcome=attempt_outcome(err))
+    metrics.LLM_ATTEMPT_SECONDS.observe(time.perf_counter() - started, api=api)
+
+
+def extract_usage(resp, api: str) -> dict:
+    """Normalize token usage (incl. provider-cached prompt tokens) from either API surface."""
+    usage = getattr(resp, "usage", None)
+    if usage is None:
+        return {"api": api, "input_tokens": None, "output_tokens": None, "cached_tokens": None}
+    if api == RESPONSES:
+        details = getattr(usage, "input_tokens_details", None)
+        input_tokens, output_tokens = usage.input_tokens, usage.output_tokens
+    else:
+        details = getattr(usage, "prompt_tokens_details", None)
+        input_tokens, output_tokens = usage.prompt_tokens, usage.completion_tokens
+    return {
+        "api": api,
+        "input_tokens": input_tokens,
+        "output_tokens": output_tokens,
+        "cached_tokens": getattr(details, "cached_tokens", None) if details else None,
+    }
+
+
+def _messages(system: str, user: str) -> list:
+    return [{"role": "system", "content": system}, {"role": "user", "content": user}]
+
+
+class ResilientLLM:
+    """Retrying, deadline-bounded calls over one OpenAI or AsyncOpenAI client."""
+
+    def __init__(self, client, policy: Optional[RetryPolicy] = None, breaker: Optional[CircuitBreaker] = None):
+        self.client = client
+        self.policy = policy or RetryPolicy.from_env()
+        self.breaker = breaker or CircuitBreaker(
+            failure_threshold=int(os.getenv("CARD_GRADER_LLM_BREAKER_THRESHOLD", "5")),
+            reset_after=float(os.getenv("CARD_GRADER_LLM_BREAKER_RESET", "30")),
+        )
+        # Surface that last worked; Responses is tried first until it's known to be missing
+        self.surface = RESPONSES
+        self.counters = {"calls": 0, "attempts": 0, "retries": 0, "hedges": 0, "failures": 0}
+        # Blocking calls update the counters from several threads
+        self._counters_lock = threading.Lock()
+        # Entered around every async call (retries included) to bound concurrency
+        self.limiter: Optional[Callable[[], AsyncContextManager]] = None
+
+    def stats(self) -> dict:
+        with self._counters_lock:
+            counters = dict(self.counters)
+        return {**counters, "surface": self.surface, "breaker": self.breaker.state}
+
+    def _count(self, name: str) -> None:
+        with self._counters_lock:
+            self.counters[name] += 1
+
+    # ----------------------------------------------------------------
+    # Single attempts
+    # ----------------------------------------------------------------
+    def _request(
+        self, surface: str, model: str, system: str, user: str, timeout: float, json_schema: Optional[dict] = None
+    ):
+        if surface == RESPONSES:
+            extra = {"text": {"format": {"type": "json_schema", "strict": True, **json_schema}}} if json_schema else {}
+            return self.client.responses.create(
+                model=model, instructions=system, input=user, temperature=0.0, timeout=timeout, **extra
+            )
+        extra = (
+            {"response_format": {"type": "json_schema", "json_schema": {"strict": True, **json_schema}}}
+            if json_schema
+            else {}
+        )
+        return self.client.chat.completions.create(
+            model=model, temperature=0.0, messages=_messages(system, user), timeout=timeout, **extra
+        )
+
+    def _result(self, surface: str, resp) -> tuple:
+        if surface == RESPONSES:
+            return resp.output_text, extract_usage(resp, RESPONSES)
+        return resp.choices[0].message.content, extract_usage(resp, CHAT)
+
+    async def _attempt_async(
+        self, surface: str, model: str, system: str, user: str, timeout: float, json_schema: Optional[dict] = None
+    ) -> tuple:
+        started = time.perf_counter()
+        try:
+            resp = await asyncio.wait_for(self._request(surface, model, system, user, timeout, json_schema), timeout)
+        except BaseException as e:
+            record_attempt(surface, started, e)
+            raise
+        record_attempt(surface, started)
+        return self._result(surface, resp)
+
+    async def _hedged_async(
+        self, surface: str, model: str, system: str, user: str, timeout: float, json_schema: Optional[dict] = None
+    ) -> tuple:
+        def attempt():
+            self._count("attempts")
+            return asyncio.ensure_future(self._attempt_async(surface, model, system, user, timeout, json_schema))
+
+        hedge_after = self.policy.hedge_after
+        first = attempt()
+        if hedge_after is None or hedge_after >= timeout:
+            return await first
+
+        pending = {first}
+        try:
+            done, _ = await asyncio.wait(pending, timeout=hedge_after)
+            if not done:
+                self._count("hedges")
+                pending.add(attempt())
+            last_err: Optional[BaseException] = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    last_err = task.exception()
+            raise last_err
+        finally:
+            for task in pending:
+                task.cancel()
+
+    # ----------------------------------------------------------------
+    # Retry loops
+    # ----------------------------------------------------------------
+    def _next_delay(self, err: Exception, attempt: int, max_attempts: int, deadline: float) -> Optional[float]:
+        """
+        Delay before the next attempt, or None to give up. Non-retryable errors,
+        the attempt limit and the deadline all end the call.
+        """
+        if not is_retryable(err) or attempt >= max_attempts:
+            return None
+        delay = retry_after(err)
+        if delay is None:
+            delay = self.policy.backoff(attempt)
+        if time.monotonic() + delay >= deadline:
+            return None
+        return delay
+
+    def _fallback_surface(self, surface: str, err: Exception) -> Optional[str]:
+        """Chat Completions if `err` shows the Responses endpoint is missing; this call tries it next."""
+        if surface == RESPONSES and is_unsupported(err):
+            logger.info("Responses API unavailable (%s); trying Chat Completions", err)
+            return CHAT
+        return None
+
+    def _remember_surface(self, surface: str) -> None:
+        """Keep the surface that answered, so later calls don't probe the missing one again."""
+        if surface != self.surface:
+            logger.info("Using %s from now on", "Chat Completions" if surface == CHAT else "the Responses API")
+            self.surface = surface
+
+    def _record_error(self, err: Exception) -> None:
+        """Outages count toward the breaker; any other answer from upstream shows it is up."""
+        if is_outage(err):
+            self.breaker.record_failure()
+        elif status_of(err) is not None:
+            self.breaker.record_success()
+
+    def _give_up(self, err: Exception, attempt: int) -> LLMCallError:
+        self._count("failures")
+        return LLMCallError(f"OpenAI call failed after {attempt} attempt(s): {str(err) or type(err).__name__}")
+
+    def _limit(self) -> AsyncContextManager:
+        return self.limiter() if self.limiter is not None else nullcontext()
+
+    async def complete(
+        self,
+        model: str,
+        system: str,
+        user: str,
+        on_usage: Optional[Callable[[dict], None]] = None,
+        max_attempts: Optional[int] = None,
+        json_schema: Optional[dict] = None,
+    ) -> str:
+        async with self._limit():
+            return await self._complete(model, system, user, on_usage, max_attempts, json_schema)
+
+    async def _complete(
+        self,
+        model: str,
+        system: str,
+        user: str,
+        on_usage: Optional[Callable[[dict], None]],
+        max_attempts: Optional[int],
+        json_schema: Optional[dict],
+    ) -> str:
+        self._count("calls")
+        policy = self.policy
+        max_attempts = max_attempts or policy.max_attempts
+        deadline = time.monotonic() + policy.deadline
+        surface = self.surface
+        attempt = 0
+        while True:
+            trial = self.breaker.check()
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                if trial:
+                    self.breaker.release_trial()
+                raise self._give_up(TimeoutError("deadline exceeded"), attempt)
+            attempt += 1
+            try:
+                text, usage = await self._hedged_async(
+                    surface, model, system, user, min(policy.attempt_timeout, remaining), json_schema
+                )
+            except Exception as e:
+                self._record_error(e)
+                fallback = self._fallback_surface(surface, e)
+                if fallback:
+                    surface = fallback
+                    attempt -= 1
+                    continue
+                delay = self._next_delay(e, attempt, max_attempts, deadline)
+                if delay is None:
+                    raise self._give_up(e, attempt) from e
+                self._count("retries")
+                logger.warning("LLM attempt %d failed (%s); retrying in %.2fs", attempt, e, delay)
+                await asyncio.sleep(delay)
+                continue
+            finally:
+                # Cancelled, or answered without settling the trial either way
+                if trial:
+                    self.breaker.release_trial()
+            self.breaker.record_success()
+            self._remember_surface(surface)
+            if on_usage:
+                on_usage(usage)
+            return text
+
+    def complete_sync(
+        self,
+        model: str,
+        system: str,
+        user: str,
+        on_usage: Optional[Callable[[dict], None]] = None,
+        max_attempts: Optional[int] = None,
+        json_schema: Optional[dict] = None,
+        before_attempt: Optional[Callable[[], None]] = None,
+    ) -> str:
+        """
+        Blocking variant of `complete` for an OpenAI client (no hedging).
+        `before_attempt` runs before every request, retries and the
+        Chat Completions fallback included.
+        """
+        self._count("calls")
+        policy = self.policy
+        max_attempts = max_attempts or policy.max_attempts
+        deadline = None
+        surface = self.surface
+        attempt = 0
+        while True:
+            if before_attempt is not None:
+                before_attempt()
+            if deadline is None:
+                # As with the async limiter, waiting before the first attempt isn't part of the deadline
+                deadline = time.monotonic() + policy.deadline
+            trial = self.breaker.check()
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                if trial:
+                    self.breaker.release_trial()
+                raise self._give_up(TimeoutError("deadline exceeded"), attempt)
+            attempt += 1
+            self._count("attempts")
+            started = time.perf_counter()
+            try:
+                resp = self._request(surface, model, system, user, min(policy.attempt_timeout, remaining), json_schema)
+                record_attempt(surface, started)
+            except Exception as e:
+                record_attempt(surface, started, e)
+                self._record_error(e)
+                fallback = self._fallback_surface(surface, e)
+                if fallback:
+                    surface = fallback
+                    attempt -= 1
+                    continue
+                delay = self._next_delay(e, attempt, max_attempts, deadline)
+                if delay is None:
+                    raise self._give_up(e, attempt) from e
+                self._count("retries")
+                logger.warning("LLM attempt %d failed (%s); retrying in %.2fs", attempt, e, delay)
+                time.sleep(delay)
+                continue
+            finally:
+                if trial:
+                    self.breaker.release_trial()
+            self.breaker.record_success()
+            self._remember_surface(surface)
+            text, usage = self._result(surface, resp)
+            if on_usage:
+                on_usage(usage)
+            return text
+
+    async def stream(
+        self,
+        model: str,
+        system: str,
+        user: str,
+        on_usage: Optional[Callable[[dict], None]] = None,
+    ) -> AsyncIterator[str]:
+        """
+        Yield output text incrementally (Chat Completions streaming). Only
+        opening the stream is retried; errors after the first token propagate.
+        """
+        async with self._limit():
+            async for delta in self._stream(model, system, user, on_usage):
+                yield delta
+
+    async def _stream(
+        self,
+        model: str,
+        system: str,
+        user: str,
+        on_usage: Optional[Callable[[dict], None]],
+    ) -> AsyncIterator[str]:
+        self._count("calls")
+        policy = self.policy
+        deadline = time.monotonic() + policy.deadline
+        attempt = 0
+        while True:
+            trial = self.breaker.check()
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                if trial:
+                    self.breaker.release_trial()
+                raise self._give_up(TimeoutError("deadline exceeded"), attempt)
+            attempt += 1
+            self._count("attempts")
+            started = time.perf_counter()
+            try:
+                stream = await asyncio.wait_for(
+                    self.client.chat.completions.create(
+                        model=model,
+                        temperature=0.0,
+                        stream=True,
+                        stream_options={"include_usage": True},
+                        messages=_messages(system, user),
+                        timeout=min(policy.attempt_timeout, remaining),
+                    ),
+                    min(policy.attempt_timeout, remaining),
+                )
+                record_attempt(CHAT, started)
+            except Exception as e:
+                record_attempt(CHAT, started, e)
+                self._record_error(e)
+                delay = self._next_delay(e, attempt, policy.max_attempts, deadline)
+                if delay is None:
+                    raise self._give_up(e, attempt) from e
+                self._count("retries")
+                await asyncio.sleep(delay)
+                continue
+            finally:
+                if trial:
+                    self.breaker.release_trial()
+            break
+
+        self.breaker.record_success()
+        async for event in stream:
+            if event.choices and event.choices[0].delta.content:
+                yield event.choices[0].delta.content
+            if getattr(event, "usage", None) is not None and on_usage:
+                # Sent on the final chunk when include_usage is set
+                on_usage(extract_usage(event, CHAT))
+
+
+# One wrapper per client, so surface memory and breaker state are shared by its callers
+_wrappers: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+_wrappers_lock = threading.Lock()
+
+
+def resilient(client) -> ResilientLLM:
+    with _wrappers_lock:
+        wrapper = _wrappers.get(client)
+        if wrapper is None:
+            wrapper = _wrappers[client] = ResilientLLM(client)
+        return wrapper
@@ -0,0 +1,245 @@
+"""
+Prometheus metrics and per-request stage timings.
+
+A small in-process registry of counters and histograms rendered in the
+Prometheus text format (served by server.py at /metrics). Stage timings are
+also collected per request through a context variable, so the backend can
+report them in a `Server-Timing` header:
+
+    timings = begin_timings()
+    with timed("fetch"):
+        ...
+    server_timing(timings)  # 'fetch;dur=41.2'
+
+Anything started from the request (tasks, to_thread calls) shares its timings.
+"""
+
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# Seconds: from parser runs (sub-ms) up to slow LLM calls
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+SIZE_BUCKETS = (1_000, 5_000, 10_000, 25_000, 50_000, 100_000, 250_000, 500_000, 1_000_000)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Metric:
+    kind = ""
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict) -> Tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[n]) for n in self.labelnames)
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, help_text, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_labels(self.labelnames, key)} {_number(value)}")
+        return lines
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        # label values -> [per-bucket counts, sum, count]
+        self._series: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            series = self._series.setdefault(key, [[0] * len(self.buckets), 0.0, 0])
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][i] += 1
+                    break
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        with self._lock:
+            for key, (counts, total, count) in sorted(self._series.items()):
+                cumulative = 0
+                for bound, n in zip(self.buckets, counts):
+                    cumulative += n
+                    le = 'le="' + _number(bound) + '"'
+                    lines.append(f"{self.name}_bucket{_labels(self.labelnames, key, le)} {cumulative}")
+                lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {_number(total)}")
+                lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {count}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: List[Metric] = []
+
+    def register(self, metric: Metric) -> Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        return "\n".join(line for metric in self._metrics for line in metric.render()) + "\n"
+
+
+REGISTRY = Registry()
+
+STAGE_SECONDS = REGISTRY.register(Histogram(
+    "card_grader_stage_seconds", "Time spent in each evaluation stage.", ["stage"]))
+REQUEST_SECONDS = REGISTRY.register(Histogram(
+    "card_grader_request_seconds", "HTTP request latency by route.", ["route"]))
+REQUESTS = REGISTRY.register(Counter(
+    "card_grader_requests_total", "HTTP requests by route and status code.", ["route", "status"]))
+EVALUATIONS = REGISTRY.register(Counter(
+    "card_grader_evaluations_total",
+    "Grades by how they were produced (recent, stale, cached, full, incremental, unchanged, derived).",
+    ["result"]))
+LLM_ATTEMPTS = REGISTRY.register(Counter(
+    "card_grader_llm_attempts_total", "LLM API attempts by API surface and outcome.", ["api", "outcome"]))
+LLM_ATTEMPT_SECONDS = REGISTRY.register(Histogram(
+    "card_grader_llm_attempt_seconds", "Latency of single LLM API attempts.", ["api"]))
+LLM_TOKENS = REGISTRY.register(Counter(
+    "card_grader_llm_tokens_total", "LLM tokens by kind (input, output, cached input).", ["kind"]))
+PREGRADES = REGISTRY.register(Counter(
+    "card_grader_pregrades_total", "Background re-checks by reason (stale, watchlist) and outcome.",
+    ["reason", "outcome"]))
+CASCADE = REGISTRY.register(Counter(
+    "card_grader_cascade_total",
+    "Model cascade decisions by answering tier: fast answers accepted, escalations to the full tier by reason.",
+    ["tier", "reason"]))
+PAGE_TEXT_CHARS = REGISTRY.register(Histogram(
+    "card_grader_page_text_chars", "Card page text size as fetched and as sent in the prompt.", ["phase"],
+    buckets=SIZE_BUCKETS))
+
+
+# --------------------------------------------------------------------
+# Per-request stage timings
+# --------------------------------------------------------------------
+_timings: contextvars.ContextVar[Optional[List[Tuple[str, float]]]] = contextvars.ContextVar(
+    "card_grader_timings", default=None
+)
+
+
+def begin_timings() -> List[Tuple[str, float]]:
+    """Start collecting (stage, seconds) pairs for the current request."""
+    timings: List[Tuple[str, float]] = []
+    _timings.set(timings)
+    return timings
+
+
+def record_stage(stage: str, seconds: float) -> None:
+    STAGE_SECONDS.observe(seconds, stage=stage)
+    timings = _timings.get()
+    if timings is not None:
+        timings.append((stage, seconds))
+
+
+@contextmanager
+def timed(stage: str):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(stage, time.perf_counter() - start)
+
+
+def server_timing(timings: List[Tuple[str, float]], total: Optional[float] = None) -> str:
+    """Format timings as a Server-Timing header value; repeated stages are summed."""
+    merged: Dict[str, float] = {}
+    for stage, seconds in timings:
+        merged[stage] = merged.get(stage, 0.0) + seconds
+    if total is not None:
+        merged["total"] = total
+    return ", ".join(f"{stage};dur={seconds * 1000:.1f}" for stage, seconds in merged.items())
+
+
+def timings_ms(timings: List[Tuple[str, float]]) -> Dict[str, float]:
+    merged: Dict[str, float] = {}
+    for stage, seconds in timings:
+        merged[stage] = round(merged.get(stage, 0.0) + seconds * 1000, 1)
+    return merged
+
+
+class ServerTimingMiddleware:
+    """
+    ASGI middleware that collects stage timings for each HTTP request, adds
+    them as a Server-Timing header (unless the endpoint set one) and records
+    request counts and latency per route.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timings = begin_timings()
+        start = time.perf_counter()
+        status = [500]
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+                headers = list(message.get("headers", []))
+                names = {name.lower(): value for name, value in headers}
+                streaming = names.get(b"content-type", b"").startswith((b"text/event-stream", b"application/x-ndjson"))
+                # Streamed bodies are produced after the headers go out; nothing to report yet
+                if b"server-timing" not in names and not streaming:
+                    value = server_timing(timings, time.perf_counter() - start)
+                    headers.append((b"server-timing", value.encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            route = getattr(scope.get("route"), "path", None) or "unmatched"
+            REQUESTS.inc(route=route, status=str(status[0]))
+            REQUEST_SECONDS.observe(time.perf_counter() - start, route=route)
@@ -0,0 +1,197 @@
+"""
+Background pre-grading, so users rarely wait for a cold grade.
+
+`PregradeScheduler` runs inside the server process. Every `reload_seconds` it
+rebuilds a watchlist from its sources (a file of URLs, a Hub organization's
+models, the most requested cards of recent traffic) and re-checks the
+entries that are due: the card is fetched and graded unless its content still
+matches a cached grade. Work starts at most `rate_per_minute` times a minute,
+`max_concurrent` at a time, and only while `is_busy()` says LLM capacity
+isn't needed by requests.
+
+URLs whose cached grade was served past its soft TTL are queued with
+`request_refresh` and go before the watchlist.
+"""
+
+import asyncio
+import inspect
+import logging
+import os
+import time
+from collections import Counter, OrderedDict
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Union
+
+try:
+    from src import metrics, readme_fetch
+except ImportError:  # imported from within src/
+    import metrics
+    import readme_fetch
+
+logger = logging.getLogger("card_grader")
+
+# A watchlist source returns card URLs (most important first), directly or awaited
+Source = Callable[[], Union[Iterable[str], Awaitable[Iterable[str]]]]
+
+
+def file_source(path: str) -> Source:
+    """URLs listed in a text file, one per line (`#` starts a comment). Re-read on every reload."""
+
+    def read() -> List[str]:
+        with open(path, encoding="utf-8") as f:
+            lines = (line.split("#", 1)[0].strip() for line in f)
+            return [line for line in lines if line]
+
+    return read
+
+
+def org_source(client, orgs: List[str], limit: int = 50) -> Source:
+    """The `limit` most downloaded models of each Hub organization (httpx.AsyncClient)."""
+
+    async def list_models() -> List[str]:
+        headers = {}
+        token = os.getenv("HF_TOKEN")
+        if token:
+            headers["Authorization"] = f"Bearer {token}"
+        urls = []
+        for org in orgs:
+            resp = await client.get(
+                f"{readme_fetch.hf_endpoint()}/api/models",
+                params={"author": org, "sort": "downloads", "direction": "-1", "limit": str(limit)},
+                headers=headers,
+            )
+            resp.raise_for_status()
+            urls.extend(f"https://{readme_fetch.HF_HOST}/{model['id']}" for model in resp.json())
+        return urls
+
+    return list_models
+
+
+def traffic_source(recent, limit: int = 100) -> Source:
+    """The most requested cards (a shared_state.RecentRequests)."""
+    return lambda: recent.top(limit)
+
+
+class PregradeScheduler:
+    def __init__(
+        self,
+        refresh: Callable[[str], Awaitable[str]],
+        is_due: Callable[[str], bool],
+        sources: Dict[str, Source],
+        rate_per_minute: float = 6.0,
+        max_concurrent: int = 2,
+        reload_seconds: float = 600.0,
+        normalize: Callable[[str], str] = lambda url: url,
+        is_busy: Callable[[], bool] = lambda: False,
+        is_leader: Callable[[], bool] = lambda: True,
+    ):
+        """
+        `refresh(url)` re-checks one card and returns how it went (e.g.
+        "graded" or "current"); `is_due(url)` tells whether a watched card
+        needs it. Only the worker for which `is_leader()` holds scans the
+        watchlist; every worker serves its own refresh requests.
+        """
+        self.refresh = refresh
+        self.is_due = is_due
+        self.sources = sources
+        self.interval = 60.0 / rate_per_minute
+        self.reload_seconds = reload_seconds
+        self.normalize = normalize
+        self.is_busy = is_busy
+        self.is_leader = is_leader
+        self.outcomes: Counter = Counter()
+        self.watchlist_size = 0
+        self.last_reload: Optional[float] = None
+        self._slots = asyncio.Semaphore(max_concurrent)
+        self._requested: "OrderedDict[str, None]" = OrderedDict()
+        self._due: "OrderedDict[str, None]" = OrderedDict()
+        self._running: set = set()
+        self._tasks: set = set()
+        self._wake = asyncio.Event()
+
+    def request_refresh(self, url: str) -> None:
+        """Queue a refresh of `url` ahead of the watchlist (no-op if one is queued or running)."""
+        url = self.normalize(url)
+        if url not in self._running and url not in self._requested:
+            self._requested[url] = None
+            self._due.pop(url, None)
+            self._wake.set()
+
+    def stats(self) -> dict:
+        return {
+            "watchlist": self.watchlist_size,
+            "due": len(self._due),
+            "refresh_queued": len(self._requested),
+            "running": len(self._running),
+            "outcomes": dict(self.outcomes),
+            "last_reload": self.last_reload,
+        }
+
+    async def run(self) -> None:
+        """Schedule refreshes until cancelled."""
+        next_reload = 0.0
+        try:
+            while True:
+                if time.monotonic() >= next_reload:
+                    next_reload = time.monotonic() + self.reload_seconds
+                    await self.reload()
+                await self._slots.acquire()
+                if self.is_busy() or not (self._requested or self._due):
+                    self._slots.release()
+                    self._wake.clear()
+                    try:
+                        await asyncio.wait_for(self._wake.wait(), timeout=self.interval)
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+
+                if self._requested:
+                    url, reason = self._requested.popitem(last=False)[0], "stale"
+                else:
+                    url, reason = self._due.popitem(last=False)[0], "watchlist"
+                self._running.add(url)
+                task = asyncio.create_task(self._refresh_one(url, reason))
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+                await asyncio.sleep(self.interval)
+        finally:
+            for task in self._tasks:
+                task.cancel()
+
+    async def reload(self) -> None:
+        """Rebuild the watchlist and queue the entries that are due."""
+        self.last_reload = time.time()
+        if not self.is_leader():
+            self._due.clear()
+            self.watchlist_size = 0
+            return
+
+        watchlist: "OrderedDict[str, None]" = OrderedDict()
+        for name, source in self.sources.items():
+            try:
+                urls = source()
+                if inspect.isawaitable(urls):
+                    urls = await urls
+                for url in urls:
+                    watchlist[self.normalize(url)] = None
+            except Exception as e:
+                logger.warning("pre-grade watchlist source %s failed: %s", name, e)
+        self.watchlist_size = len(watchlist)
+        self._due = OrderedDict(
+            (url, None)
+            for url in watchlist
+            if url not in self._running and url not in self._requested and self.is_due(url)
+        )
+
+    async def _refresh_one(self, url: str, reason: str) -> None:
+        try:
+            outcome = await self.refresh(url)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            outcome = "failed"
+            logger.warning("pre-grade of %s failed: %s", url, e)
+        finally:
+            self._running.discard(url)
+            self._slots.release()
+        self.outcomes[outcome] += 1
+        metrics.PREGRADES.inc(reason=reason, outcome=outcome)
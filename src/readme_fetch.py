@@ -0,0 +1,216 @@
+"""
+Fetch a Hugging Face card's raw README.md with conditional GETs.
+
+The rendered model page is mostly navigation chrome, file listings and widgets;
+the repo's README.md (YAML front matter plus markdown) is the card itself and is
+much smaller. ETag / Last-Modified validators are kept in a small SQLite store
+so a re-fetch of an unchanged card is a cheap 304. Entries not revalidated
+within `ttl_seconds` are dropped, and the least recently fetched ones are
+evicted once the store grows past `max_entries`.
+
+`HF_ENDPOINT` (as used by huggingface_hub) points fetches at another host, e.g.
+a local stand-in server; `HF_TOKEN` is sent for gated repos.
+"""
+
+import os
+import pathlib
+import sqlite3
+import threading
+import time
+from typing import Optional, Tuple
+from urllib.parse import urlsplit
+
+HF_HOST = "huggingface.co"
+
+# First path segments that are site pages rather than repos
+RESERVED_PREFIXES = {
+    "api", "blog", "collections", "docs", "join", "learn", "login", "models",
+    "organizations", "papers", "posts", "pricing", "settings", "spaces", "tasks",
+}
+
+
+def hf_endpoint() -> str:
+    return os.getenv("HF_ENDPOINT", f"https://{HF_HOST}").rstrip("/")
+
+
+def hub_url(url: str) -> str:
+    """Point a huggingface.co URL at HF_ENDPOINT (unchanged when it isn't overridden)."""
+    parts = urlsplit(url)
+    if parts.netloc.lower() not in (HF_HOST, f"www.{HF_HOST}"):
+        return url
+    rest = parts.path + (f"?{parts.query}" if parts.query else "")
+    return hf_endpoint() + rest
+
+
+def readme_url(url: str) -> Optional[str]:
+    """
+    Map a model or dataset page URL to its raw README.md, e.g.
+    https://huggingface.co/org/name/tree/dev -> <endpoint>/org/name/raw/dev/README.md.
+    Returns None for URLs that aren't a repo page.
+    """
+    parts = urlsplit(url)
+    if parts.netloc.lower() not in (HF_HOST, f"www.{HF_HOST}"):
+        return None
+
+    segments = [s for s in parts.path.split("/") if s]
+    prefix = ""
+    if segments and segments[0] == "datasets":
+        prefix = "/datasets"
+        segments = segments[1:]
+    if len(segments) < 2 or segments[0] in RESERVED_PREFIXES:
+        return None
+
+    repo = "/".join(segments[:2])
+    revision = "main"
+    if len(segments) >= 4 and segments[2] in ("tree", "blob", "resolve", "raw"):
+        revision = segments[3]
+    return f"{hf_endpoint()}{prefix}/{repo}/raw/{revision}/README.md"
+
+
+# Sent when refetching after a 304 for an entry we don't have
+UNCONDITIONAL = {"Cache-Control": "no-cache"}
+
+
+def request_headers(cached: Optional[Tuple[Optional[str], Optional[str], str]]) -> dict:
+    headers = {}
+    token = os.getenv("HF_TOKEN")
+    if token:
+        headers["Authorization"] = f"Bearer {token}"
+    if cached is not None:
+        etag, last_modified, _ = cached
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+    return headers
+
+
+class ValidatorStore:
+    """Last body plus ETag / Last-Modified per raw URL, persisted in SQLite."""
+
+    def __init__(self, path: str, ttl_seconds: float = 7 * 24 * 3600, max_entries: int = 5000):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        if path != ":memory:":
+            pathlib.Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS conditional_fetch (
+                url TEXT PRIMARY KEY,
+                etag TEXT,
+                last_modified TEXT,
+                body TEXT NOT NULL,
+                fetched_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_conditional_fetch_fetched ON conditional_fetch(fetched_at)"
+        )
+
+    def get(self, url: str) -> Optional[Tuple[Optional[str], Optional[str], str]]:
+        """Validators and body for `url`, or None on a miss / expired entry."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT etag, last_modified, body, fetched_at FROM conditional_fetch WHERE url = ?", (url,)
+            ).fetchone()
+            if row is None:
+                return None
+            if time.time() - row[3] > self.ttl_seconds:
+                self._conn.execute("DELETE FROM conditional_fetch WHERE url = ?", (url,))
+                return None
+        return tuple(row[:3])
+
+    def touch(self, url: str) -> None:
+        """Record that the stored body was just revalidated (a 304)."""
+        with self._lock:
+            self._conn.execute("UPDATE conditional_fetch SET fetched_at = ? WHERE url = ?", (time.time(), url))
+
+    def put(self, url: str, etag: Optional[str], last_modified: Optional[str], body: str) -> None:
+        with self._lock:
+            self._conn.execute(
+                """
+                INSERT OR REPLACE INTO conditional_fetch (url, etag, last_modified, body, fetched_at)
+                VALUES (?, ?, ?, ?, ?)
+                """,
+                (url, etag, last_modified, body, time.time()),
+            )
+            self._evict_locked()
+
+    def _evict_locked(self) -> None:
+        self._conn.execute("DELETE FROM conditional_fetch WHERE fetched_at < ?", (time.time() - self.ttl_seconds,))
+        count = self._conn.execute("SELECT COUNT(*) FROM conditional_fetch").fetchone()[0]
+        overflow = count - self.max_entries
+        if overflow > 0:
+            self._conn.execute(
+                """
+                DELETE FROM conditional_fetch WHERE url IN (
+                    SELECT url FROM conditional_fetch ORDER BY fetched_at ASC LIMIT ?
+                )
+                """,
+                (overflow,),
+            )
+
+
+_store: Optional[ValidatorStore] = None
+
+
+def get_store() -> ValidatorStore:
+    """Process-wide validator store, created on first use."""
+    global _store
+    if _store is None:
+        _store = ValidatorStore(
+            os.getenv("CARD_GRADER_FETCH_CACHE_PATH", ".cache/fetch.sqlite3"),
+            ttl_seconds=float(os.getenv("CARD_GRADER_FETCH_CACHE_TTL", str(7 * 24 * 3600))),
+            max_entries=int(os.getenv("CARD_GRADER_FETCH_CACHE_MAX_ENTRIES", "5000")),
+        )
+    return _store
+
+
+def _handle_response(raw: str, status: int, headers, text: str, cached, store) -> Optional[str]:
+    if status == 304:
+        if cached is None:
+            # Only possible after the unconditional retry; never store an empty body
+            raise RuntimeError(f"README fetch answered 304 without a cached copy: {raw}")
+        store.touch(raw)
+        return cached[2]
+    if status in (401, 403, 404):
+        # Missing, private or gated without a token: let the caller fall back
+        return None
+    if status >= 400:
+        raise RuntimeError(f"README fetch failed with HTTP {status}: {raw}")
+    store.put(raw, headers.get("ETag"), headers.get("Last-Modified"), text)
+    return text
+
+
+def fetch_readme_text(url: str, session, store: Optional[ValidatorStore] = None) -> Optional[str]:
+    """Fetch the raw README for `url` with a requests session; None if unavailable."""
+    raw = readme_url(url)
+    if raw is None:
+        return None
+    store = store or get_store()
+    cached = store.get(raw)
+    resp = session.get(raw, headers=request_headers(cached), timeout=30)
+    if resp.status_code == 304 and cached is None:
+        # Not modified relative to nothing we hold (e.g. a caching proxy): a miss
+        resp = session.get(raw, headers=UNCONDITIONAL | request_headers(None), timeout=30)
+    return _handle_response(raw, resp.status_code, resp.headers, resp.text, cached, store)
+
+
+async def fetch_readme_text_async(url: str, client, store: Optional[ValidatorStore] = None) -> Optional[str]:
+    """Async variant of fetch_readme_text over an httpx.AsyncClient."""
+    raw = readme_url(url)
+    if raw is None:
+        return None
+    store = store or get_store()
+    cached = store.get(raw)
+    resp = await client.get(raw, headers=request_headers(cached), timeout=30, follow_redirects=True)
+    if resp.status_code == 304 and cached is None:
+        # Not modified relative to nothing we hold (e.g. a caching proxy): a miss
+        resp = await client.get(
+            raw, headers=UNCONDITIONAL | request_headers(None), timeout=30, follow_redirects=True
+        )
+    return _handle_response(raw, resp.status_code, resp.headers, resp.text, cached, store)
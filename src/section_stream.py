@@ -0,0 +1,58 @@
+"""
+Incremental splitter for filled evaluations arriving as a token stream.
+
+Feed it text chunks as they come back from the model; it returns each
+`## ...` section as soon as the section is closed by a `---` rule (or by the
+next `## ` heading), so callers can parse early sections while later ones are
+still being generated.
+"""
+
+from typing import List, Optional, Tuple
+
+Section = Tuple[str, str]  # (heading text without "## ", full section markdown)
+
+
+class SectionStreamParser:
+    def __init__(self):
+        self._buffer = ""
+        self._heading: Optional[str] = None
+        self._lines: List[str] = []
+
+    def feed(self, chunk: str) -> List[Section]:
+        """Add a chunk of model output and return any sections it completed."""
+        self._buffer += chunk
+        *complete, self._buffer = self._buffer.split("\n")
+        sections: List[Section] = []
+        for line in complete:
+            sections.extend(self._handle_line(line))
+        return sections
+
+    def close(self) -> List[Section]:
+        """Flush whatever is left once the stream has ended."""
+        sections: List[Section] = []
+        if self._buffer:
+            sections.extend(self._handle_line(self._buffer))
+            self._buffer = ""
+        sections.extend(self._flush())
+        return sections
+
+    def _handle_line(self, line: str) -> List[Section]:
+        stripped = line.strip()
+        if stripped.startswith("## "):
+            sections = self._flush()
+            self._heading = stripped[3:].strip()
+            self._lines = [line]
+            return sections
+        if stripped.startswith("---") and self._heading is not None:
+            return self._flush()
+        if self._heading is not None:
+            self._lines.append(line)
+        return []
+
+    def _flush(self) -> List[Section]:
+        if self._heading is None:
+            return []
+        section = (self._heading, "\n".join(self._lines))
+        self._heading = None
+        self._lines = []
+        return [section]
@@ -0,0 +1,345 @@
+"""
+State shared by the worker processes of one server, kept in a local SQLite file.
+
+  * `LLMSlots` caps concurrent LLM calls across all workers. Callers wait in a
+    bounded per-worker queue; when it is full, or no slot frees up in time,
+    `Overloaded` is raised so the request can be answered with 429.
+  * `InflightLeases` lets a worker claim a cache key while it grades that
+    card text, so other workers wait for the cached result instead of making
+    the same LLM call.
+  * `SharedJobs` mirrors job status snapshots so any worker can answer
+    `GET /jobs/{id}` for a job started on another.
+  * `RecentRequests` logs which cards were requested, so the pre-grading
+    scheduler can keep the most visited ones warm.
+
+Slots and leases expire, so a crashed worker can't hold them forever.
+Writes made on behalf of requests run off the event loop (a worker thread),
+so a busy database never stalls a worker's other requests.
+"""
+
+import asyncio
+import logging
+import os
+import pathlib
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import List, Optional
+
+logger = logging.getLogger("card_grader")
+
+# Identifies this process as the owner of slots and leases
+WORKER_ID = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+
+POLL_INTERVAL = 0.05
+MAX_POLL_INTERVAL = 0.5
+# Polls run on the event loop: wait only briefly for another worker's write
+# lock, and count a busy database as "not acquired" until the next poll
+POLL_BUSY_TIMEOUT_MS = 5
+
+
+class Overloaded(Exception):
+    """Too many LLM calls are queued; retry after `retry_after` seconds."""
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def _connect(path: str, busy_timeout_ms: int = 5000) -> sqlite3.Connection:
+    if path != ":memory:":
+        pathlib.Path(path).parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    # Workers contend for the same rows; wait for the write lock instead of failing
+    conn.execute(f"PRAGMA busy_timeout={busy_timeout_ms}")
+    return conn
+
+
+def _is_busy(error: sqlite3.OperationalError) -> bool:
+    # Extended codes (SQLITE_BUSY_SNAPSHOT, ...) keep the primary code in the low byte
+    return (getattr(error, "sqlite_errorcode", 0) & 0xFF) in (sqlite3.SQLITE_BUSY, sqlite3.SQLITE_LOCKED)
+
+
+class LLMSlots:
+    """A cross-process semaphore of `max_concurrent` leased slots (0 disables the cap)."""
+
+    def __init__(
+        self,
+        path: str,
+        max_concurrent: int,
+        max_queue: int = 64,
+        queue_timeout: float = 30.0,
+        lease_seconds: float = 300.0,
+        retry_after: float = 5.0,
+    ):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.lease_seconds = lease_seconds
+        self.retry_after = retry_after
+        # Callers of this worker currently waiting for a slot
+        self.waiting = 0
+        self.rejected = 0
+        self._lock = threading.Lock()
+        self._conn = _connect(path)
+        self._poll_conn = _connect(path, POLL_BUSY_TIMEOUT_MS)
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS llm_slots (
+                slot INTEGER PRIMARY KEY,
+                holder TEXT,
+                expires_at REAL
+            )
+            """
+        )
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO llm_slots (slot) VALUES (?)", [(i,) for i in range(max_concurrent)]
+            )
+            self._conn.execute("DELETE FROM llm_slots WHERE slot >= ?", (max_concurrent,))
+            self._conn.execute("COMMIT")
+
+    def try_acquire(self, holder: str) -> Optional[int]:
+        """Lease a free slot to `holder`; None if all are taken or the database is busy."""
+        now = time.time()
+        with self._lock:
+            try:
+                self._poll_conn.execute("BEGIN IMMEDIATE")
+            except sqlite3.OperationalError as e:
+                if _is_busy(e):
+                    return None
+                raise
+            try:
+                row = self._poll_conn.execute(
+                    "SELECT slot FROM llm_slots WHERE holder IS NULL OR expires_at < ? LIMIT 1", (now,)
+                ).fetchone()
+                if row is not None:
+                    self._poll_conn.execute(
+                        "UPDATE llm_slots SET holder = ?, expires_at = ? WHERE slot = ?",
+                        (holder, now + self.lease_seconds, row[0]),
+                    )
+            finally:
+                self._poll_conn.execute("COMMIT")
+        return row[0] if row is not None else None
+
+    def release(self, slot: int, holder: str) -> None:
+        with self._lock:
+            self._conn.execute(
+                "UPDATE llm_slots SET holder = NULL, expires_at = NULL WHERE slot = ? AND holder = ?",
+                (slot, holder),
+            )
+
+    def in_use(self) -> int:
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM llm_slots WHERE holder IS NOT NULL AND expires_at >= ?", (time.time(),)
+            ).fetchone()[0]
+
+    def queue_full(self) -> bool:
+        return self.max_concurrent > 0 and self.waiting >= self.max_queue
+
+    def _reject(self, reason: str) -> Overloaded:
+        self.rejected += 1
+        return Overloaded(f"LLM capacity exhausted ({reason}); retry later", self.retry_after)
+
+    @asynccontextmanager
+    async def slot(self):
+        """Hold one slot for the duration of the block."""
+        if self.max_concurrent <= 0:
+            yield
+            return
+        if self.queue_full():
+            raise self._reject(f"{self.waiting} calls queued")
+
+        holder = f"{WORKER_ID}-{uuid.uuid4().hex[:8]}"
+        deadline = time.monotonic() + self.queue_timeout
+        delay = POLL_INTERVAL
+        self.waiting += 1
+        try:
+            while (slot := self.try_acquire(holder)) is None:
+                if time.monotonic() + delay > deadline:
+                    raise self._reject(f"no slot free within {self.queue_timeout:.0f}s")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, MAX_POLL_INTERVAL)
+        finally:
+            self.waiting -= 1
+        try:
+            yield
+        finally:
+            await asyncio.to_thread(self.release, slot, holder)
+
+
+class InflightLeases:
+    """Expiring per-key leases: at most one worker grades a given cache key at a time."""
+
+    def __init__(self, path: str, lease_seconds: float = 300.0):
+        self.lease_seconds = lease_seconds
+        self._lock = threading.Lock()
+        self._conn = _connect(path)
+        self._poll_conn = _connect(path, POLL_BUSY_TIMEOUT_MS)
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS inflight_leases (
+                key TEXT PRIMARY KEY,
+                owner TEXT NOT NULL,
+                expires_at REAL NOT NULL
+            )
+            """
+        )
+
+    def claim(self, key: str, owner: str = WORKER_ID, lease_seconds: Optional[float] = None) -> bool:
+        """
+        Claim or renew `key` for `owner` (for `lease_seconds`, default the
+        store's); False if it is held by another or the database is busy.
+        """
+        now = time.time()
+        if lease_seconds is None:
+            lease_seconds = self.lease_seconds
+        with self._lock:
+            try:
+                cur = self._poll_conn.execute(
+                    """
+                    INSERT INTO inflight_leases (key, owner, expires_at) VALUES (?, ?, ?)
+                    ON CONFLICT(key) DO UPDATE SET owner = excluded.owner, expires_at = excluded.expires_at
+                    WHERE inflight_leases.expires_at < ? OR inflight_leases.owner = excluded.owner
+                    """,
+                    (key, owner, now + lease_seconds, now),
+                )
+            except sqlite3.OperationalError as e:
+                if _is_busy(e):
+                    return False
+                raise
+            return cur.rowcount > 0
+
+    def release(self, key: str, owner: str = WORKER_ID) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM inflight_leases WHERE key = ? AND owner = ?", (key, owner))
+
+    @asynccontextmanager
+    async def hold(self, key: str):
+        """
+        Hold `key` for the duration of the block, waiting while anyone else
+        (another worker, or another request of this one) holds it. Yields
+        True if we had to wait (the holder's result may be cached by now).
+        """
+        # Each hold is its own owner; renewing by owner is for long-lived
+        # holders such as the pre-grading leader
+        owner = f"{WORKER_ID}-{uuid.uuid4().hex[:8]}"
+        waited = False
+        delay = POLL_INTERVAL
+        while not self.claim(key, owner):
+            waited = True
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, MAX_POLL_INTERVAL)
+        try:
+            yield waited
+        finally:
+            await asyncio.to_thread(self.release, key, owner)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM inflight_leases WHERE expires_at >= ?", (time.time(),)
+            ).fetchone()[0]
+
+
+def _log_failure(future: Future) -> None:
+    if future.exception() is not None:
+        logger.warning("Could not write a job snapshot: %s", future.exception())
+
+
+class SharedJobs:
+    """Latest status snapshot (JSON) of each job, readable from every worker."""
+
+    def __init__(self, path: str, ttl_seconds: float = 3600):
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="job-snapshots")
+        self._conn = _connect(path)
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS job_snapshots (
+                id TEXT PRIMARY KEY,
+                payload TEXT NOT NULL,
+                updated_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_job_snapshots_updated ON job_snapshots(updated_at)")
+
+    def put(self, job_id: str, payload: str) -> Future:
+        """
+        Queue the snapshot for writing and return at once. Writes run on one
+        thread in call order, so a job's last status is the one kept.
+        """
+        future = self._writer.submit(self._put, job_id, payload)
+        future.add_done_callback(_log_failure)
+        return future
+
+    async def flush(self) -> None:
+        """Wait until every snapshot queued so far is written (visible to other workers)."""
+        await asyncio.wrap_future(self._writer.submit(lambda: None))
+
+    def _put(self, job_id: str, payload: str) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO job_snapshots (id, payload, updated_at) VALUES (?, ?, ?)",
+                (job_id, payload, now),
+            )
+            self._conn.execute("DELETE FROM job_snapshots WHERE updated_at < ?", (now - self.ttl_seconds,))
+
+    def get(self, job_id: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT payload FROM job_snapshots WHERE id = ? AND updated_at >= ?",
+                (job_id, time.time() - self.ttl_seconds),
+            ).fetchone()
+        return row[0] if row else None
+
+
+class RecentRequests:
+    """Card URLs requested from any worker within the last `window_seconds`."""
+
+    def __init__(self, path: str, window_seconds: float = 24 * 3600):
+        self.window_seconds = window_seconds
+        self._lock = threading.Lock()
+        self._recorded = 0
+        self._conn = _connect(path)
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS recent_requests (
+                url TEXT NOT NULL,
+                at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_recent_requests_at ON recent_requests(at)")
+
+    async def record_async(self, url: str) -> None:
+        await asyncio.to_thread(self.record, url)
+
+    def record(self, url: str) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.execute("INSERT INTO recent_requests (url, at) VALUES (?, ?)", (url, now))
+            self._recorded += 1
+            if self._recorded % 100 == 0:
+                self._conn.execute("DELETE FROM recent_requests WHERE at < ?", (now - self.window_seconds,))
+
+    def top(self, limit: int) -> List[str]:
+        """The `limit` most requested URLs in the window, most requested first."""
+        with self._lock:
+            rows = self._conn.execute(
+                """
+                SELECT url FROM recent_requests WHERE at >= ?
+                GROUP BY url ORDER BY COUNT(*) DESC, MAX(at) DESC LIMIT ?
+                """,
+                (time.time() - self.window_seconds, limit),
+            ).fetchall()
+        return [row[0] for row in rows]
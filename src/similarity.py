@@ -0,0 +1,191 @@
+"""
+Near-duplicate detection for card texts (MinHash + LSH in SQLite).
+
+Fine-tunes and quantizations often copy their base model's card with a few
+lines changed. Each graded card's text is reduced to a MinHash signature over
+word shingles and indexed by locality-sensitive hashing: the signature is cut
+into bands, and every band is hashed to one bucket row in `card_bands`. A
+lookup hashes the new card's bands the same way, reads the cards sharing any
+bucket through the bucket index and ranks them by estimated Jaccard
+similarity, so its cost depends on the number of candidates rather than on
+the size of the index.
+
+Signatures use one-permutation hashing: each shingle is hashed once and
+kept as the minimum of one of `num_perm` bins; empty bins borrow from the
+next filled bin. This is linear in the text length instead of `num_perm`
+hashes per shingle.
+"""
+
+import hashlib
+import pathlib
+import re
+import sqlite3
+import threading
+import time
+from array import array
+from dataclasses import dataclass
+from typing import List, Optional, Sequence
+
+SHINGLE_WORDS = 3
+NUM_PERM = 128
+# 32 bands of 4 rows: cards with Jaccard similarity 0.6 share a bucket ~99%
+# of the time, at 0.3 ~23%
+BANDS = 32
+MAX_CANDIDATES = 20
+
+WORD_RE = re.compile(r"\w+")
+_MAX64 = (1 << 64) - 1
+
+
+def shingle_hashes(text: str, k: int = SHINGLE_WORDS) -> set:
+    """64-bit hashes of the text's k-word shingles (lowercased)."""
+    words = WORD_RE.findall(text.lower())
+    if not words:
+        return set()
+    # Texts shorter than one shingle are a single shingle
+    k = min(k, len(words))
+    return {
+        int.from_bytes(hashlib.blake2b(" ".join(words[i:i + k]).encode("utf-8"), digest_size=8).digest(), "big")
+        for i in range(len(words) - k + 1)
+    }
+
+
+def signature(text: str, num_perm: int = NUM_PERM) -> List[int]:
+    """MinHash signature of the text (one-permutation hashing with densification)."""
+    bins: List[Optional[int]] = [None] * num_perm
+    for h in shingle_hashes(text):
+        b, value = h % num_perm, h // num_perm
+        if bins[b] is None or value < bins[b]:
+            bins[b] = value
+    if all(value is None for value in bins):
+        return [_MAX64] * num_perm
+    # An empty bin takes the value of the next filled bin, offset by the distance
+    span = (_MAX64 // num_perm) + 1
+    sig = []
+    for i in range(num_perm):
+        distance = 0
+        while bins[(i + distance) % num_perm] is None:
+            distance += 1
+        sig.append(bins[(i + distance) % num_perm] + distance * span)
+    return sig
+
+
+def similarity(a: Sequence[int], b: Sequence[int]) -> float:
+    """Estimated Jaccard similarity of two signatures."""
+    return sum(x == y for x, y in zip(a, b)) / len(a)
+
+
+def band_buckets(sig: Sequence[int], bands: int = BANDS) -> List[int]:
+    """One signed 64-bit bucket id per band (the band number is part of the hash)."""
+    rows = len(sig) // bands
+    buckets = []
+    for band in range(bands):
+        data = array("Q", sig[band * rows:(band + 1) * rows]).tobytes()
+        digest = hashlib.blake2b(data, digest_size=8, person=band.to_bytes(2, "big")).digest()
+        buckets.append(int.from_bytes(digest, "big", signed=True))
+    return buckets
+
+
+@dataclass
+class SimilarCard:
+    url: str
+    evaluation_id: Optional[int]
+    similarity: float
+
+
+class SimilarityIndex:
+    """MinHash signatures of graded cards with LSH band buckets, in SQLite."""
+
+    def __init__(self, path: str, num_perm: int = NUM_PERM, bands: int = BANDS):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.num_perm = num_perm
+        self.bands = bands
+        self._lock = threading.Lock()
+        if path != ":memory:":
+            pathlib.Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS card_signatures (
+                url TEXT PRIMARY KEY,
+                fingerprint TEXT NOT NULL,
+                evaluation_id INTEGER,
+                signature BLOB NOT NULL,
+                updated_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS card_bands (
+                bucket INTEGER NOT NULL,
+                url TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_card_bands_bucket ON card_bands(bucket);
+            CREATE INDEX IF NOT EXISTS idx_card_bands_url ON card_bands(url);
+            """
+        )
+
+    def signature(self, text: str) -> List[int]:
+        return signature(text, self.num_perm)
+
+    def add(self, url: str, fingerprint: str, sig: Sequence[int], evaluation_id: Optional[int] = None) -> None:
+        """Index (or re-index) the graded card at `url`."""
+        buckets = band_buckets(sig, self.bands)
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute("DELETE FROM card_bands WHERE url = ?", (url,))
+                self._conn.execute(
+                    """
+                    INSERT OR REPLACE INTO card_signatures (url, fingerprint, evaluation_id, signature, updated_at)
+                    VALUES (?, ?, ?, ?, ?)
+                    """,
+                    (url, fingerprint, evaluation_id, array("Q", sig).tobytes(), time.time()),
+                )
+                self._conn.executemany(
+                    "INSERT INTO card_bands (bucket, url) VALUES (?, ?)", [(bucket, url) for bucket in buckets]
+                )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def lookup(
+        self, sig: Sequence[int], fingerprint: str, threshold: float, exclude_url: Optional[str] = None
+    ) -> Optional[SimilarCard]:
+        """The most similar card graded with `fingerprint`, if it reaches `threshold`."""
+        buckets = band_buckets(sig, self.bands)
+        with self._lock:
+            rows = self._conn.execute(
+                f"""
+                SELECT s.url, s.evaluation_id, s.signature
+                FROM (
+                    SELECT url, COUNT(*) AS hits FROM card_bands
+                    WHERE bucket IN ({", ".join("?" * len(buckets))})
+                    GROUP BY url ORDER BY hits DESC LIMIT ?
+                ) AS c
+                JOIN card_signatures AS s ON s.url = c.url
+                WHERE s.fingerprint = ?
+                """,
+                (*buckets, MAX_CANDIDATES + 1, fingerprint),
+            ).fetchall()
+        best = None
+        for url, evaluation_id, blob in rows:
+            if url == exclude_url:
+                continue
+            score = similarity(sig, array("Q", blob))
+            if score >= threshold and (best is None or score > best.similarity):
+                best = SimilarCard(url=url, evaluation_id=evaluation_id, similarity=score)
+        return best
+
+    def remove(self, url: Optional[str] = None) -> int:
+        """Forget `url`, or every card."""
+        with self._lock:
+            if url is None:
+                self._conn.execute("DELETE FROM card_bands")
+                return self._conn.execute("DELETE FROM card_signatures").rowcount
+            self._conn.execute("DELETE FROM card_bands WHERE url = ?", (url,))
+            return self._conn.execute("DELETE FROM card_signatures WHERE url = ?", (url,)).rowcount
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM card_signatures").fetchone()[0]
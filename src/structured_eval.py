@@ -0,0 +1,257 @@
+"""
+Structured-output evaluation: the model answers with a compact JSON object
+instead of re-generating the whole review template.
+
+`StructuredEvaluation` mirrors the template's fields (basic info, snapshot,
+standards rows, gaps, category scores, resources, recommendations). The
+answer is requested with a strict JSON schema, validated here, and the
+template is filled locally with `render_markdown`, so headings, table borders
+and the scoring guide cost no output tokens and the total is computed rather
+than trusted.
+"""
+
+import json
+import re
+from typing import Dict, List, Literal, Optional
+
+from pydantic import BaseModel, ConfigDict, ValidationError
+
+try:
+    from src.incremental import CATEGORY_STANDARDS
+except ImportError:  # imported from within src/
+    from incremental import CATEGORY_STANDARDS
+
+CATEGORIES = list(CATEGORY_STANDARDS)
+STANDARD_ITEMS = list(CATEGORY_STANDARDS.values())
+RESOURCE_TYPES = ["Paper", "GitHub Repo", "Dataset", "Model Hub", "Other"]
+MAX_TOTAL = 3 * len(CATEGORIES)
+
+# Bump whenever the prompt rules or layout change so cached evaluations are not reused.
+STRUCTURED_PROMPT_VERSION = "1"
+STRUCTURED_SYSTEM_PROMPT = (
+    "You are an AI transparency reviewer evaluating model cards on Hugging Face.\n"
+    "Answer with a JSON object following the given schema. You MUST obey all of the following rules:\n"
+    "1. You may ONLY use information that comes from the provided PAGE TEXT or the URL.\n"
+    "   - Do NOT use outside knowledge, training data, or assumptions.\n"
+    "2. If a field is unknown or not specified in PAGE TEXT, use an empty string or a very short note\n"
+    "   like 'N/A – not specified in model card text'. Do NOT guess.\n"
+    "3. Give every standards item exactly one row: '✓' (present), '~' (partial) or '✗' (missing),\n"
+    "   with a short note.\n"
+    "4. Give every scoring category exactly one integer score: 3 = fully documented / clear,\n"
+    "   2 = present but incomplete, 1 = minimal mention, 0 = missing entirely.\n"
+    "5. Keep notes and recommendations short and specific to this card."
+)
+
+
+class StructuredOutputError(ValueError):
+    """The model's answer isn't a valid StructuredEvaluation."""
+
+
+class _Strict(BaseModel):
+    # Structured outputs require closed objects
+    model_config = ConfigDict(extra="forbid")
+
+
+class StandardRow(_Strict):
+    item: Literal[tuple(STANDARD_ITEMS)]
+    status: Literal["✓", "~", "✗"]
+    notes: str
+
+
+class ScoreRow(_Strict):
+    category: Literal[tuple(CATEGORIES)]
+    score: Literal[0, 1, 2, 3]
+
+
+class ResourceRow(_Strict):
+    type: Literal[tuple(RESOURCE_TYPES)]
+    link: str
+    key_facts: str
+
+
+class StructuredEvaluation(_Strict):
+    title: str
+    url: str
+    card_type: str
+    version_date: str
+    owner_contact: str
+    one_liner: str
+    intended_uses: str
+    out_of_scope_uses: str
+    linked_resources: str
+    standards: List[StandardRow]
+    gaps_missing: str
+    gaps_inconsistent: str
+    gaps_ambiguous: str
+    scores: List[ScoreRow]
+    resources: List[ResourceRow]
+    content_updates: List[str]
+    layout_improvements: List[str]
+    risk_additions: List[str]
+    summary: str
+
+    @property
+    def total(self) -> int:
+        return sum(row.score for row in self.scores)
+
+
+def response_schema() -> dict:
+    """`json_schema` argument for the LLM client (name + JSON schema)."""
+    return {"name": "card_evaluation", "schema": StructuredEvaluation.model_json_schema()}
+
+
+def build_structured_prompt(url: str, page_text: str) -> dict:
+    user = (
+        "CONTEXT (URL + scraped text):\n"
+        f"URL: {url}\n\n"
+        "PAGE TEXT (possibly truncated):\n"
+        f"{page_text}\n"
+    )
+    return {"system": STRUCTURED_SYSTEM_PROMPT, "user": user}
+
+
+def parse_structured(text: str) -> StructuredEvaluation:
+    """Validate the model's JSON answer; every item and category must appear exactly once."""
+    try:
+        evaluation = StructuredEvaluation.model_validate(json.loads(text))
+    except (json.JSONDecodeError, ValidationError) as e:
+        raise StructuredOutputError(f"Invalid structured evaluation: {e}") from e
+
+    for field, rows, expected in (
+        ("standards", [row.item for row in evaluation.standards], STANDARD_ITEMS),
+        ("scores", [row.category for row in evaluation.scores], CATEGORIES),
+    ):
+        if sorted(rows) != sorted(expected):
+            missing = sorted(set(expected) - set(rows))
+            repeated = sorted({name for name in rows if rows.count(name) > 1})
+            raise StructuredOutputError(
+                f"Invalid structured evaluation: {field} missing {missing or 'none'}, repeated {repeated or 'none'}"
+            )
+    return evaluation
+
+
+# --------------------------------------------------------------------
+# Local rendering
+# --------------------------------------------------------------------
+FIELD_LINE_RE = re.compile(r"^(\s*- \*\*)([^*]+?):\*\*")
+TABLE_ROW_RE = re.compile(r"^\|([^|]*)\|")
+SUMMARY_LINE = "**Summary paragraph:**"
+
+
+def _cell(text: str) -> str:
+    return " ".join(str(text).split()).replace("|", "\\|")
+
+
+def _one_line(text: str) -> str:
+    return " ".join(text.split())
+
+
+def _title_url(evaluation: StructuredEvaluation) -> str:
+    title, url = _one_line(evaluation.title), evaluation.url.strip()
+    if title and url:
+        return f"[{title}]({url})"
+    return title or url
+
+
+def render_markdown(template_md: str, evaluation: StructuredEvaluation) -> str:
+    """Fill the review template with a validated evaluation (lines it doesn't know are kept)."""
+    fields = {
+        "Card Title / URL": _title_url(evaluation),
+        "Type": evaluation.card_type,
+        "Version / Date": evaluation.version_date,
+        "Owner / Contact": evaluation.owner_contact,
+        "One-liner summary": evaluation.one_liner,
+        "Intended use(s)": evaluation.intended_uses,
+        "Out-of-scope use(s)": evaluation.out_of_scope_uses,
+        "Linked resources": evaluation.linked_resources,
+        "Missing": evaluation.gaps_missing,
+        "Inconsistent / conflicting": evaluation.gaps_inconsistent,
+        "Ambiguous": evaluation.gaps_ambiguous,
+    }
+    standards = {row.item: row for row in evaluation.standards}
+    scores = {row.category: row.score for row in evaluation.scores}
+    bullets = {
+        "Card Content Updates": evaluation.content_updates,
+        "Layout or Design Improvements": evaluation.layout_improvements,
+        "Risk / RAI Additions": evaluation.risk_additions,
+    }
+
+    out: List[str] = []
+    subsection: Optional[str] = None
+    resources_done = False
+    for line in template_md.splitlines():
+        stripped = line.strip()
+        if stripped.startswith("#"):
+            subsection = stripped.lstrip("#").strip()
+            out.append(line)
+            continue
+
+        m = FIELD_LINE_RE.match(line)
+        if m and m.group(2) in fields:
+            out.append(f"{m.group(1)}{m.group(2)}:** {_one_line(fields[m.group(2)])}".rstrip())
+            continue
+
+        if stripped == "-" and subsection in bullets:
+            items = [_one_line(item) for item in bullets[subsection] if item.strip()]
+            out.extend(f"- {item}" for item in items or ["N/A"])
+            continue
+
+        if stripped.startswith(SUMMARY_LINE):
+            out.append(f"{SUMMARY_LINE} {_one_line(evaluation.summary)}")
+            continue
+
+        row = TABLE_ROW_RE.match(stripped)
+        if row:
+            name = row.group(1).strip()
+            if name in standards:
+                s = standards[name]
+                out.append(f"| {name} | {s.status} | {_cell(s.notes)} |")
+                continue
+            if name in scores:
+                out.append(f"| {name} | {scores[name]} |")
+                continue
+            if name.replace("*", "").startswith("Total (/"):
+                out.append(f"| {name} | **{evaluation.total} / {MAX_TOTAL}** |")
+                continue
+            if name in RESOURCE_TYPES:
+                # The template lists one blank row per type; emit the model's rows instead
+                if not resources_done:
+                    resources_done = True
+                    rows = evaluation.resources or []
+                    out.extend(f"| {r.type} | {_cell(r.link)} | {_cell(r.key_facts)} |" for r in rows)
+                    if not rows:
+                        out.append(line)
+                continue
+
+        out.append(line)
+    return "\n".join(out) + "\n"
+
+
+def summarize(evaluation: StructuredEvaluation) -> Dict[str, object]:
+    """Response fields computed straight from the evaluation (no markdown parsing)."""
+    statuses = {row.item: row.status for row in evaluation.standards}
+    scores = {row.category: row.score for row in evaluation.scores}
+    return {
+        "basic_info": {
+            "title": _one_line(evaluation.title) or None,
+            "url": evaluation.url.strip() or None,
+            "type": _one_line(evaluation.card_type) or None,
+            "version": _one_line(evaluation.version_date) or None,
+            "owner": _one_line(evaluation.owner_contact) or None,
+        },
+        "category_scores": [{"name": c, "score": float(scores[c])} for c in CATEGORIES],
+        "raw_total": float(evaluation.total),
+        "standards_summary": {
+            "present": sum(1 for s in statuses.values() if s == "✓"),
+            "partial": sum(1 for s in statuses.values() if s == "~"),
+            "missing": sum(1 for s in statuses.values() if s == "✗"),
+            "total_items": len(statuses),
+            "missing_items": [item for item in STANDARD_ITEMS if statuses.get(item) == "✗"],
+            "partial_items": [item for item in STANDARD_ITEMS if statuses.get(item) == "~"],
+        },
+        "gaps": {
+            "missing": _one_line(evaluation.gaps_missing) or None,
+            "inconsistent": _one_line(evaluation.gaps_inconsistent) or None,
+            "ambiguous": _one_line(evaluation.gaps_ambiguous) or None,
+        },
+    }